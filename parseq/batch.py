@@ -0,0 +1,239 @@
+# -*- coding: utf-8 -*-
+u"""
+Batch processing without GUI
+----------------------------
+
+A command line runner that processes a project file or a list of data files
+by a ParSeq pipeline without creating any Qt widgets, e.g. on a compute node::
+
+    python -m parseq.batch project.pspj --export h5 --jobs 8
+
+The pipeline is found from the section [ParSeq Application] of the project
+file or can be given by the option ``--pipeline`` as an importable package
+that defines the function `make_pipeline(withGUI)`. The project is loaded by
+:func:`.core.save_restore.load_project` which also runs the transforms. Data
+files are inserted into the data root with the data format given as a json
+string by ``--format``. Optionally, all fits are run over the data items. The
+exports are written by :func:`.core.save_restore.save_data`.
+
+``--jobs`` sets the number of workers of those transforms and fits that are
+already parallel (*nThreads* or *nProcesses* > 1); the serial ones are left
+serial as they may need *allData*. For the transforms in the 'auto' mode it
+sets the maximal number of workers.
+
+``--remote`` sends the data items of the transforms with *nProcesses* > 1 to
+remote worker daemons, see :mod:`.core.remote`; the shared secret is taken
+from the environment variable PARSEQ_AUTHKEY.
+
+``--memory-budget`` limits the memory taken by the arrays of intermediate
+nodes, see :mod:`.core.memory`.
+
+A timing summary is printed as json and can be saved by ``--timing``: the wall
+times of the processing stages and, per transform and fit, the number of
+processed data items and the total and maximal item times.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import os
+import sys
+import time
+import json
+import argparse
+import importlib
+
+from .core import singletons as csi
+from .core import config
+from .core import commons as cco
+
+allExportTypes = 'txt', 'txt.gz', 'json', 'pickle', 'h5'
+
+
+def get_pipeline_name(projectFile):
+    """Returns the package name and its parent directory of the pipeline that
+    has saved *projectFile*."""
+    configProject = config.ConfigParser()
+    configProject.optionxform = str  # makes it case sensitive
+    with open(projectFile, encoding=config.encoding) as f:
+        configProject.read_file(f)
+    appPath = config.get(configProject, 'ParSeq Application', 'appPath', '')
+    if not appPath:
+        raise ValueError('no pipeline path in {0}, use --pipeline'.format(
+            projectFile))
+    appPath = os.path.normpath(appPath)
+    return os.path.basename(appPath), os.path.dirname(appPath)
+
+
+def make_pipeline(pipelineName, pipelinePath=None):
+    if pipelinePath and pipelinePath not in sys.path:
+        sys.path.append(pipelinePath)
+    module = importlib.import_module(pipelineName)
+    module.make_pipeline(withGUI=False)
+    csi.withGUI = False
+    return module
+
+
+def set_jobs(nJobs):
+    for worker in list(csi.transforms.values()) + list(csi.fits.values()):
+        if hasattr(worker, 'costModel') and 'auto' in (
+                worker.nThreads, worker.nProcesses):
+            worker.costModel.maxWorkers = nJobs
+        elif isinstance(worker.nThreads, str) or worker.nThreads > 1:
+            worker.nThreads = nJobs
+        elif isinstance(worker.nProcesses, str) or worker.nProcesses > 1:
+            worker.nProcesses = nJobs
+
+
+def run_fits(items):
+    for fit in csi.fits.values():
+        if fit.node is None:
+            continue
+        fitItems = [it for it in items if
+                    it.state[fit.node.name] == cco.DATA_STATE_GOOD]
+        if fitItems:
+            fit.run(dataItems=fitItems)
+
+
+def get_worker_times(items):
+    res = {}
+    for name in list(csi.transforms) + list(csi.fits):
+        dts = [it.transfortmTimes[name] for it in items
+               if name in it.transfortmTimes]
+        if dts:
+            res[name] = dict(n=len(dts), total=round(sum(dts), 6),
+                             max=round(max(dts), 6))
+    return res
+
+
+def process(projectFile=None, dataFiles=(), pipelineName=None,
+            dataFormat=None, originNodeName=None, exportTypes=(),
+            exportNodes=None, outDir=None, nJobs=None, withFits=False,
+            runPipelined=False, useDiskCache=False, remoteWorkers=(),
+            memoryBudget=None):
+    """Loads and processes the data and writes the exports. Returns a dict of
+    the timing summary."""
+    from .core import save_restore as csr
+    from .core import transforms as ctr
+    from .core import workers as cwo
+
+    timing = {}
+    t0 = time.time()
+    if projectFile is not None:
+        projectFile = os.path.abspath(projectFile)
+    if pipelineName is None:
+        if projectFile is None:
+            raise ValueError('--pipeline is needed without a project file')
+        pipelineName, pipelinePath = get_pipeline_name(projectFile)
+    else:
+        pipelinePath = None
+    dataFiles = [os.path.abspath(fname) for fname in dataFiles]
+    make_pipeline(pipelineName, pipelinePath)
+    if nJobs:
+        set_jobs(nJobs)
+    csi.runPipelined = runPipelined
+    csi.useDiskCache = useDiskCache
+    csi.memoryBudget = memoryBudget
+    if remoteWorkers:
+        from .core import remote as cre
+        cwo.set_remote_workers(
+            remoteWorkers, os.environ.get(cre.authkeyVariable, ''))
+    timing['pipeline'] = time.time() - t0
+
+    t0 = time.time()
+    root = csi.dataRootItem
+    if projectFile is not None:
+        csr.load_project(projectFile)
+    if dataFiles:
+        kw = dict(dataFormat=dataFormat if dataFormat else {})
+        if originNodeName:
+            kw['originNodeName'] = originNodeName
+        newItems = root.insert_data(dataFiles, **kw)
+        ctr.run_transforms(newItems, root)
+    items = root.get_items()
+    csi.selectedItems[:] = items
+    timing['load and transform'] = time.time() - t0
+
+    if withFits:
+        t0 = time.time()
+        run_fits(items)
+        timing['fits'] = time.time() - t0
+
+    if exportTypes:
+        t0 = time.time()
+        if outDir is None:
+            outDir = os.path.dirname(projectFile) if projectFile else \
+                os.getcwd()
+        if not os.path.exists(outDir):
+            os.makedirs(outDir)
+        baseName = os.path.splitext(os.path.basename(projectFile))[0] \
+            if projectFile else csi.pipelineName
+        saveNodes = [exportNodes is None or node.name in exportNodes
+                     for node in csi.nodes.values()]
+        csr.save_data(os.path.join(os.path.abspath(outDir), baseName),
+                      saveNodes, exportTypes)
+        timing['export'] = time.time() - t0
+
+    cwo.shutdown_pools()
+    return dict(
+        pipeline=csi.pipelineName, project=projectFile, nItems=len(items),
+        errors=[it.alias for it in items if it.error is not None],
+        stages=dict((key, round(val, 6)) for key, val in timing.items()),
+        workers=get_worker_times(items))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m parseq.batch',
+        description='Processes a ParSeq project or data files without GUI.')
+    parser.add_argument('project', nargs='?', help='project file (.pspj)')
+    parser.add_argument('-p', '--pipeline',
+                        help='importable pipeline package, e.g. parseq_XAS')
+    parser.add_argument('-f', '--files', nargs='+', default=[],
+                        help='data files to insert into the data tree')
+    parser.add_argument('--format', help='json dict of the data format of '
+                        'the data files, e.g. \'{"dataSource": ["Col1"]}\'')
+    parser.add_argument('--origin', help='origin node name of the data files')
+    parser.add_argument('-e', '--export', nargs='+', default=[],
+                        choices=allExportTypes, help='export file types')
+    parser.add_argument('-n', '--nodes', nargs='+',
+                        help='nodes to export, default all')
+    parser.add_argument('-o', '--out', help='export directory, default: '
+                        'that of the project file')
+    parser.add_argument('-j', '--jobs', type=int,
+                        help='number of workers of parallel transforms/fits')
+    parser.add_argument('--fits', action='store_true', help='run all fits')
+    parser.add_argument('--pipelined', action='store_true',
+                        help='run transforms pipelined, see core.pipeline')
+    parser.add_argument('--disk-cache', action='store_true',
+                        help='use the disk cache in the project directory')
+    parser.add_argument('--remote', nargs='+', default=[],
+                        metavar='HOST:PORT', help='remote worker daemons, '
+                        'the secret is in the environment variable '
+                        'PARSEQ_AUTHKEY')
+    parser.add_argument('--memory-budget', type=float, metavar='MB',
+                        help='memory budget of the arrays of intermediate '
+                        'nodes, default unlimited')
+    parser.add_argument('-t', '--timing', help='json file of the timing '
+                        'summary, the summary is also printed')
+    args = parser.parse_args(argv)
+    if args.project is None and not args.files:
+        parser.error('give a project file or data files')
+    timingFile = os.path.abspath(args.timing) if args.timing else None
+
+    summary = process(
+        args.project, args.files, args.pipeline,
+        json.loads(args.format) if args.format else None, args.origin,
+        args.export, args.nodes, args.out, args.jobs, args.fits,
+        args.pipelined, args.disk_cache, args.remote,
+        None if args.memory_budget is None else
+        int(args.memory_budget * 2**20))
+    print(json.dumps(summary, indent=2))
+    if timingFile:  # the current dir may have been changed by load/export
+        with open(timingFile, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -394,7 +394,9 @@ Start implementing a transformation class by defining a dictionary
 `defaultParams` containing default parameter values. Specify whether to use
 multiprocessing or multithreading by setting `nProcesses` or `nThreads`. If
 either value exceeds 1 (both default to 1), you must also define two lists of
-array names: `inArrays` and `outArrays`.
+array names: `inArrays` and `outArrays`. Either value can also be 'auto' to
+let the transform choose between serial, threaded and multiprocess execution
+from the measured cost of its recent runs (see :mod:`.autotune`).
 
 Implement the main transformation logic in a *static* or *class* method,
 :meth:`.Transform.run_main`. Note that this method supports multiple signatures.
@@ -409,6 +411,18 @@ To access arrays from other data objects, use an alternative signature of
 :meth:`.Transform.run_main` that includes the *allData* argument. Note that
 multiprocessing is not supported in this case.
 
+With a memory budget (`singletons.memoryBudget`, see :mod:`.memory`), the
+arrays of intermediate nodes can be evicted and later recalculated for a single
+data item by rerunning :meth:`.Transform.run_main`. Therefore, the output
+arrays should only depend on the input arrays and the transformation
+parameters.
+
+A transformation of 3D stacks that works frame by frame can declare
+`chunkAxis` (see :mod:`.chunked`). Its :meth:`.Transform.run_main` is then
+called per chunk of frames, and the 3D arrays declared `lazy` in the node are
+read from their hdf5 datasets chunk by chunk, so that stacks larger than RAM
+can be processed.
+
 Make GUI widgets
 ----------------
 
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+u"""
+Automatic choice of the execution mode
+--------------------------------------
+
+A transform with *nThreads* = 'auto' and/or *nProcesses* = 'auto' decides at
+each run whether to transform the data items serially in the calling thread,
+in the thread pool or in the process pool (only those pools that are set to
+'auto' are considered) and how many workers to use. The decision minimizes
+the wall time estimated by :class:`CostModel` from the recent runs of the same
+transform:
+
+- *itemTime*, the time of `run_main` per item, measured in the calling thread
+  and in process workers;
+- *threadEfficiency*, the fraction of an additional thread that contributes
+  to the speed-up; it is low for Python code that holds the GIL and close to
+  1 for numpy code that releases it;
+- *secPerByte*, the cost of moving the input and output arrays to and from a
+  process worker, including (de)serialization.
+
+All quantities are exponential moving averages with the weight *alpha* of the
+newest value; *itemTime* follows a change by more than *jumpFactor*, e.g. of
+the transformation parameters, at once. A run without a known *itemTime*
+starts serially in the calling thread; after each serially transformed item
+the choice is made again for the remaining items, so that a run switches to a
+pool as soon as the items turn out to be expensive. Starting new process
+workers costs *processStartTime*, so small selections stay serial or go to
+already running workers.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import multiprocessing
+
+alpha = 0.3  # weight of the newest value in the moving averages
+jumpFactor = 3.  # a new itemTime that differs more is taken as is
+processStartTime = 0.3  # s, until new process workers take tasks
+processTaskOverhead = 1e-3  # s, queueing of one task to a process
+threadTaskOverhead = 2e-4  # s, queueing of one task to a thread
+defaultSecPerByte = 5e-10  # s, ~2 GB/s of shared memory or pickle
+defaultThreadEfficiency = 0.5
+
+
+def _ema(old, new):
+    return new if old is None else old + alpha*(new-old)
+
+
+def _ema_jump(old, new):
+    if old is None or not (old/jumpFactor <= new <= old*jumpFactor):
+        return new
+    return _ema(old, new)
+
+
+def get_nbytes(items, keys):
+    """Returns the size of the arrays *keys* of the first of *items*."""
+    if not items:
+        return 0
+    return sum(getattr(getattr(items[0], key, None), 'nbytes', 0)
+               for key in keys)
+
+
+class CostModel(object):
+    """Collects the timings of one transform and estimates the wall time of a
+    run in each execution mode."""
+
+    def __init__(self):
+        self.itemTime = None
+        self.threadEfficiency = None
+        self.secPerByte = None
+        self.outBytes = None  # of the output arrays per item
+        self.maxWorkers = None  # default cpu_count()
+
+    def add_serial(self, dt):
+        self.itemTime = _ema_jump(self.itemTime, dt)
+
+    def add_task(self, workerType, info):
+        """Takes *info* of a 'done' message of a pool worker."""
+        if not info:
+            return
+        self.outBytes = _ema(self.outBytes, info['nBytes'])
+        if workerType == 'process':  # a thread's wall includes GIL waits
+            self.itemTime = _ema_jump(self.itemTime, info['wall'])
+
+    def add_transfer(self, dt, nBytes):
+        """Takes the total transfer time of a process task of *nBytes*."""
+        if nBytes > 0:
+            self.secPerByte = _ema(
+                self.secPerByte, max(dt-processTaskOverhead, 0) / nBytes)
+
+    def add_run(self, workerType, nItems, nWorkers, dt):
+        """Takes the wall time *dt* of a pool run of *nItems*."""
+        if workerType != 'thread' or self.itemTime is None or nWorkers < 2 \
+                or dt <= 0:
+            return
+        speedup = nItems * self.itemTime / dt
+        eff = min(max((speedup-1) / (nWorkers-1), 0.), 1.)
+        self.threadEfficiency = _ema(self.threadEfficiency, eff)
+
+    def estimate(self, mode, nItems, nWorkers=1, inBytes=0, nStarted=0):
+        """Returns the estimated wall time of transforming *nItems* in *mode*
+        ('serial', 'thread' or 'process') by *nWorkers*, of which *nStarted*
+        are already running."""
+        t = self.itemTime
+        if mode == 'serial':
+            return nItems * t
+        if mode == 'thread':
+            eff = self.threadEfficiency
+            if eff is None:
+                eff = defaultThreadEfficiency
+            return nItems * (t/(1 + (nWorkers-1)*eff) + threadTaskOverhead)
+        if mode == 'process':
+            nBytes = inBytes + (inBytes if self.outBytes is None
+                                else self.outBytes)
+            secPerByte = defaultSecPerByte if self.secPerByte is None \
+                else self.secPerByte
+            transfer = nItems * (processTaskOverhead + nBytes*secPerByte)
+            start = processStartTime if nWorkers > nStarted else 0.
+            # the transfers are done by the calling process one by one:
+            return start + max(nItems*t/nWorkers, transfer)
+        raise ValueError('unknown mode {0}'.format(mode))
+
+    def choose(self, modes, nItems, inBytes=0, nStarted={}):
+        """Returns a tuple (mode, nWorkers) of the least estimated wall time.
+        *modes* are the allowed pool types, serial is always allowed.
+        *nStarted* is a dict of the running workers per pool type."""
+        if self.itemTime is None or nItems < 2:
+            return 'serial', 1
+        maxWorkers = self.maxWorkers or multiprocessing.cpu_count()
+        best = self.estimate('serial', nItems), 'serial', 1
+        for mode in modes:
+            started = nStarted.get(mode, 0)
+            for nWorkers in set([min(nItems, maxWorkers),
+                                 min(nItems, maxWorkers, started)]):
+                if nWorkers < 2:
+                    continue
+                dt = self.estimate(mode, nItems, nWorkers, inBytes, started)
+                if dt < best[0]:
+                    best = dt, mode, nWorkers
+        return best[1:]
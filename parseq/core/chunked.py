@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+u"""
+Chunked processing of large arrays
+----------------------------------
+
+A transformation that works frame by frame, or block by block, along one
+axis of its input arrays declares this axis as *chunkAxis* (see
+:class:`.Transform`). Its :meth:`run_main` is then called not once per data
+item but once per chunk: *data* is a :class:`DataChunk` that holds the slices
+of the *inArrays* along *chunkAxis* and gives all other attributes of the data
+item. The chunks of the *outArrays* set by :meth:`run_main` are written into
+output arrays preallocated at the first chunk. The outputs larger than
+*memmapMinSize* bytes are allocated as memory maps of temporary files, so that
+they need not fit into RAM. A data item is split into chunks of
+*chunkLength* frames or, if this is None, of about *chunkBytes* of input.
+
+A 2D or 3D array of a node can be declared *lazy* (see :class:`.Node`). When
+read from an hdf5 dataset, such an array is not loaded; the data item keeps a
+:class:`LazyArray` in its dict `lazyArrays` instead. A chunked transformation
+reads the lazy arrays chunk by chunk, so a stack larger than RAM can pass it.
+Any other access to a lazy array reads it in full, once.
+
+The same class reads the *slices* of `dataFormat` of a plain hdf5 dataset
+(see :meth:`.Spectrum.read_file`): a slice is read as an hdf5 hyperslab and a
+sum over axes is accumulated block by block along the first axis, so only the
+needed data are read and the peak memory is one block of about *chunkBytes*.
+
+The chunked transformations run in the calling thread, one data item after
+another; the progress is reported per chunk.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import os
+import tempfile
+import numpy as np
+from silx.io.url import DataUrl
+
+from .nodes import cast_array
+from . import h5pool as chp
+from . import formulas as cfm
+from .workers import Progress
+
+chunkBytes = 2**26  # input bytes per chunk when chunkLength is None
+memmapMinSize = 2**30  # bytes, larger outputs are memory mapped
+tempDir = None  # of the memory mapped outputs, None for the system default
+
+
+class LazyArray(object):
+    """An hdf5 dataset at *url* that is read on demand, sliced as an array."""
+
+    def __init__(self, url, dtype=None):
+        dataUrl = DataUrl(url)
+        self.url = url
+        self.fileName = dataUrl.file_path()
+        self.dataPath = dataUrl.data_path()
+        with chp.lock:
+            dataset = chp.get_file(self.fileName)[self.dataPath]
+            self.shape = dataset.shape
+            self.chunks = getattr(dataset, 'chunks', None)  # hdf5 chunking
+            self.dtype = np.dtype(dataset.dtype if dtype is None else dtype)
+        self.mtime = os.path.getmtime(self.fileName)
+
+    def __repr__(self):
+        return "LazyArray {0} of {1}".format(self.shape, self.url)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def nbytes(self):
+        return int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def __getitem__(self, key):
+        with chp.lock:
+            dataset = chp.get_file(self.fileName)[self.dataPath]
+            try:
+                arr = dataset[key]
+            except (TypeError, ValueError):  # e.g. negative steps in h5py
+                arr = dataset[()][key]
+            return cast_array(arr, self.dtype)
+
+    def read(self):
+        return self[()]
+
+    def get_block_length(self):
+        """The number of frames along the first axis in about *chunkBytes*,
+        a multiple of the hdf5 chunk length if the dataset is chunked."""
+        frameBytes = max(self.nbytes // max(self.shape[0], 1), 1)
+        length = max(chunkBytes // frameBytes, 1)
+        if self.chunks:
+            length = max(length // self.chunks[0], 1) * self.chunks[0]
+        return length
+
+    def sum(self, axis=None, dtype=None):
+        """As `np.sum` of the whole array, read block by block along the first
+        axis."""
+        if self.ndim == 0 or self.shape[0] == 0:
+            return self.read().sum(axis=axis, dtype=dtype)
+        if axis is None:
+            axes = tuple(range(self.ndim))
+        else:
+            axes = tuple(ax % self.ndim for ax in
+                         (axis if isinstance(axis, tuple) else (axis,)))
+        length = self.get_block_length()
+        res = None
+        for start in range(0, self.shape[0], length):
+            stop = min(start+length, self.shape[0])
+            part = self[start:stop].sum(axis=axes, dtype=dtype)
+            if 0 in axes:  # accumulate
+                if res is None:
+                    res = part
+                else:
+                    res += part
+            else:  # fill
+                if res is None:
+                    res = np.empty((self.shape[0],) + part.shape[1:],
+                                   dtype=part.dtype)
+                res[start:stop] = part
+        return res
+
+
+def get_lazy_url(data, txt):
+    """Returns the url of the dataset given by the data source *txt* of the
+    hdf5 data item *data* or None if *txt* is an expression."""
+    if not isinstance(txt, str):
+        return
+    try:
+        txt = cfm.compile_formula(txt).key
+    except ValueError:
+        return
+    if txt is None:
+        return  # an expression, see formulas.py
+    url = txt if txt.startswith('silx:') else '/'.join((data.madeOf, txt))
+    if DataUrl(url).data_slice() is not None:
+        return
+    return url
+
+
+def get_input(data, key):
+    """Returns the array *key* of the data item *data*, a :class:`LazyArray`
+    if it has not been read."""
+    if key in data.__dict__:
+        return data.__dict__[key]
+    lazy = data.__dict__.get('lazyArrays', {}).get(key)
+    return lazy if lazy is not None else getattr(data, key, None)
+
+
+class DataChunk(object):
+    """The data item *data* seen by :meth:`run_main` of a chunked transform:
+    the arrays in *inArrays* are sliced to the frames *start*:*stop* along
+    *axis*, the other attributes are those of *data*."""
+
+    def __init__(self, data, inputs, axis, start, stop):
+        self._data = data
+        self.axis, self.start, self.stop = axis, start, stop
+        sl = (slice(None),)*axis + (slice(start, stop),)
+        for key, arr in inputs.items():
+            setattr(self, key, arr[sl])
+
+    def __getattr__(self, name):  # only called for a missing attribute
+        if name.startswith('__') or name == '_data':
+            raise AttributeError(name)
+        return getattr(self._data, name)
+
+
+def _make_output(shape, dtype):
+    if int(np.prod(shape)) * np.dtype(dtype).itemsize > memmapMinSize:
+        return np.memmap(tempfile.TemporaryFile(dir=tempDir), dtype=dtype,
+                         mode='w+', shape=shape)
+    return np.empty(shape, dtype=dtype)
+
+
+class ChunkedRun(object):
+    """Runs *transform* for one data item chunk by chunk."""
+
+    def __init__(self, transform, data):
+        self.transform = transform
+        self.data = data
+        self.axis = transform.chunkAxis
+        self.inputs = {}  # the arrays to be sliced
+        self.length = None  # along axis
+        for key in transform.inArrays:
+            arr = get_input(data, key)
+            if not hasattr(arr, 'shape') or len(arr.shape) <= self.axis:
+                continue  # passed whole via DataChunk.__getattr__
+            if self.length is None:
+                self.length = arr.shape[self.axis]
+            elif arr.shape[self.axis] != self.length:
+                continue
+            self.inputs[key] = arr
+
+    def get_chunk_length(self):
+        if self.transform.chunkLength:
+            return self.transform.chunkLength
+        frameBytes = sum(arr.nbytes for arr in self.inputs.values()) / \
+            max(self.length, 1)
+        return max(int(chunkBytes // max(frameBytes, 1)), 1)
+
+    def is_needed(self):
+        """Chunks are not needed for the in-memory inputs that fit into one
+        chunk."""
+        if not self.inputs or not self.length:
+            return False
+        if any(isinstance(arr, LazyArray) for arr in self.inputs.values()):
+            return True
+        return self.get_chunk_length() < self.length
+
+    def run(self, *argVals):
+        """The arguments are those of :meth:`run_main`."""
+        transform, data = self.transform, self.data
+        outKeys = transform._get_out_keys()
+        dtypes = transform.toNode.get_dtypes(outKeys)
+        progress = argVals[-1] if isinstance(argVals[-1], Progress) else None
+        chunkLength = self.get_chunk_length()
+        outputs, res = {}, None
+        for start in range(0, self.length, chunkLength):
+            if progress is not None and progress.isCancelled:
+                return
+            stop = min(start + chunkLength, self.length)
+            chunk = DataChunk(data, self.inputs, self.axis, start, stop)
+            chunkArgs = [chunk] + list(argVals[1:])
+            if progress is not None:
+                chunkArgs[-1] = Progress(progress.startEpoch)
+            res = transform.run_main(*chunkArgs)
+            if res is None:
+                return
+            sl = (slice(None),)*self.axis + (slice(start, stop),)
+            for key in outKeys:
+                val = chunk.__dict__.get(key)
+                if not isinstance(val, np.ndarray) or val.ndim <= self.axis \
+                        or val.shape[self.axis] != stop - start:
+                    continue
+                if key not in outputs:
+                    shape = list(val.shape)
+                    shape[self.axis] = self.length
+                    outputs[key] = _make_output(
+                        shape, dtypes.get(key, val.dtype))
+                outputs[key][sl] = val
+            if progress is not None:
+                progress.value = stop / self.length
+        for key, val in chunk.__dict__.items():  # e.g. scalars of last chunk
+            if key not in self.inputs and key not in outputs and \
+                    key not in ('_data', 'axis', 'start', 'stop'):
+                setattr(data, key, val)
+        for key, val in outputs.items():
+            data.__dict__.get('lazyArrays', {}).pop(key, None)
+            setattr(data, key, val)
+        return res
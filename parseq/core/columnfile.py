@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+u"""
+Reading of column files
+-----------------------
+
+The numeric columns of a data file are read by :func:`read_columns`. The
+parsing engine is selected per data format by the key 'parser' of
+`dataFormat`:
+
+- 'fast' (default, see *defaultParser*): `np.loadtxt`, which parses in
+  compiled code. The rows may have more columns than those in *usecols*. If a
+  row is shorter than needed or has a non-numeric value, the file is parsed
+  again by the 'genfromtxt' engine, so the results are the same as before,
+  only faster for regular files.
+
+- 'genfromtxt': `np.genfromtxt`, which parses token by token in Python. It is
+  also used for the reading options that `np.loadtxt` does not have, e.g.
+  *skip_footer* or *missing_values*.
+
+The reading options are those of `np.genfromtxt`.
+
+A data file is read by :func:`read_column_file` in one pass: the (possibly
+gzipped) file is read and decoded once, its header lines are collected as by
+:func:`.commons.get_header` and its lines are given to the parser.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import io
+import gzip
+import warnings
+import numpy as np
+
+from .commons import MAX_HEADER_LINES
+from .logger import syslogger
+
+PARSERS = 'fast', 'genfromtxt'
+defaultParser = 'fast'
+
+# genfromtxt option: loadtxt option
+_fastOptions = dict(comments='comments', delimiter='delimiter',
+                    skip_header='skiprows', usecols='usecols',
+                    max_rows='max_rows', dtype='dtype')
+
+
+def _get_fast_options(readkwargs):
+    res = {}
+    for key, val in readkwargs.items():
+        if key not in _fastOptions:
+            return
+        res[_fastOptions[key]] = val
+    return res
+
+
+def read_columns(fname, readkwargs, maxRows=None):
+    """Returns a 2D array of the columns of the file, or of the list of
+    lines, *fname* (or a 1D array for a single column or a single row).
+    *readkwargs* are the reading options of `np.genfromtxt` plus an optional
+    'parser', one of *PARSERS*.
+    *maxRows* limits the number of rows to read."""
+    kw = dict(readkwargs)
+    parser = kw.pop('parser', defaultParser)
+    if parser not in PARSERS:
+        raise ValueError('unknown parser "{0}"'.format(parser))
+    if maxRows is not None:
+        kw['max_rows'] = maxRows
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        if parser == 'fast':
+            fastKW = _get_fast_options(kw)
+            if fastKW is not None:
+                try:
+                    return np.loadtxt(
+                        fname, unpack=True, encoding="utf-8", **fastKW)
+                except ValueError as e:  # ragged or non-numeric rows
+                    syslogger.info('fast parser failed for {0}: {1}'.format(
+                        fname if isinstance(fname, str) else 'lines', e))
+        return np.genfromtxt(fname, unpack=True, encoding="utf-8", **kw)
+
+
+def read_lines(fname):
+    """Returns the lines of the text file *fname*, also of a gzipped one."""
+    if fname.endswith('.gz'):
+        with gzip.open(fname, 'rt', encoding="utf-8") as f:
+            text = f.read()
+    else:
+        with open(fname, 'r', encoding="utf-8") as f:
+            text = f.read()
+    return io.StringIO(text).readlines()
+
+
+def split_header(lines, readkwargs):
+    """Returns the header lines of *lines*, as :func:`.commons.get_header`
+    with *searchAllLines*: the first *skiprows* lines, or the lines up to the
+    last one that contains *lastSkipRowContains*, and all the lines starting
+    with '#'. Sets *skiprows* in *readkwargs* in the latter case."""
+    skipUntil = readkwargs.pop('lastSkipRowContains', '')
+    headerLen = -1
+    if 'skiprows' not in readkwargs:
+        if skipUntil:
+            for il, line in enumerate(lines[:MAX_HEADER_LINES+1]):
+                if skipUntil in line:
+                    headerLen = il
+            if headerLen >= 0:
+                readkwargs['skiprows'] = headerLen + 1
+    else:
+        headerLen = readkwargs['skiprows']
+    return [line for il, line in enumerate(lines)
+            if (headerLen >= 0 and il < headerLen) or line.startswith('#')]
+
+
+def read_column_file(fname, readkwargs):
+    """Reads the file *fname* in one pass and returns a tuple of the header
+    lines and the columns. *readkwargs* are the options of
+    :func:`read_columns` with *skiprows* and *lastSkipRowContains* instead of
+    *skip_header*; they are changed in place."""
+    lines = read_lines(fname)
+    header = split_header(lines, readkwargs)
+    readkwargs['skip_header'] = readkwargs.pop('skiprows', 0)
+    return header, read_columns(lines, readkwargs)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+u"""
+Disk cache of transformation results
+------------------------------------
+
+A transformation with *useDiskCache* = True stores its outputs, the
+resulting transformation parameters and the data state in a disk cache, if
+the cache is opened. The cache entries are content addressed: the key is a
+hash of the transformation name and its *cacheVersion*, the pipeline name and
+version and the fingerprint of the data item, i.e. of the input arrays and the
+transformation parameters (see :meth:`.Transform.get_fingerprint`). Before
+transforming a data item, the transformation looks up its key; on a cache hit
+the results are read from the disk instead of being calculated. This speeds up
+repeated sessions on the same data and undo/redo of transformation
+parameters.
+
+The cache is a directory of .npz files, one per entry. Its total size is kept
+below *maxSize* bytes by removing the least recently used entries.
+
+When `singletons.useDiskCache` is True, :func:`.save_restore.load_project`
+opens the cache in the sub-directory *cacheDirName* of the project directory.
+In scripts, a cache may be opened by :func:`set_disk_cache`.
+
+The parameters are stored by pickling, so only caches created by the user
+should be opened.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+import numpy as np
+
+from . import singletons as csi
+from .logger import syslogger
+
+cacheDirName = '.parseqCache'
+cacheExt = '.npz'
+
+
+class DiskCache(object):
+    """A size-bounded LRU store of dicts of numpy arrays."""
+
+    def __init__(self, path, maxSize=2**30):
+        self.path = path
+        self.maxSize = maxSize
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key: file size, from old to new
+        self.size = 0
+        with self.lock:
+            self._scan()
+            self._evict()
+
+    def __repr__(self):
+        return "DiskCache at {0}: {1} entries of {2:.1f} MB".format(
+            self.path, len(self.entries), self.size/2**20)
+
+    def _scan(self):
+        files = []
+        for fname in os.listdir(self.path):
+            if not fname.endswith(cacheExt):
+                continue
+            fullName = os.path.join(self.path, fname)
+            try:
+                stat = os.stat(fullName)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, fname[:-len(cacheExt)], stat.st_size))
+        for mtime, key, size in sorted(files):
+            self.entries[key] = size
+            self.size += size
+
+    def _get_file_name(self, key):
+        return os.path.join(self.path, key + cacheExt)
+
+    @staticmethod
+    def make_key(*args):
+        return hashlib.sha1(repr(args).encode()).hexdigest()
+
+    def get(self, key):
+        """Returns the dict stored under *key* or None."""
+        with self.lock:
+            if key not in self.entries:
+                return
+            fname = self._get_file_name(key)
+            try:
+                with np.load(fname, allow_pickle=True) as f:
+                    res = dict((name, f[name]) for name in f.files)
+                os.utime(fname, None)
+            except Exception as e:
+                syslogger.error('Error in DiskCache.get():\n{0}'.format(e))
+                self._remove(key)
+                return
+            self.entries.move_to_end(key)
+        return res
+
+    def put(self, key, arrays):
+        """Stores the dict *arrays* under *key* and evicts the least recently
+        used entries if the cache has become too big."""
+        fname = self._get_file_name(key)
+        tmpName = fname + '.tmp'
+        with self.lock:
+            try:
+                with open(tmpName, 'wb') as f:
+                    np.savez(f, **arrays)
+                os.replace(tmpName, fname)
+                size = os.path.getsize(fname)
+            except Exception as e:
+                syslogger.error('Error in DiskCache.put():\n{0}'.format(e))
+                if os.path.exists(tmpName):
+                    os.remove(tmpName)
+                return
+            self.size += size - self.entries.pop(key, 0)
+            self.entries[key] = size
+            self._evict()
+
+    def _evict(self):
+        while self.size > self.maxSize and len(self.entries) > 1:
+            self._remove(next(iter(self.entries)))
+
+    def _remove(self, key):
+        self.size -= self.entries.pop(key, 0)
+        try:
+            os.remove(self._get_file_name(key))
+        except OSError:
+            pass
+
+    def clear(self):
+        with self.lock:
+            for key in list(self.entries):
+                self._remove(key)
+
+
+def set_disk_cache(path, maxSize=None):
+    """Opens the session-wide disk cache at *path*. If *path* is None, the
+    cache is closed."""
+    if path is None:
+        csi.diskCache = None
+        return
+    csi.diskCache = DiskCache(
+        path, csi.diskCacheMaxSize if maxSize is None else maxSize)
+    return csi.diskCache
@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+u"""
+Data source formulas
+--------------------
+
+An entry of `dataSource` in `dataFormat` is a formula of the arrays of a data
+file: an hdf5 name (relative to the data item or an absolute 'silx:' url), a
+formula of hdf5 names as ``d["I1"]/d["I0"]``, a formula of columns as
+``Col3/Col2`` (or ``d[3]/d[2]``) or a NumPy expression as
+``np.log(d["I0"]/d["I1"])`` or ``np.arange(100)``.
+
+A formula is compiled by :func:`compile_formula` once and cached, so the
+many files of one data format are not parsed again. Compiling does not
+evaluate anything but string concatenations of constants. The compiled
+formula is checked to use only arithmetic, the array keys *d[...]*, a few
+builtins (*allowedBuiltins*) and the NumPy functions and constants listed in
+*allowedNumpy*, called as ``np.name``; no other attribute is accessible, so a
+data format cannot run arbitrary code. Its array keys are known before
+reading a file; for column files, :attr:`Formula.columns` gives the column
+indices.
+
+The other strings of a data format, i.e. the expansion of `dataSource` lists,
+the `conversionFactors` as ``lim(None, 5)``, ``slice(1, -1)`` or
+``transpose(1, 0)`` and the slices of `checkShapes`, are evaluated by
+:func:`literal_eval` that accepts only literals, their arithmetic and a few
+constructors.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import re
+import ast
+import string
+from functools import lru_cache
+import numpy as np
+
+allowedBuiltins = dict(abs=abs, min=min, max=max, round=round, len=len,
+                       int=int, float=float, str=str, sum=sum)
+
+# the only attributes allowed in formulas, as np.name
+allowedNumpy = frozenset("""
+    abs absolute sqrt cbrt square power exp exp2 expm1 log log10 log2 log1p
+    sin cos tan arcsin arccos arctan arctan2 sinh cosh tanh arcsinh arccosh
+    arctanh hypot deg2rad rad2deg degrees radians sign floor ceil round rint
+    trunc real imag angle conj conjugate minimum maximum fmin fmax clip where
+    sum prod mean average median std var min max amin amax ptp nansum nanmean
+    nanmax nanmin cumsum cumprod diff gradient interp trapezoid convolve
+    isnan isfinite isinf nan_to_num logical_and logical_or logical_not
+    arange linspace logspace zeros ones full zeros_like ones_like full_like
+    array asarray concatenate stack hstack vstack column_stack roll flip sort
+    argsort argmax argmin unique float32 float64 int32 int64 complex128
+    pi e inf nan""".split())
+
+_allowedNodes = (
+    ast.Expression, ast.Constant, ast.Name, ast.Load, ast.Attribute,
+    ast.Subscript, ast.Slice, ast.Tuple, ast.List, ast.Call, ast.keyword,
+    ast.BinOp, ast.UnaryOp, ast.BoolOp, ast.Compare, ast.IfExp,
+    ast.operator, ast.unaryop, ast.boolop, ast.cmpop) + \
+    ((ast.Index,) if hasattr(ast, 'Index') else ())  # Index in Py<3.9
+
+
+def _check(tree, colStr):
+    npNames = set()  # the Name nodes of np in np.name
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Attribute):
+            continue
+        if not (isinstance(node.value, ast.Name) and node.value.id == 'np'
+                and node.attr in allowedNumpy):
+            raise ValueError('attribute "{0}" is not allowed in formula {1}'
+                             .format(node.attr, colStr))
+        npNames.add(id(node.value))
+    for node in ast.walk(tree):
+        if not isinstance(node, _allowedNodes):
+            raise ValueError('"{0}" is not allowed in formula {1}'.format(
+                type(node).__name__, colStr))
+        if isinstance(node, ast.Name):
+            if node.id == 'np' and id(node) in npNames:
+                continue
+            if node.id not in allowedBuiltins and node.id != 'd':
+                raise ValueError('unknown name "{0}" in formula {1}'.format(
+                    node.id, colStr))
+        if isinstance(node, ast.Call) and not (
+                isinstance(node.func, ast.Attribute) or
+                (isinstance(node.func, ast.Name) and node.func.id != 'd')):
+            raise ValueError('only the allowed functions can be called in '
+                             'formula {0}'.format(colStr))
+
+
+def _uses_data(tree):
+    return any(isinstance(node, ast.Name) and node.id == 'd'
+               for node in ast.walk(tree))
+
+
+_maxRange = 10**6  # the longest range() in literal expressions
+
+
+def _check_format(fmt):
+    for _, field, _, _ in string.Formatter().parse(fmt):
+        if field and not field.isdigit():  # no {0.attr} or {0[key]}
+            raise ValueError('only positional fields are allowed in format'
+                             ' strings')
+
+
+def _literal(node, names):
+    """Returns the value of *node*, an expression of literals: strings,
+    numbers, None, tuples and lists, arithmetic of numbers, concatenation of
+    strings, lists or tuples, the calls of str, int, float, slice, range and
+    str.format and a list comprehension over them; raises ValueError for any
+    other expression. *names* are the variables of list comprehensions."""
+    if isinstance(node, ast.Expression):
+        return _literal(node.body, names)
+    if isinstance(node, ast.Constant) and (node.value is None or isinstance(
+            node.value, (str, int, float, bool))):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in names:
+        return names[node.id]
+    if isinstance(node, (ast.Tuple, ast.List)):
+        vals = [_literal(el, names) for el in node.elts]
+        return tuple(vals) if isinstance(node, ast.Tuple) else vals
+    if isinstance(node, ast.UnaryOp) and \
+            isinstance(node.op, (ast.USub, ast.UAdd)):
+        val = _literal(node.operand, names)
+        if isinstance(val, (int, float)):
+            return -val if isinstance(node.op, ast.USub) else val
+    if isinstance(node, ast.BinOp):
+        left, right = _literal(node.left, names), _literal(node.right, names)
+        isNum = all(isinstance(v, (int, float)) and not isinstance(v, bool)
+                    for v in (left, right))
+        if isinstance(node.op, ast.Add) and (isNum or (
+                type(left) is type(right) and
+                isinstance(left, (str, list, tuple)))):
+            return left + right
+        if isNum and isinstance(node.op, ast.Sub):
+            return left - right
+        if isNum and isinstance(node.op, ast.Mult):
+            return left * right
+        if isNum and isinstance(node.op, ast.Div):
+            return left / right
+        if isNum and isinstance(node.op, ast.FloorDiv):
+            return left // right
+    if isinstance(node, ast.Compare) and len(node.ops) == 1 and isinstance(
+            node.ops[0], (ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Eq,
+                          ast.NotEq)):
+        left = _literal(node.left, names)
+        right = _literal(node.comparators[0], names)
+        if all(isinstance(v, (int, float)) for v in (left, right)):
+            return _compareOps[type(node.ops[0])](left, right)
+    if isinstance(node, ast.Call) and not node.keywords:
+        args = [_literal(arg, names) for arg in node.args]
+        if isinstance(node.func, ast.Name) and node.func.id in _literalCalls:
+            if node.func.id == 'range' and len(range(*args)) > _maxRange:
+                raise ValueError('too long range in a literal expression')
+            return _literalCalls[node.func.id](*args)
+        if isinstance(node.func, ast.Attribute) and \
+                node.func.attr == 'format':
+            fmt = _literal(node.func.value, names)
+            if isinstance(fmt, str):
+                _check_format(fmt)
+                return fmt.format(*args)
+    if isinstance(node, ast.ListComp) and len(node.generators) == 1:
+        gen = node.generators[0]
+        if isinstance(gen.target, ast.Name) and not gen.is_async:
+            res = []
+            for val in _literal(gen.iter, names):
+                inner = dict(names, **{gen.target.id: val})
+                if all(_literal(cond, inner) for cond in gen.ifs):
+                    res.append(_literal(node.elt, inner))
+            return res
+    raise ValueError('not a literal expression')
+
+
+_literalCalls = dict(str=str, int=int, float=float, slice=slice, range=range)
+_compareOps = {ast.Lt: lambda a, b: a < b, ast.LtE: lambda a, b: a <= b,
+               ast.Gt: lambda a, b: a > b, ast.GtE: lambda a, b: a >= b,
+               ast.Eq: lambda a, b: a == b, ast.NotEq: lambda a, b: a != b}
+
+
+def literal_eval(exprStr):
+    """Returns the value of *exprStr*, an expression of literals as
+    ``'entry' + '/x'``, ``(None, 5)``, ``slice(1, -1)`` or
+    ``['Col{0}'.format(i) for i in range(1, 4)]``, without running any other
+    code. Raises ValueError if *exprStr* is not such an expression."""
+    try:
+        tree = ast.parse(str(exprStr).strip(), mode='eval')
+    except SyntaxError as e:
+        raise ValueError('bad expression {0}: {1}'.format(exprStr, e))
+    try:
+        return _literal(tree, {})
+    except (TypeError, ArithmeticError) as e:
+        raise ValueError('bad expression {0}: {1}'.format(exprStr, e))
+
+
+def _compile(colStr):
+    """Returns the checked code object of the expression *colStr*."""
+    tree = ast.parse(colStr.strip(), mode='eval')
+    _check(tree, colStr)
+    return compile(tree, '<formula>', 'eval')
+
+
+def _eval(code, d=None):
+    namespace = {'__builtins__': allowedBuiltins, 'np': np}
+    if d is not None:
+        namespace['d'] = d
+    return eval(code, namespace)
+
+
+def _get_column(key):
+    if isinstance(key, int):
+        return key
+    kl = key.lower()
+    return int(kl[kl.find('col')+3:]) if 'col' in kl else int(key)
+
+
+def _is_column(key):
+    return isinstance(key, int) or (
+        isinstance(key, str) and re.fullmatch(r'[Cc]ol\d+', key) is not None)
+
+
+class Formula(object):
+    """A compiled `dataSource` formula. *keys* are the array keys in the
+    formula, in the order of appearance."""
+
+    def __init__(self, colStr):
+        self.colStr = colStr
+        self.constant = None  # code of a formula of NumPy functions only
+        self.key = None  # if the formula is a single array key
+        npError = None
+        if "np." in colStr:
+            try:
+                tree = ast.parse(colStr.strip(), mode='eval')
+                _check(tree, colStr)
+                if not _uses_data(tree):
+                    self.constant = compile(tree, '<formula>', 'eval')
+                    self.keys = []
+                    return
+            except (SyntaxError, ValueError) as e:
+                npError = e
+        try:
+            # to expand string expressions
+            expanded = literal_eval(colStr)
+            if isinstance(expanded, (str, int, float)):
+                colStr = str(expanded)
+        except ValueError:
+            pass
+
+        keys = re.findall(r'\[(.*?)\]', colStr)
+        if len(keys) == 0:
+            colStr = colStr.replace('col', 'Col')
+            if "Col" in colStr:
+                regex = re.compile('Col([0-9]*)')
+                # remove possible duplicates by list(dict.fromkeys())
+                subkeys = list(dict.fromkeys(regex.findall(colStr)))
+                for ch in subkeys:
+                    colStr = colStr.replace('Col'+ch, 'd["Col{0}"]'.format(ch))
+            elif npError is not None:  # not an hdf5 name but a bad formula
+                raise ValueError(npError)
+            else:
+                self.key = colStr
+                colStr = 'd[{0!r}]'.format(colStr)
+        self.code = _compile(colStr)
+        keys = []
+        for node in ast.walk(ast.parse(colStr.strip(), mode='eval')):
+            if not (isinstance(node, ast.Subscript) and
+                    isinstance(node.value, ast.Name) and node.value.id == 'd'):
+                continue
+            key = node.slice
+            if not isinstance(key, ast.Constant):  # ast.Index in Py<3.9
+                key = getattr(key, 'value', None)
+            if isinstance(key, ast.Constant):
+                keys.append((node.col_offset, key.value))
+        self.keys = list(dict.fromkeys(key for _, key in sorted(
+            keys, key=lambda k: k[0])))
+
+    def __repr__(self):
+        return "Formula {0} of {1}".format(self.colStr, self.keys)
+
+    @property
+    def columns(self):
+        """The column indices used by the formula of a column file; only the
+        keys as 'Col3' or 3 are taken, other keys are skipped."""
+        return [_get_column(k) for k in self.keys if _is_column(k)]
+
+    def evaluate(self, get_array):
+        """Returns the formula value; *get_array(key)* gives the array of
+        each key."""
+        if self.constant is not None:
+            return _eval(self.constant)
+        return _eval(self.code, {k: get_array(k) for k in self.keys})
+
+    def evaluate_columns(self, columns):
+        """Returns the formula value for the column arrays *columns*."""
+        return self.evaluate(lambda key: columns[_get_column(key)])
+
+
+@lru_cache(maxsize=256)
+def compile_formula(colStr):
+    """Returns the cached :class:`Formula` of *colStr*. Raises ValueError for
+    a formula that is not allowed."""
+    try:
+        return Formula(colStr)
+    except SyntaxError as e:
+        raise ValueError('bad formula {0}: {1}'.format(colStr, e))
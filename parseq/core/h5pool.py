@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+u"""
+Pool of open hdf5 files
+-----------------------
+
+Opening a large hdf5 file, especially one with external links, takes tens of
+ms. The data items of one file and their arrays and metadata are therefore
+read via file handles kept open in a process-wide pool of at most
+*maxOpenFiles* files, the least recently used ones are closed first. The files
+are opened by `silx.io.open`, so the pool also serves the other formats that
+silx presents as hdf5 (spec files etc.).
+
+A pooled file is reopened if its modification time or size has changed, e.g.
+when it is still being written. :func:`close` closes one or all pooled files,
+e.g. when a file is reloaded in the file tree; all are closed at exit.
+
+All accesses to the pooled files are serialized by *lock*, so the files can
+be read from several threads (h5py itself allows only one thread at a time).
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import os
+import atexit
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+import silx.io as silx_io
+from silx.io.url import DataUrl
+from silx.io.utils import h5py_read_dataset, is_dataset
+
+maxOpenFiles = 16
+pool = OrderedDict()  # abspath: [file handle, (mtime, size)]
+lock = threading.RLock()
+
+
+def _close_entry(path):
+    entry = pool.pop(path, None)
+    if entry is not None:
+        try:
+            entry[0].close()
+        except Exception:  # already closed or broken
+            pass
+
+
+def get_file(fileName):
+    """Returns the open file *fileName* from the pool, opens it if needed.
+    The returned handle must only be used within `with lock:`."""
+    path = os.path.abspath(fileName)
+    with lock:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            _close_entry(path)
+            raise OSError("File '{0}' not found".format(fileName))
+        signature = stat.st_mtime, stat.st_size
+        entry = pool.get(path)
+        if entry is not None:
+            if entry[1] == signature:
+                pool.move_to_end(path)
+                return entry[0]
+            _close_entry(path)  # the file has changed
+        handle = silx_io.open(path)
+        pool[path] = [handle, signature]
+        while len(pool) > maxOpenFiles:
+            _close_entry(next(iter(pool)))
+        return handle
+
+
+@contextmanager
+def opened(url):
+    """Gives the object at *url* ("silx:file::/path" or a file name) of a
+    pooled file within the context, with *lock* held."""
+    dataUrl = DataUrl(url)
+    with lock:
+        f = get_file(dataUrl.file_path())
+        dataPath = dataUrl.data_path()
+        yield f if dataPath in (None, '', '/') else f[dataPath]
+
+
+def get_data(url):
+    """Returns the data at *url* as `silx.io.get_data` does, from a pooled
+    file."""
+    dataUrl = DataUrl(url)
+    if not dataUrl.is_valid():
+        raise ValueError("URL '{0}' is not valid".format(url))
+    if dataUrl.scheme() not in (None, 'silx'):
+        return silx_io.get_data(url)
+    dataPath = dataUrl.data_path()
+    with lock:
+        f = get_file(dataUrl.file_path())
+        if dataPath not in f:
+            raise ValueError(
+                "Data path from URL '{0}' not found".format(url))
+        data = f[dataPath]
+        if not is_dataset(data):
+            raise ValueError(
+                "Data path from URL '{0}' is not a dataset".format(url))
+        index = dataUrl.data_slice()
+        return h5py_read_dataset(data, index=() if index is None else index)
+
+
+def close(fileName=None):
+    """Closes the pooled file *fileName* or, if None, all pooled files."""
+    with lock:
+        if fileName is None:
+            for path in list(pool):
+                _close_entry(path)
+        else:
+            _close_entry(os.path.abspath(fileName))
+
+
+atexit.register(close)
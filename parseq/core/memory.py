@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+u"""
+Memory budget of node arrays
+----------------------------
+
+By default, a data item keeps the arrays of every node it has passed. If
+`singletons.memoryBudget` is set to a number of bytes, the arrays of the
+intermediate nodes, i.e. of the nodes downstream of the data origin, are
+evicted from the data items whenever their total size exceeds the budget, the
+least recently calculated first. The budget is checked after each transform
+run and, in pipelined runs, after each finished data item.
+
+An evicted array is recalculated at the first access to it as an attribute of
+its data item: the transforms into its node are run again for this one data
+item. If their input arrays have been evicted too, they are recalculated in
+the same way, so the recalculation starts from the nearest upstream node that
+is still in memory.
+
+The following arrays are never evicted: those of the current node (the active
+node tab of the GUI), of the nodes pinned by :func:`pinned`, e.g. while
+exporting, of the nodes that serve as input to the pending transforms of a
+run, of the data origin and of the data items being transformed. The arrays
+that share their names with the arrays of upstream nodes and the fit curves
+are also kept as they cannot be recalculated by the transforms into their
+node.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import weakref
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+import numpy as np
+
+from . import singletons as csi
+from . import commons as cco
+from .logger import syslogger
+
+# (id(data item), node name): [weak reference to the data item, bytes],
+# from the least to the most recently calculated:
+resident = OrderedDict()
+residentSize = 0  # bytes
+pinnedNodes = {}  # node name: pin count
+lock = threading.RLock()
+
+
+def get_evictable_arrays(node):
+    """Returns the names of the arrays of *node* that can be recalculated by
+    the transforms into *node*."""
+    if not node.transformsIn:
+        return []
+    fitArrays = set(fit.dataAttrs['fit'] for fit in csi.fits.values())
+    return [key for key in node.get_own_arrays() if key not in fitArrays]
+
+
+def _get_nbytes(data, keys):
+    # memory mapped arrays (see core/chunked.py) do not take RAM
+    return sum(val.nbytes for val in (data.__dict__.get(key) for key in keys)
+               if isinstance(val, np.ndarray) and
+               not isinstance(val, np.memmap))
+
+
+def _drop(entryKey):
+    global residentSize
+    entry = resident.pop(entryKey, None)
+    if entry is not None:
+        residentSize -= entry[1]
+
+
+def add_items(node, dataItems):
+    """Registers the arrays of *node* just calculated for *dataItems* as the
+    most recent ones."""
+    global residentSize
+    if csi.memoryBudget is None:
+        return
+    keys = get_evictable_arrays(node)
+    if not keys:
+        return
+    with lock:
+        for data in dataItems:
+            if data.originNodeName == node.name:
+                continue
+            evicted = data.__dict__.get('evictedArrays')
+            if evicted:
+                for key in keys:
+                    evicted.pop(key, None)
+            entryKey = id(data), node.name
+            _drop(entryKey)
+            nbytes = _get_nbytes(data, keys)
+            resident[entryKey] = [weakref.ref(data), nbytes]
+            residentSize += nbytes
+
+
+def is_pinned(node):
+    return node is csi.currentNode or pinnedNodes.get(node.name, 0) > 0
+
+
+@contextmanager
+def pinned(nodes):
+    """Keeps the arrays of *nodes* in memory within the context."""
+    with lock:
+        for node in nodes:
+            pinnedNodes[node.name] = pinnedNodes.get(node.name, 0) + 1
+    try:
+        yield
+    finally:
+        with lock:
+            for node in nodes:
+                pinnedNodes[node.name] -= 1
+                if pinnedNodes[node.name] <= 0:
+                    del pinnedNodes[node.name]
+
+
+def evict(data, node):
+    """Removes the arrays of *node* from *data*; they will be recalculated at
+    the next access."""
+    with lock:
+        for key in get_evictable_arrays(node):
+            if isinstance(data.__dict__.get(key), np.ndarray):
+                del data.__dict__[key]
+                data.evictedArrays[key] = node.name
+        _drop((id(data), node.name))
+
+
+def enforce_budget(isKept=None):
+    """Evicts the least recently calculated arrays until the rest fits into
+    `singletons.memoryBudget`. *isKept* is an optional callable
+    (data item, node) -> bool that protects the arrays needed by a run."""
+    if csi.memoryBudget is None:
+        return
+    with lock:
+        if residentSize <= csi.memoryBudget:
+            return
+        nEvicted = 0
+        for entryKey in list(resident):
+            if residentSize <= csi.memoryBudget:
+                break
+            data = resident[entryKey][0]()
+            if data is None:  # the data item has been deleted
+                _drop(entryKey)
+                continue
+            node = csi.nodes[entryKey[1]]
+            if is_pinned(node) or data.beingTransformed or \
+                    (isKept is not None and isKept(data, node)):
+                continue
+            evict(data, node)
+            nEvicted += 1
+    if nEvicted:
+        syslogger.info('evicted {0} node array set{1}, {2:.1f} MB left'
+                       .format(nEvicted, '' if nEvicted == 1 else 's',
+                               residentSize/2**20))
+
+
+def _is_applicable(tr, data):
+    if data.state[tr.fromNode.name] != cco.DATA_STATE_GOOD:
+        return False
+    if isinstance(data.transformNames, (tuple, list)):
+        return tr.name in data.transformNames
+    return tr.fromNode.is_between_nodes(
+        data.originNodeName, data.terminalNodeName)
+
+
+def materialize(data, nodeName):
+    """Recalculates the evicted arrays of the node *nodeName* of *data* by
+    running the transforms into this node."""
+    node = csi.nodes[nodeName]
+    with lock:
+        for key, name in list(data.evictedArrays.items()):
+            if name == nodeName:
+                del data.evictedArrays[key]
+        syslogger.info('recalculate "{0}" of {1}'.format(
+            nodeName, data.alias))
+        for tr in csi.transforms.values():
+            if tr.toNode is node and _is_applicable(tr, data):
+                tr._run_single_worker(data, tr._get_args(None))
+        data.make_corrections(node)
+        add_items(node, [data])
@@ -10,10 +10,11 @@ data. Each data node defines and operates arrays that get their values in the
 upstream part of the pipeline.
 """
 __author__ = "Konstantin Klementiev"
-__date__ = "5 Feb 2023"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 import sys
+import numpy as np
 from . import singletons as csi
 
 isOldPyton = sys.version_info.major == 2
@@ -69,6 +70,22 @@ class Node(object):
             Attached to the plot label in parentheses. For example,
             for Å^-1: *qUnit* = u'Å\u207B\u00B9' and *plotUnit* = r'Å$^{-1}$'.
 
+        *dtype*: str or numpy dtype, default = *dtype* of the node
+            The dtype of the stored array, e.g. 'float32' to halve the memory
+            and bandwidth taken by large 2D and 3D arrays. The numeric arrays
+            are converted to it when read from files, when combined and when
+            returned by the transformations, also by the worker processes
+            before being sent back. Sums over data items are accumulated in
+            float64. None keeps the dtype produced by the code.
+
+        *lazy*: bool, default False
+            For a 2D or 3D array read from an hdf5 dataset as a plain key
+            (without slices or formulas): the array is not loaded at reading
+            but is read on demand. The chunked transformations (see
+            *chunkAxis* of :class:`.Transform`) read it chunk by chunk, any
+            other access reads it in full. The shape of a lazy array is not
+            sorted with the abscissa.
+
         *plotParams*: dict, default is `{}` that assumes thin solid lines
             Default parameters for plotting. Can have the following keys:
             *linewidth* (or *lw*), *style*, *symbol* and *symbolsize*.
@@ -95,6 +112,9 @@ class Node(object):
         that the 1st element in a group is an x array and the others are y
         arrays. This grouping is respected only for the export of 1D data.
 
+    *dtype*: str or numpy dtype, default None
+        The default *dtype* of the arrays of this node, see above.
+
     *icon*: path
         If given, specifies a path to an image file relative to the pipeline
         directory. This image will be an icon in the node tab. If not given,
@@ -103,7 +123,8 @@ class Node(object):
     """
 
     properties = ('qLabel', 'qUnit', 'raw', 'role', 'plotLabel', 'plotUnit',
-                  'plotParams', 'ndim', 'abscissa')
+                  'plotParams', 'ndim', 'abscissa', 'dtype', 'lazy')
+    dtype = None
     defaultPlotParams = {'symbolsize': 2, 'linewidth': 1.3, 'linestyle': '-'}
 
     def __init__(self, widgetClasses=[]):
@@ -243,6 +264,40 @@ class Node(object):
             return self.arrays[arrayName].get(prop, 0)
         elif prop == 'abscissa':
             return self.arrays[arrayName].get(prop, None)
+        elif prop == 'dtype':
+            return self.arrays[arrayName].get(prop, self.dtype)
+        elif prop == 'lazy':
+            return self.arrays[arrayName].get(prop, False)
+
+    def get_own_arrays(self):
+        """Returns the names of the arrays of this node that are not arrays
+        (or *raw* arrays) of the upstream nodes."""
+        upstream = set()
+        for node in self.upstreamNodes:
+            for key in node.arrays:
+                upstream.update((key, node.get_prop(key, 'raw')))
+        return [key for key in self.arrays if key not in upstream]
+
+    def get_dtypes(self, keys=None):
+        """Returns a dict of the dtypes of the arrays *keys* (default: all)
+        that have a dtype policy."""
+        res = {}
+        for key in self.arrays if keys is None else keys:
+            if key in self.arrays:
+                dtype = self.get_prop(key, 'dtype')
+                if dtype is not None:
+                    res[key] = dtype
+        return res
+
+    def cast_arrays(self, data, keys=None, raw=False):
+        """Converts the arrays *keys* (default: all) of *data* to their
+        dtypes. With *raw*, the *raw* versions of the arrays are converted."""
+        for key, dtype in self.get_dtypes(keys).items():
+            name = self.get_prop(key, 'raw') if raw else key
+            arr = data.__dict__.get(name)  # not recalculating evicted ones
+            res = cast_array(arr, dtype)
+            if res is not arr:
+                setattr(data, name, res)
 
     def get_arrays_prop(self, prop, arrays=[], role=''):
         """Get the property *prop* of several arrays, returned as a list. All
@@ -270,3 +325,21 @@ class Node(object):
             if prl[0] in ('y', 'z', '1'):
                 res.append(key)
         return res
+
+
+def cast_array(arr, dtype):
+    """Returns the numeric array *arr* converted to *dtype* or *arr* itself if
+    no conversion is needed."""
+    if dtype is None or not isinstance(arr, np.ndarray) or \
+            arr.dtype.kind not in 'biuf' or arr.dtype == dtype:
+        return arr
+    return arr.astype(dtype)
+
+
+def to_accumulator(arr):
+    """Returns *arr* upcast to float64 if it is a float array of a lower
+    precision, to be used in sums over several arrays."""
+    if isinstance(arr, np.ndarray) and arr.dtype.kind == 'f' and \
+            arr.dtype.itemsize < 8:
+        return arr.astype(np.float64)
+    return arr
@@ -0,0 +1,355 @@
+# -*- coding: utf-8 -*-
+u"""
+Pipelined execution
+-------------------
+
+By default, a transformation run with *runDownstream=True* first transforms
+all the given data items and only then starts the downstream transformations.
+The pipeline thus proceeds node by node, each node being a barrier for all the
+data.
+
+If `singletons.runPipelined` is True, such a run is performed by
+:class:`PipelinedRun`. It views the transformations below the starting one as
+a directed graph of tasks (transformation, data item). A data item proceeds to
+the next transformation as soon as it has passed the previous one, so the
+stages of a deep pipeline overlap and the first fully processed data item
+appears early. Transformations with *nThreads* or *nProcesses* > 1 execute
+their tasks in the worker pools (see :mod:`.workers`) while the other ones run
+in the calling thread; the deeper transformations are served first.
+Transformations that define `run_main_batch` wait until no other work can be
+done and then transform all their pending data items at once.
+
+The same rules as in the node-by-node run apply to each task: the data state
+at `fromNode`, *transformNames*, *originNodeName* and *terminalNodeName*. A
+combined data item (see `combinesTo`) is recalculated only after all its
+member data items of this run have passed the transformation that leads to its
+origin node; after that the combined data item continues downstream as any
+other one. Unchanged data items of transforms with *skipUnchanged* pass their
+tasks without being transformed, as do the items found in the disk cache.
+
+A data item that reaches a transformation via several converging paths is
+transformed there only once, as in the node-by-node run: its task waits until
+the data item has passed all the upstream transformations of the run that are
+still to process it.
+
+A cancelled run (see :func:`.workers.cancel_runs`) marks all its pending tasks
+as bad and aborts the running pool tasks after `workers.cancelGrace` seconds.
+The pool tasks of transforms with a *timeout* are aborted when they exceed it.
+
+With a memory budget (see :mod:`.memory`), the intermediate arrays of a data
+item may be evicted as soon as the data item has passed all its tasks.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys
+import time
+import numpy as np
+import itertools
+from collections import deque
+if sys.version_info < (3, 1):
+    import Queue as queue
+else:
+    import queue
+
+from . import commons as cco
+from . import singletons as csi
+from .logger import syslogger
+from . import workers as cwo
+from . import memory as cme
+
+
+class PipelinedRun(object):
+    """One pipelined run of *transform* and all its downstream transforms for
+    the data *items*."""
+
+    def __init__(self, transform, items):
+        self.headTransform = transform
+        self.items = list(items)
+        self.transforms = []
+        self._collect_transforms(transform)
+        self.ancestors = dict((tr, set()) for tr in self.transforms)
+        for tr in self.transforms:
+            for trd in self.get_descendants(tr):
+                self.ancestors[trd].add(tr)
+        self.outQueue = queue.Queue()  # common for all the pools of the run
+        self.pending = dict((tr, deque()) for tr in self.transforms)
+        self.nRunning = dict((tr, 0) for tr in self.transforms)
+        self.pools, self.nWorkers, self.args, self.options = {}, {}, {}, {}
+        self.batched = {}
+        self.runIds = {}  # pool: runId
+        self.tasks = {}  # task index: (transform, item)
+        self.taskCounter = itertools.count()
+        self.nLiveTasks = {}  # id(item): number of pending and running tasks
+        self.requested = set()  # (transform, id(item)), once per run
+        self.finished = set()  # (transform, id(item))
+        self.deferred = []  # (transform, item) waiting for upstream tasks
+        self.waitingCombined = []  # (transform, combined item)
+        self.errorItems = []
+        self.tCancel = None  # time of cancellation
+
+    def _collect_transforms(self, transform):
+        if transform in self.transforms:
+            return
+        self.transforms.append(transform)
+        for tr in self.get_downstream(transform):
+            self._collect_transforms(tr)
+
+    @staticmethod
+    def get_downstream(transform):
+        return [tr for tr in transform.toNode.transformsOut
+                if tr is not transform]
+
+    def get_descendants(self, transform):
+        res, toVisit = set(), self.get_downstream(transform)
+        while toVisit:
+            tr = toVisit.pop()
+            if tr not in res and tr is not transform:
+                res.add(tr)
+                toVisit.extend(self.get_downstream(tr))
+        return res
+
+    def run(self, params={}, updateUndo=True, startEpoch=None):
+        np.seterr(all='raise')
+        head = self.headTransform
+        head.run_pre(params, self.items, updateUndo, startEpoch)
+        for tr in self.transforms[1:]:
+            tr.run_pre({}, [], startEpoch=head.startEpoch)
+        for tr in self.transforms:
+            pool, self.nWorkers[tr] = tr._get_pool(
+                len(self.items), self.items)
+            self.args[tr] = tr._get_args(pool)
+            self.pools[tr] = pool
+            self.options[tr] = tr._get_options()
+            if 'progress' in self.args[tr] and tr.sendSignals:
+                # per task messages, no board as tasks of several transforms
+                # share one run
+                self.options[tr]['progressMessages'] = True
+            self.batched[tr] = tr._is_batched(self.args[tr])
+            if pool is not None and pool not in self.runIds:
+                self.runIds[pool] = pool.open_run(self.outQueue)
+        syslogger.info('pipelined run of {0} for {1} item{2}'.format(
+            ' + '.join(tr.name for tr in self.transforms), len(self.items),
+            '' if len(self.items) == 1 else 's'))
+
+        if head.sendSignals:
+            csi.mainWindow.beforeDataTransformSignal.emit(self.items)
+        try:
+            for item in self.items:
+                self.enqueue(head, item)
+            self._loop()
+        finally:
+            for pool, runId in self.runIds.items():
+                pool.close_run(runId)
+        if head.sendSignals:
+            csi.mainWindow.afterDataTransformSignal.emit(self.items)
+
+        for tr in self.transforms:
+            tr.run_post([], runDownstream=False)
+        np.seterr(all='warn')
+        return self.errorItems
+
+    def enqueue(self, tr, item):
+        if (tr, id(item)) in self.requested:  # via another converging path
+            return
+        self.requested.add((tr, id(item)))
+        self.nLiveTasks[id(item)] = self.nLiveTasks.get(id(item), 0) + 1
+        if self._has_awaited_ancestor(tr, item):
+            self.deferred.append((tr, item))
+            return
+        self._start(tr, item)
+
+    def _start(self, tr, item):
+        # pre-corrections for the head transform are done in its run_pre()
+        if tr is not self.headTransform and \
+                item.originNodeName == tr.fromNode.name:
+            item.make_corrections(tr.fromNode)
+        if not tr._is_to_be_transformed(item):
+            self.finish(tr, item)
+        elif tr._is_unchanged(item, self.args[tr]):
+            self.finish(tr, item, isCorrected=True)
+        elif tr._get_from_cache(item):
+            self.finish(tr, item)
+        elif self.tCancel is not None:
+            tr._set_cancelled(item)
+            self.finish(tr, item)
+        else:
+            self.pending[tr].append(item)
+
+    def finish(self, tr, item, isCorrected=False):
+        if item.state[tr.toNode.name] == cco.DATA_STATE_GOOD:
+            tr.toNode.cast_arrays(item, tr._get_own_out_keys())
+            if not isCorrected:
+                item.make_corrections(tr.toNode)
+            cme.add_items(tr.toNode, [item])
+            for d in item.combinesTo:
+                if d.originNodeName in (tr.toNode.name, tr.fromNode.name) \
+                        and (tr, d) not in self.waitingCombined:
+                    self.waitingCombined.append((tr, d))
+            for trd in self.get_downstream(tr):
+                self.enqueue(trd, item)
+        if item.error is not None and item not in self.errorItems:
+            self.errorItems.append(item)
+        self.finished.add((tr, id(item)))
+        self._release_deferred(item)
+        self.nLiveTasks[id(item)] -= 1
+        if self.nLiveTasks[id(item)] == 0:
+            cme.enforce_budget(self._is_live)
+
+    def _is_live(self, item, node):
+        return self.nLiveTasks.get(id(item), 0) > 0
+
+    def _is_awaited(self, tr, item):
+        return self.nLiveTasks.get(id(item), 0) > 0 and \
+            (tr, id(item)) not in self.finished
+
+    def _has_awaited_ancestor(self, tr, item):
+        return any((tra, id(item)) in self.requested and
+                   (tra, id(item)) not in self.finished
+                   for tra in self.ancestors[tr])
+
+    def _release_deferred(self, item):
+        for entry in [e for e in self.deferred if e[1] is item]:
+            if entry in self.deferred and \
+                    not self._has_awaited_ancestor(*entry):
+                self.deferred.remove(entry)
+                self._start(*entry)
+
+    def _forget_downstream(self, tr, item):
+        """Lets the recalculated *item* pass again the transforms below *tr*
+        it has already passed."""
+        for trd in self.get_descendants(tr):
+            if (trd, id(item)) in self.finished:
+                self.requested.discard((trd, id(item)))
+                self.finished.discard((trd, id(item)))
+
+    def _check_combined(self):
+        if self.tCancel is not None:
+            del self.waitingCombined[:]
+        for tr, d in list(self.waitingCombined):
+            if any(self._is_awaited(tr, it) for it in d.madeOf):
+                continue
+            self.waitingCombined.remove((tr, d))
+            d.calc_combined()
+            self.errorItems.extend(
+                it for it in tr.run(dataItems=[d], runDownstream=False,
+                                    startEpoch=tr.startEpoch,
+                                    isKept=self._is_live)
+                if it not in self.errorItems)
+            self.nLiveTasks[id(d)] = self.nLiveTasks.get(id(d), 0) + 1
+            self._forget_downstream(tr, d)
+            self.finish(tr, d, isCorrected=True)  # corrected in tr.run()
+
+    def _submit(self):
+        for tr in reversed(self.transforms):  # deeper transforms first
+            pool = self.pools[tr]
+            if pool is None or self.batched[tr]:
+                continue
+            while self.pending[tr] and self.nRunning[tr] < self.nWorkers[tr]:
+                item = self.pending[tr].popleft()
+                index = next(self.taskCounter)
+                if tr._put_in_data(pool, self.options[tr], self.runIds[pool],
+                                   index, item):
+                    self.tasks[index] = tr, item
+                    self.nRunning[tr] += 1
+                else:
+                    self.finish(tr, item)
+
+    def _get_serial_transform(self):
+        for tr in reversed(self.transforms):  # deeper transforms first
+            if self.pools[tr] is None and not self.batched[tr] and \
+                    self.pending[tr]:
+                return tr
+
+    def _get_batched_transform(self):
+        for tr in reversed(self.transforms):  # deeper transforms first
+            if self.batched[tr] and self.pending[tr]:
+                return tr
+
+    def _run_batched(self, tr):
+        items = list(self.pending[tr])
+        self.pending[tr].clear()
+        rest = tr._run_batches(items)
+        for item in rest:
+            tr._run_single_worker(item, self.args[tr])
+        for item in items:
+            self.finish(tr, item)
+
+    def _handle(self, msg):
+        if msg[2] not in self.tasks:  # e.g. of an aborted task
+            cwo.WorkerPool.discard_output(msg)
+            return
+        tr, item = self.tasks[msg[2]]
+        if msg[0] == 'progress':
+            if 'progress' in self.args[tr] and tr.sendSignals:
+                tr._get_progressN(item.alias, msg[3])
+            return
+        del self.tasks[msg[2]]
+        pool = self.pools[tr]
+        pool.release_blocks(msg[1], msg[2])
+        tr._get_results(pool, item, msg)
+        self.nRunning[tr] -= 1
+        if 'progress' in self.args[tr] and tr.sendSignals:
+            tr._get_progressN(item.alias)
+        self.finish(tr, item)
+
+    def _check_cancel(self):
+        if self.tCancel is None:
+            if not cwo.is_cancelled(self.headTransform.startEpoch):
+                return
+            self.tCancel = time.time()
+            syslogger.info('pipelined run cancelled')
+            for tr in self.transforms:
+                while self.pending[tr]:
+                    item = self.pending[tr].popleft()
+                    tr._set_cancelled(item)
+                    self.finish(tr, item)
+
+    def _abort_expired(self):
+        if self.tCancel is not None and \
+                time.time() - self.tCancel > cwo.cancelGrace:
+            expired = list(self.tasks)
+            errorStr = 'Aborted after cancellation'
+        else:
+            expired = [index for index, (tr, item) in self.tasks.items()
+                       if tr.timeout and self.pools[tr].get_expired(
+                           self.runIds[self.pools[tr]], [index], tr.timeout)]
+            errorStr = 'Timed out'
+        for index in expired:
+            tr, item = self.tasks[index]
+            pool = self.pools[tr]
+            self._handle(pool.abort_task(
+                self.runIds[pool], index, '{0}: "{1}" for data: {2}'.format(
+                    errorStr, tr.name, item.alias)))
+
+    def _loop(self):
+        while True:
+            self._check_cancel()
+            while True:
+                try:
+                    msg = self.outQueue.get_nowait()
+                except queue.Empty:
+                    break
+                self._handle(msg)
+            self._check_combined()
+            self._submit()
+            tr = self._get_serial_transform()
+            if tr is not None:
+                item = self.pending[tr].popleft()
+                tr._run_single_worker(item, self.args[tr])
+                self.finish(tr, item)
+                continue
+            # batched transforms wait for as many items as possible:
+            tr = None if self.tasks else self._get_batched_transform()
+            if tr is not None:
+                self._run_batched(tr)
+            elif self.tasks:
+                try:
+                    self._handle(self.outQueue.get(
+                        timeout=cwo.checkInterval))
+                except queue.Empty:
+                    pass
+                self._abort_expired()
+            else:
+                break
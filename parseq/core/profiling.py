@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+u"""
+Timing records and profiling
+----------------------------
+
+Every transformation and fit of a data item leaves a timing record with the
+fields listed in *recordFields*:
+
+- *name*, *kind* and *alias*: the transform or fit, 'transform' or 'fit' and
+  the data item;
+- *worker*: 'main' for the calling thread, 'batch' for `run_main_batch` or
+  the worker type and index in the worker pool, e.g. 'process 3';
+- *start*: the epoch time of submitting the task;
+- *wall*: the time of `run_main` proper;
+- *queueWait*: the time the task waited in the pool's task queue for a free
+  worker;
+- *transfer*: the time of sending the input arrays to the worker and getting
+  the output arrays back, including the (de)serialization or the copying to
+  and from shared memory;
+- *nBytes*: the size of the input and output arrays moved to and from the
+  worker;
+- *state*: the resulting data state at the destination node.
+
+The records of the latest *maxRecords* tasks are kept in memory. They can be
+queried by :func:`get_records`, summarized per transform by
+:func:`get_summary` and exported by :func:`export_csv` and
+:func:`export_json`. Recording can be paused by :func:`set_recording`.
+
+Profiling of `run_main` of selected transforms or fits is switched on and off
+at run time by :func:`set_profiling`, also for pool workers. The cProfile
+statistics of all the profiled calls are accumulated per name and available
+from :func:`get_profile` as a `pstats.Stats` object or printed by
+:func:`print_profile`.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import csv
+import json
+import cProfile
+import pstats
+from collections import deque, OrderedDict
+
+recordFields = ('name', 'kind', 'alias', 'worker', 'start', 'wall',
+                'queueWait', 'transfer', 'nBytes', 'state')
+maxRecords = 100000
+records = deque(maxlen=maxRecords)
+isRecording = True
+profiledNames = set()
+profiles = {}  # name: pstats.Stats
+
+
+def set_recording(on=True):
+    global isRecording
+    isRecording = on
+
+
+def clear():
+    records.clear()
+    profiles.clear()
+
+
+def add_record(**kwargs):
+    """Adds a timing record; *kwargs* are the fields in *recordFields*, the
+    missing ones default to 0."""
+    if not isRecording:
+        return
+    records.append(tuple(kwargs.get(field, 0) for field in recordFields))
+
+
+def add_pool_record(name, kind, alias, state, submitted, info, tGet=0.):
+    """Adds the record of a pool task from *submitted*, as returned by
+    :meth:`.workers.WorkerPool.pop_submitted`, and the worker's *info* of
+    the 'done' message; *tGet* is the time of getting the output arrays."""
+    tSubmit, tPut, nBytesIn = submitted if submitted else (0, 0., 0)
+    if info is None:  # aborted or cancelled, no worker timing
+        add_record(name=name, kind=kind, alias=alias, worker='none',
+                   start=tSubmit, transfer=tPut, nBytes=nBytesIn, state=state)
+        return
+    add_profile(name, info.get('profile'))
+    add_record(
+        name=name, kind=kind, alias=alias, worker=info['worker'],
+        start=tSubmit, wall=info['wall'],
+        queueWait=max(info['tStart']-tSubmit, 0.) if tSubmit else 0.,
+        transfer=tPut + info['transfer'] + tGet,
+        nBytes=nBytesIn + info['nBytes'], state=state)
+
+
+def get_records(name=None, alias=None, kind=None):
+    """Returns a list of record dicts optionally filtered by the transform or
+    fit *name*, the data *alias* and the *kind*."""
+    res = []
+    for rec in records:
+        rec = dict(zip(recordFields, rec))
+        if name is not None and rec['name'] != name:
+            continue
+        if alias is not None and rec['alias'] != alias:
+            continue
+        if kind is not None and rec['kind'] != kind:
+            continue
+        res.append(rec)
+    return res
+
+
+def get_summary():
+    """Returns an OrderedDict of name: dict of the number of tasks and the
+    total and maximal times and the total bytes."""
+    res = OrderedDict()
+    for rec in get_records():
+        if rec['name'] not in res:
+            res[rec['name']] = dict(n=0, wall=0., maxWall=0., queueWait=0.,
+                                    transfer=0., nBytes=0)
+        summ = res[rec['name']]
+        summ['n'] += 1
+        summ['wall'] += rec['wall']
+        summ['maxWall'] = max(summ['maxWall'], rec['wall'])
+        summ['queueWait'] += rec['queueWait']
+        summ['transfer'] += rec['transfer']
+        summ['nBytes'] += rec['nBytes']
+    return res
+
+
+def export_csv(fname, **kwargs):
+    """Writes the records, filtered by *kwargs* of :func:`get_records`, as a
+    csv table."""
+    with open(fname, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=recordFields)
+        writer.writeheader()
+        writer.writerows(get_records(**kwargs))
+
+
+def export_json(fname, **kwargs):
+    """Writes the summary and the records, filtered by *kwargs* of
+    :func:`get_records`, as json."""
+    with open(fname, 'w') as f:
+        json.dump(dict(summary=get_summary(), records=get_records(**kwargs)),
+                  f, indent=1)
+
+
+def set_profiling(name, on=True):
+    """Switches cProfile profiling of `run_main` of the transform or fit
+    *name* on or off."""
+    if on:
+        profiledNames.add(name)
+    else:
+        profiledNames.discard(name)
+
+
+def is_profiled(name):
+    return name in profiledNames
+
+
+def run_profiled(func, *args):
+    """Calls *func(\\*args)* under cProfile. Returns the result of the call
+    and the raw statistics (a picklable dict) that can be sent from a
+    worker process to :func:`add_profile`. Only one profiler can be active
+    at a time since Python 3.12, so parallel threads may run unprofiled."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:  # another profiler is active
+        return func(*args), None
+    try:
+        res = func(*args)
+    finally:
+        profile.create_stats()
+    return res, profile.stats
+
+
+class _RawStats(object):
+    """An adapter of raw profile statistics for `pstats.Stats.add()`."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def add_profile(name, stats):
+    if stats is None:
+        return
+    if name in profiles:
+        profiles[name].add(_RawStats(stats))
+    else:
+        profiles[name] = pstats.Stats(_RawStats(stats))
+
+
+def get_profile(name):
+    """Returns the accumulated `pstats.Stats` of *name* or None."""
+    return profiles.get(name)
+
+
+def print_profile(name, sortBy='cumulative', nLines=20):
+    stats = profiles.get(name)
+    if stats is None:
+        print('no profile for "{0}"'.format(name))
+        return
+    stats.sort_stats(sortBy).print_stats(nLines)
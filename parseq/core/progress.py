@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+u"""
+Progress reporting
+------------------
+
+A transformation or a fit whose `run_main` has the argument *progress*
+reports the completion of each data item by setting `progress.value`. The
+values of all data items of a run are kept in one float array, a
+:class:`ProgressBoard`, with one slot per data item; the slot of a not yet
+started item is NaN. With process workers the array lives in shared memory
+(see :mod:`.sharedmem`), so that setting `progress.value` in a worker is a
+plain memory write and sends no messages.
+
+A single session-wide aggregator thread, started with the first board and
+ended after the last one, reads every board not more often than its
+*timeDelta* (*progressTimeDelta* of the transformation or fit) and passes the
+changed values of all the data items at once to the board's callback as a
+list of [alias, value] pairs. With GUI, the callback emits one Qt signal per
+batch.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import time
+import threading
+import numpy as np
+
+from . import sharedmem as csh
+
+tick = 0.05  # s, of the aggregator loop
+boards = []
+boardsLock = threading.Lock()
+aggregator = None  # threading.Thread
+_attached = [None, None]  # name and array of the last attached shared board
+
+
+class ProgressBoard(object):
+    """The progress values of the data items *aliases* of one run."""
+
+    def __init__(self, aliases, callback, timeDelta=1., shared=False):
+        self.aliases = list(aliases)
+        self.callback = callback
+        self.timeDelta = timeDelta
+        self.shm = None
+        initial = np.full(max(len(self.aliases), 1), np.nan)
+        if shared and csh.isAvailable:
+            self.desc, self.shm = csh.put_array(initial)
+            self.values = np.ndarray(initial.shape, dtype=initial.dtype,
+                                     buffer=self.shm.buf)
+        else:
+            self.values = initial
+            self.desc = initial  # threads and the calling thread write here
+        self.reported = np.full_like(initial, np.nan)
+        self.tLast = time.time()
+        self.lock = threading.Lock()
+        register(self)
+
+    def flush(self):
+        """Passes the values changed since the last call to the callback."""
+        with self.lock:
+            if self.values is None:
+                return
+            values = self.values.copy()
+            changed = np.flatnonzero(
+                (values != self.reported) & ~np.isnan(values))
+            self.reported[changed] = values[changed]
+            self.tLast = time.time()
+        if len(changed) > 0:
+            self.callback([[self.aliases[i], float(values[i])]
+                           for i in changed])
+
+    def close(self):
+        """Unregisters the board, reports the final values and frees the
+        shared memory."""
+        unregister(self)
+        self.flush()
+        with self.lock:
+            self.values = None
+            if self.shm is not None:
+                csh.release(self.shm)
+                self.shm = None
+
+
+def make_board(items, callback, timeDelta=1., pool=None):
+    """Returns a :class:`ProgressBoard` for the data *items* to be run in
+    *pool* (None for the calling thread) or None if the workers cannot share
+    the board: remote workers or processes without shared memory."""
+    workerType = None if pool is None else pool.workerType
+    if workerType == 'remote' or (
+            workerType == 'process' and not csh.isAvailable):
+        return
+    shared = workerType == 'process'
+    return ProgressBoard([it.alias for it in items], callback, timeDelta,
+                         shared)
+
+
+def get_values(desc):
+    """Returns the progress array of a board given its *desc*, in a worker
+    process by attaching to the shared memory block."""
+    if not isinstance(desc, csh.SharedArray):
+        return desc
+    if _attached[0] != desc.name:
+        _attached[:] = desc.name, csh.get_array(desc, track=False)
+    return _attached[1]
+
+
+def register(board):
+    global aggregator
+    with boardsLock:
+        boards.append(board)
+        if aggregator is None:
+            aggregator = threading.Thread(target=_aggregate)
+            aggregator.daemon = True
+            aggregator.start()
+
+
+def unregister(board):
+    with boardsLock:
+        if board in boards:
+            boards.remove(board)
+
+
+def _aggregate():
+    global aggregator
+    while True:
+        time.sleep(tick)
+        with boardsLock:
+            if not boards:
+                aggregator = None
+                return
+            current = list(boards)
+        now = time.time()
+        for board in current:
+            if now - board.tLast >= board.timeDelta:
+                board.flush()
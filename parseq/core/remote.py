@@ -0,0 +1,228 @@
+# -*- coding: utf-8 -*-
+u"""
+Remote worker daemons
+---------------------
+
+A worker daemon executes the tasks of transformations and fits sent by a
+ParSeq session on another computer, see the 'remote' pool in :mod:`.workers`.
+A daemon serves one connection at a time and runs one task at a time; start
+several daemons per host, e.g. one per CPU core::
+
+    PARSEQ_AUTHKEY=secret python -m parseq.core.remote --host 0.0.0.0 \\
+        --port 5001 -n 8 --path /path/to/pipelines
+
+starts 8 daemons at the ports 5001 to 5008. In the session, the daemons are
+set by :func:`.workers.set_remote_workers` or by ``--remote`` of
+:mod:`parseq.batch`::
+
+    PARSEQ_AUTHKEY=secret python -m parseq.batch project.pspj \\
+        --remote host1:5001 host1:5002 host2:5001
+
+A task carries the data item's *inArrays* and parameters and, by reference,
+the `run_main` method, so the daemon must be able to import the pipeline
+package: it is searched in the directories given by ``--path``.
+
+The daemon runs the tasks in a child process. When the session aborts a task
+(after a timeout or a cancellation, see :meth:`.workers.WorkerPool.abort_task`)
+it sends an abort message and closes the connection. The daemon then
+terminates the child process, starts a new one and is at once free to accept
+the replacement connection of the session; it does not wait for the aborted
+task to finish. A closed connection aborts the running task in the same way.
+
+The connections are authenticated by the shared secret *authkey*, taken from
+the environment variable PARSEQ_AUTHKEY. Only the holders of the secret can
+send tasks, but a task is unpickled and thus may run any code; therefore the
+daemons listen on localhost by default and should be exposed only to a
+trusted network.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import os
+import sys
+if sys.version_info < (3, 1):
+    import Queue as queue
+else:
+    import queue
+import signal
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, AuthenticationError
+import numpy as np
+
+from . import workers as cwo
+from .logger import syslogger
+
+authkeyVariable = 'PARSEQ_AUTHKEY'
+abortMessage = 'abort'  # sent by the session to abort the running task
+
+
+class ConnectionQueue(object):
+    """The output queue of a daemon's worker: it sends the messages back over
+    the connection, also from the progress timer thread."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.lock = threading.Lock()
+
+    def put(self, msg):
+        with self.lock:
+            self.conn.send(msg)
+
+
+class RemoteWorker(cwo.GenericProcessOrThread, multiprocessing.Process):
+    """The child process of a daemon that runs its tasks."""
+
+    def __init__(self, taskQueue, outQueue, port, epoch, paths=()):
+        multiprocessing.Process.__init__(self)
+        self.daemon = True
+        self.workerType = 'remote'
+        self.paths = paths
+        cwo.GenericProcessOrThread.__init__(
+            self, taskQueue, outQueue, port, epoch)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)  # terminate at once
+        for path in self.paths:
+            if path not in sys.path:
+                sys.path.append(path)
+        cwo.GenericProcessOrThread.run(self)
+
+
+class TaskRunner(object):
+    """Runs the tasks of a daemon in a :class:`RemoteWorker` process and
+    relays its messages to the session. An aborted task is stopped by
+    terminating the process, which is then replaced."""
+
+    def __init__(self, port, paths=()):
+        self.port = port
+        self.paths = paths
+        self.epoch = cwo.get_cancel_epoch()
+        self.worker = None
+        self.start_worker()
+
+    def start_worker(self):
+        # new queues, as terminating a process may corrupt them
+        self.taskQueue = multiprocessing.Queue()
+        self.outQueue = multiprocessing.Queue()
+        self.worker = RemoteWorker(self.taskQueue, self.outQueue, self.port,
+                                   self.epoch, self.paths)
+        self.worker.start()
+
+    def abort(self, reason):
+        syslogger.error('task aborted: {0}'.format(reason))
+        self.worker.terminate()
+        self.worker.join(1.)
+        self.start_worker()
+
+    def stop(self):
+        self.worker.terminate()
+        self.worker.join(1.)
+
+    def run_task(self, conn, task):
+        """Sends the messages of *task* back over *conn*. Returns False if
+        the session has aborted the task or closed the connection."""
+        self.taskQueue.put(task)
+        while True:
+            try:
+                msg = self.outQueue.get(timeout=cwo.checkInterval)
+            except queue.Empty:
+                if conn.poll():  # an abort message or a closed connection
+                    self.abort('by the session')
+                    return False
+                if not self.worker.is_alive():
+                    self.start_worker()
+                    conn.send(('failed', 'the worker process has died'))
+                    return True
+                continue
+            conn.send(msg)
+            if msg[0] == 'done':
+                return True
+
+
+def serve_connection(conn, runner):
+    outQueue = ConnectionQueue(conn)
+    while True:
+        try:
+            task = conn.recv()
+        except (EOFError, OSError):
+            break
+        except Exception as e:  # e.g. the pipeline cannot be imported
+            syslogger.error('cannot unpickle a task: {0}'.format(e))
+            outQueue.put(('failed', 'cannot unpickle the task: {0}'.format(e)))
+            continue
+        if task is None or task == abortMessage:  # abort after 'done'
+            break
+        try:
+            if not runner.run_task(conn, task):
+                break
+        except (EOFError, OSError):  # the session has gone
+            runner.abort('lost connection')
+            break
+    conn.close()
+
+
+def serve(host, port, authkey, paths=()):
+    """Serves the connections at (*host*, *port*) one after another."""
+    for path in paths:
+        if path not in sys.path:
+            sys.path.append(path)
+    np.seterr(all='raise')
+    # a terminated daemon exits normally and so stops its worker process
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    listener = Listener((host, port), authkey=authkey)
+    runner = TaskRunner(port, paths)
+    syslogger.info('parseq worker daemon at {0}:{1}'.format(host, port))
+    try:
+        while True:
+            try:
+                conn = listener.accept()
+            except (AuthenticationError, EOFError, OSError) as e:
+                syslogger.error('rejected a connection: {0}'.format(e))
+                continue
+            serve_connection(conn, runner)
+    finally:
+        runner.stop()
+        listener.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python -m parseq.core.remote',
+        description='Starts ParSeq worker daemons. The shared secret is taken'
+        ' from the environment variable {0}.'.format(authkeyVariable))
+    parser.add_argument('--host', default='localhost',
+                        help='interface to listen at, default localhost')
+    parser.add_argument('-p', '--port', type=int, default=5001)
+    parser.add_argument('-n', type=int, default=1,
+                        help='number of daemons at consecutive ports')
+    parser.add_argument('--path', nargs='+', default=[],
+                        help='directories to import the pipelines from')
+    args = parser.parse_args(argv)
+    authkey = os.environ.get(authkeyVariable)
+    if not authkey:
+        parser.error('set the environment variable {0}'.format(
+            authkeyVariable))
+    paths = [os.path.abspath(path) for path in args.path]
+    # not daemonic, as each daemon has its own worker process
+    daemons = [multiprocessing.Process(
+        target=serve, args=(args.host, args.port+i, authkey.encode(), paths))
+        for i in range(1, args.n)]
+    for daemon in daemons:
+        daemon.start()
+    try:
+        serve(args.host, args.port, authkey.encode(), paths)
+    except KeyboardInterrupt:
+        pass
+    finally:  # a terminated main daemon terminates the others
+        for daemon in daemons:
+            daemon.terminate()
+        for daemon in daemons:
+            daemon.join(2.)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
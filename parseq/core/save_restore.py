@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 __author__ = "Konstantin Klementiev"
-__date__ = "6 Dec 2024"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 import os
@@ -18,8 +18,10 @@ from ..core import config
 from ..core import singletons as csi
 from ..core import spectra as csp
 from ..core import transforms as ctr
+from ..core import diskcache as cdc
+from ..core import memory as cme
+from ..core import h5pool as chp
 from ..core.logger import syslogger
-from ..gui import gcommons as gco
 from ..version import __versioninfo__, __version__, __date__
 
 __fdir__ = os.path.abspath(os.path.dirname(__file__))
@@ -49,27 +51,33 @@ def load_project(fname, qMessageBox=None, restore_perspective=None):
         syslogger.error("No valid data tree specified in this project file")
         return
     root = csi.dataRootItem
-    colorPolicyName = config.get(configProject, 'Root', 'colorPolicy',
-                                 gco.COLOR_POLICY_NAMES[1])
-    root.colorPolicy = gco.COLOR_POLICY_NAMES.index(colorPolicyName)
-    if root.colorPolicy == gco.COLOR_POLICY_GRADIENT:
-        root.color1 = config.get(configProject, 'Root', 'color1', 'r')
-        root.color2 = config.get(configProject, 'Root', 'color2', 'b')
-    elif root.colorPolicy == gco.COLOR_POLICY_INDIVIDUAL:
-        root.color = config.get(configProject, 'Root', 'color', 'm')
+    if csi.withGUI:
+        from ..gui import gcommons as gco  # only needed with gui
+        colorPolicyName = config.get(configProject, 'Root', 'colorPolicy',
+                                     gco.COLOR_POLICY_NAMES[1])
+        root.colorPolicy = gco.COLOR_POLICY_NAMES.index(colorPolicyName)
+        if root.colorPolicy == gco.COLOR_POLICY_GRADIENT:
+            root.color1 = config.get(configProject, 'Root', 'color1', 'r')
+            root.color2 = config.get(configProject, 'Root', 'color2', 'b')
+        elif root.colorPolicy == gco.COLOR_POLICY_INDIVIDUAL:
+            root.color = config.get(configProject, 'Root', 'color', 'm')
     root.colorAutoUpdate = config.get(
         configProject, 'Root', 'colorAutoUpdate',
         csp.DEFAULT_COLOR_AUTO_UPDATE)
 
     # cwd = os.getcwd()
     os.chdir(os.path.dirname(fname))
+    if csi.useDiskCache:
+        cdc.set_disk_cache(os.path.join(
+            os.path.dirname(os.path.abspath(fname)), cdc.cacheDirName))
     if csi.model is not None:
         items = csi.model.importData(dataTree, configData=configProject)
     else:
         items = root.insert_data(dataTree, configData=configProject)
         ctr.connect_combined(items, root)
         ctr.run_transforms(items, root)
-    root.init_colors(items)
+    if csi.withGUI:
+        root.init_colors(items)
     # os.chdir(cwd)  # don't! This breaks file list update by data selection
 
 
@@ -90,13 +98,15 @@ def save_project(fname, save_perspective=None):
     config.put(configProject, 'Root', 'groups', str(len(root.get_groups())))
     config.put(configProject, 'Root', 'items', str(len(root.get_items())))
 
-    config.put(configProject, 'Root', 'colorPolicy',
-               gco.COLOR_POLICY_NAMES[root.colorPolicy])
-    if root.colorPolicy == gco.COLOR_POLICY_GRADIENT:
-        config.put(configProject, 'Root', 'color1', str(root.color1))
-        config.put(configProject, 'Root', 'color2', str(root.color2))
-    elif root.colorPolicy == gco.COLOR_POLICY_INDIVIDUAL:
-        config.put(configProject, 'Root', 'color', str(root.color))
+    if hasattr(root, 'colorPolicy'):  # only with gui
+        from ..gui import gcommons as gco
+        config.put(configProject, 'Root', 'colorPolicy',
+                   gco.COLOR_POLICY_NAMES[root.colorPolicy])
+        if root.colorPolicy == gco.COLOR_POLICY_GRADIENT:
+            config.put(configProject, 'Root', 'color1', str(root.color1))
+            config.put(configProject, 'Root', 'color2', str(root.color2))
+        elif root.colorPolicy == gco.COLOR_POLICY_INDIVIDUAL:
+            config.put(configProject, 'Root', 'color', str(root.color))
     config.put(configProject, 'Root', 'colorAutoUpdate',
                str(root.colorAutoUpdate))
 
@@ -110,7 +120,62 @@ def save_project(fname, save_perspective=None):
         configProject.write(cf)
 
 
+def _get_transform_widgets(node):
+    return node.widget.transformWidgets if node.widget is not None else []
+
+
+def _get_axis_labels(node):
+    """Without GUI, e.g. in :mod:`parseq.batch`, the axis labels are composed
+    of the array labels and units, otherwise they are taken from the plot."""
+    if node.widget is not None:
+        return node.widget.getAxisLabels()
+
+    def make_label(keys):
+        res = []
+        for key in keys:
+            label = node.get_prop(key, 'plotLabel')
+            if isinstance(label, (list, tuple)):
+                label = ', '.join(label)
+            unit = node.get_prop(key, 'plotUnit')
+            res.append(label + (u" ({0})".format(unit) if unit else ""))
+        return ', '.join(res)
+
+    if node.plotDimension == 1:
+        rightKeys = node.get_arrays_prop('key', role='yr')
+        return [make_label([node.plotXArray]),
+                make_label([key for key in node.plotYArrays
+                            if key not in rightKeys]),
+                make_label(rightKeys)]
+    return [''] * node.plotDimension
+
+
+def _get_plot_props(item, node):
+    if hasattr(item, 'plotProps'):  # only with gui
+        return item.plotProps[node.name]
+    return {}
+
+
+def _get_color(item):
+    return getattr(item, 'color', None)  # only with gui
+
+
+def _get_txt_fmt(arrays):
+    # float32 arrays are written with the digits they have
+    if any(getattr(arr, 'ndim', 1) > 1 for arr in arrays):
+        return '%.12g'
+    return ['%.8g' if getattr(arr, 'dtype', None) == np.float32 else '%.12g'
+            for arr in arrays]
+
+
 def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
+    # the exported nodes are kept in memory while being exported:
+    nodes = [node for node, saveNode in zip(csi.nodes.values(), saveNodes)
+             if saveNode]
+    with cme.pinned(nodes):
+        return _save_data(fname, saveNodes, saveTypes, qMessageBox)
+
+
+def _save_data(fname, saveNodes, saveTypes, qMessageBox=None):
     os.chdir(os.path.dirname(fname))
     if fname.endswith('.pspj'):
         fname = fname.replace('.pspj', '')
@@ -144,7 +209,7 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         d = getattr(it, aN)
                     except AttributeError:
                         continue
-                    for trWidget in node.widget.transformWidgets:
+                    for trWidget in _get_transform_widgets(node):
                         if ((aN in node.plotYArrays) and
                                 hasattr(trWidget, 'extraPlotTransform')):
                             x, d = trWidget.extraPlotTransform(
@@ -153,7 +218,7 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                 dataToSave = [d for d in dataToSave if d is not None]
 
                 headerAll = list(header)
-                plotPropsAll = it.plotProps[node.name]
+                plotPropsAll = _get_plot_props(it, node)
                 for fit in csi.fits.values():
                     if fit.node is node:
                         fitAttrName = fit.dataAttrs['fit']
@@ -171,14 +236,16 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                 # for iid, d in enumerate(dataToSave):
                 #     print(node.name, iid, d.shape)
                 dataToSaveSt = np.column_stack(dataToSave)
+                fmt = _get_txt_fmt(dataToSave)
                 if 'txt' in saveTypes:
                     np.savetxt(sname+'.txt', dataToSaveSt,
-                               fmt='%.12g', header=' '.join(headerAll))
+                               fmt=fmt, header=' '.join(headerAll))
                 if 'txt.gz' in saveTypes:
                     np.savetxt(sname+'.txt.gz', dataToSaveSt,
-                               fmt='%.12g', header=' '.join(headerAll))
+                               fmt=fmt, header=' '.join(headerAll))
 
-                curves[sname] = [it.alias, it.color, headerAll, plotPropsAll]
+                curves[sname] = [it.alias, _get_color(it), headerAll,
+                                 plotPropsAll]
 
                 extrasToSave = [(aDict['abscissa'], aN) for aN, aDict
                                 in node.arrays.items() if 'abscissa' in aDict]
@@ -198,20 +265,21 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         suff = '{0}'.format(aG[1])
                     sname = u'{0}-{1}-{2}-{3}'.format(
                         iNode+1, nname, dname, suff)
+                    fmt = _get_txt_fmt(dataAux)
                     if 'txt' in saveTypes:
                         np.savetxt(sname+'.txt', np.column_stack(dataAux),
-                                   fmt='%.12g', header=' '.join(headerAux))
+                                   fmt=fmt, header=' '.join(headerAux))
                     if 'txt.gz' in saveTypes:
                         np.savetxt(sname+'.txt.gz', np.column_stack(dataAux),
-                                   fmt='%.12g', header=' '.join(headerAux))
-                    curves[sname] = [it.alias, it.color, headerAux]
+                                   fmt=fmt, header=' '.join(headerAux))
+                    curves[sname] = [it.alias, _get_color(it), headerAux]
 
             if 'txt' in saveTypes:
                 plots.append(['txt', node.name, node.plotDimension,
-                              node.widget.getAxisLabels(), curves])
+                              _get_axis_labels(node), curves])
             if 'txt.gz' in saveTypes:
                 plots.append(['txt.gz', node.name, node.plotDimension,
-                              node.widget.getAxisLabels(), curves])
+                              _get_axis_labels(node), curves])
 
     if 'json' in saveTypes or 'pickle' in saveTypes:
         dataToSave = {}
@@ -245,7 +313,7 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         d = getattr(it, aN)
                     except AttributeError:
                         continue
-                    for trWidget in node.widget.transformWidgets:
+                    for trWidget in _get_transform_widgets(node):
                         if (node.plotDimension == 1 and
                             (aN in node.plotYArrays) and
                                 hasattr(trWidget, 'extraPlotTransform')):
@@ -264,7 +332,7 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                     dataToSave[it][aN] = d.tolist() if d is not None else None
 
                 headerAll = list(header)
-                plotPropsAll = it.plotProps[node.name]
+                plotPropsAll = _get_plot_props(it, node)
                 for fit in csi.fits.values():
                     if fit.node is node:
                         fitAttrName = fit.dataAttrs['fit']
@@ -276,7 +344,8 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         except AttributeError:
                             continue
 
-                curves[sname] = [it.alias, it.color, headerAll, plotPropsAll]
+                curves[sname] = [it.alias, _get_color(it), headerAll,
+                                 plotPropsAll]
                 if node.auxArrays + extrasToSave:
                     headerAux = []
                     for aG in (node.auxArrays + extrasToSave):
@@ -290,11 +359,11 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
             if 'json' in saveTypes and node.plotDimension == 1:
                 plots.append(
                     ['json', node.name, node.plotDimension,
-                     node.widget.getAxisLabels(), curves])
+                     _get_axis_labels(node), curves])
             if 'pickle' in saveTypes:
                 plots.append(
                     ['pickle', node.name, node.plotDimension,
-                     node.widget.getAxisLabels(), curves])
+                     _get_axis_labels(node), curves])
 
         for it, sname in zip(csi.selectedItems, snames):
             if 'json' in saveTypes and node.plotDimension == 1:
@@ -335,7 +404,7 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         continue
                     try:
                         y = getattr(it, aN)
-                        for trWidget in node.widget.transformWidgets:
+                        for trWidget in _get_transform_widgets(node):
                             if (node.plotDimension == 1 and
                                 (aN in node.plotYArrays) and
                                     hasattr(trWidget, 'extraPlotTransform')):
@@ -355,7 +424,7 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         continue
 
                 headerAll = list(header)
-                plotPropsAll = it.plotProps[node.name]
+                plotPropsAll = _get_plot_props(it, node)
                 for fit in csi.fits.values():
                     if fit.node is node:
                         fitAttrName = fit.dataAttrs['fit']
@@ -367,7 +436,8 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                         except AttributeError:
                             continue
 
-                curves[sname] = [it.alias, it.color, headerAll, plotPropsAll]
+                curves[sname] = [it.alias, _get_color(it), headerAll,
+                                 plotPropsAll]
                 if node.auxArrays + extrasToSave:
                     headerAux = []
                     for aG in (node.auxArrays + extrasToSave):
@@ -379,9 +449,10 @@ def save_data(fname, saveNodes, saveTypes, qMessageBox=None):
                     if headerAux:
                         curves[sname].append(headerAux)
             h5plots.append([node.name, node.plotDimension,
-                            node.widget.getAxisLabels(), curves])
+                            _get_axis_labels(node), curves])
 
         try:
+            chp.close(fname+'.h5')  # an open file cannot be overwritten
             with h5py.File(fname+'.h5', 'w', track_order=True) as f:
                 # the global `track_order=True` does not work
                 dataGrp = f.create_group('data', track_order=True)
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+u"""
+Shared memory transport
+-----------------------
+
+Process workers (see :mod:`.workers`) receive and return the arrays listed in
+*inArrays* and *outArrays* of a transformation or a fit. By default, these
+arrays would be pickled and sent through pipes, which for large 3D data costs
+more than the transformation itself and doubles the peak memory.
+
+Instead, an array larger than *sharedMemoryMinSize* bytes is copied into a
+block of `multiprocessing.shared_memory` and only a small descriptor,
+:class:`SharedArray`, is sent. The receiver attaches to the block and gets an
+ndarray that directly uses the shared buffer, without further copying. The
+block is closed when that ndarray is garbage collected.
+
+The main process owns all the block names: it unlinks the input blocks when
+the worker has reported the task as done and unlinks the output blocks right
+after attaching to them. Returning arrays via shared memory requires that a
+block survives the closing of the worker's handle, which is not the case on
+Windows; there, the output arrays are pickled as before.
+
+Without `multiprocessing.shared_memory` (Python < 3.8) all arrays are pickled.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys
+import os
+import weakref
+import numpy as np
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:  # Python < 3.8
+    shared_memory = None
+
+isAvailable = shared_memory is not None
+canReturn = isAvailable and os.name != 'nt'
+
+
+class SharedArray(object):
+    """A picklable descriptor of an array placed in a shared memory block."""
+
+    def __init__(self, name, shape, dtype):
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+
+    def __repr__(self):
+        return "SharedArray '{0}' of shape {1} and dtype {2}".format(
+            self.name, self.shape, self.dtype)
+
+
+def _open(name=None, size=0, track=True):
+    """Creates (if *name* is None) or attaches to a shared memory block.
+    Untracked blocks are not unlinked by the resource tracker of the process
+    at its exit; this is used in the workers whose blocks are owned by the
+    main process."""
+    create = name is None
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(
+            name=name, create=create, size=size, track=track)
+    shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+    if not track:
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
+
+
+def is_shareable(arr, minSize):
+    """Tells whether *arr* should be sent as a :class:`SharedArray`."""
+    if not isAvailable or minSize is None:
+        return False
+    return isinstance(arr, np.ndarray) and not arr.dtype.hasobject and \
+        arr.nbytes >= max(minSize, 1)
+
+
+def put_array(arr, track=True):
+    """Copies *arr* into a new shared memory block. Returns a tuple of the
+    descriptor and the block. The block must stay open until the receiver has
+    attached to it."""
+    shm = _open(size=arr.nbytes, track=track)
+    view = np.ndarray(arr.shape, dtype=arr.dtype, buffer=shm.buf)
+    view[...] = arr
+    del view  # otherwise the block cannot be closed
+    return SharedArray(shm.name, arr.shape, arr.dtype), shm
+
+
+def get_array(desc, track=True, unlink=False):
+    """Returns an ndarray that lives in the shared block described by *desc*.
+    The block is closed when the array is garbage collected. If *unlink* is
+    True, the block name is removed at once, so that the memory is freed
+    together with the array."""
+    shm = _open(desc.name, track=track)
+    arr = np.ndarray(desc.shape, dtype=desc.dtype, buffer=shm.buf)
+    if unlink:
+        shm.unlink()
+    weakref.finalize(arr, shm.close)
+    return arr
+
+
+def release(shm):
+    """Closes and unlinks a block created by :func:`put_array`."""
+    try:
+        shm.close()
+        shm.unlink()
+    except (OSError, BufferError):
+        pass
+
+
+def discard(desc):
+    """Unlinks the block described by *desc* without reading it."""
+    try:
+        shm = _open(desc.name)
+        shm.close()
+        shm.unlink()
+    except OSError:
+        pass
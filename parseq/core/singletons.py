@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 __author__ = "Konstantin Klementiev"
-__date__ = "29 Sep 2022"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 import os
@@ -62,6 +62,24 @@ selectedItems, selectedTopItems = [], []  # common for all data trees
 recentlyLoadedItems = []
 allLoadedItems = []
 
+# if True, a transform run with runDownstream=True lets each data item proceed
+# to the downstream transforms as soon as it is ready, see core/pipeline.py
+runPipelined = False
+
+# the disk cache of transformation results, see core/diskcache.py; if
+# useDiskCache, it is opened by load_project() in the project directory
+useDiskCache = False
+diskCacheMaxSize = 2**30  # bytes
+diskCache = None
+
+# the maximal size in bytes of the arrays of intermediate nodes kept in the
+# data items, see core/memory.py; None for no limit
+memoryBudget = None
+
+# the number of threads that read the data files of several data items
+# inserted at once, see core/spectra.py; 1 for reading them one by one
+nReadThreads = 4
+
 # tasker will be created in MainWindow ParSeq init
 tasker = None
 exectimes = dict()
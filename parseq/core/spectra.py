@@ -16,32 +16,38 @@ Qt, where the user does not have to know about the underlying objects and
 methods.
 """
 __author__ = "Konstantin Klementiev"
-__date__ = "22 Apr 2024"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 # import sys
 import os.path as osp
-import re
 import time
 import copy
 import json
 import numpy as np
 from scipy.interpolate import interp1d
-import warnings
-from collections import Counter
-
-import silx.io as silx_io
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 
 from . import singletons as csi
 from . import commons as cco
 from . import config
+from . import transforms as ctr
+from . import memory as cme
+from . import chunked as cch
+from . import columnfile as ccf
+from . import h5pool as chp
+from . import formulas as cfm
 from .correction import calc_correction
+from .nodes import cast_array, to_accumulator
 from .logger import logger, syslogger
 from ..utils.format import format_memory_size
 from ..utils import math as uma
 
 DEFAULT_COLOR_AUTO_UPDATE = False
 
+activeRead = None  # the BulkRead of the running TreeItem.insert_data()
+
 
 class TreeItem(object):
     def __init__(self, name, parentItem=None, insertAt=None, **kwargs):
@@ -364,6 +370,32 @@ class TreeItem(object):
         return TreeItem(name, self, insertAt, **kwargs)
 
     def insert_data(self, data, insertAt=None, **kwargs):
+        global activeRead
+        if activeRead is None and csi.nReadThreads > 1 and \
+                isinstance(data, (list, tuple)) and \
+                'configData' not in kwargs and not kwargs.get('concatenate'):
+            activeRead = BulkRead()
+            try:
+                items = self._insert_data(data, insertAt, **kwargs)
+                bulkRead = activeRead
+            finally:
+                activeRead = None
+            bulkRead.execute()
+            items = [item for item in items if not bulkRead.is_removed(item)]
+        else:
+            items = self._insert_data(data, insertAt, **kwargs)
+
+        csi.recentlyLoadedItems = list(items)
+        csi.allLoadedItems[:] = []
+        csi.allLoadedItems.extend(csi.dataRootItem.get_items())
+        # if len(csi.selectedItems) == 0:
+        #     if len(csi.allLoadedItems) == 0:
+        #         raise ValueError("No valid data added")
+        csi.selectedItems = list(items)
+        csi.selectedTopItems = list(items)
+        return items
+
+    def _insert_data(self, data, insertAt=None, **kwargs):
         items = []
         if hasattr(self, 'alias'):
             alias = self.alias
@@ -417,15 +449,6 @@ class TreeItem(object):
                 "data in {0} must be a sequence or a string, not {1}"
                 " of type {2}".format(alias, data, type(data)))
 
-        csi.recentlyLoadedItems = list(items)
-        csi.allLoadedItems[:] = []
-        csi.allLoadedItems.extend(csi.dataRootItem.get_items())
-        # if len(csi.selectedItems) == 0:
-        #     if len(csi.allLoadedItems) == 0:
-        #         raise ValueError("No valid data added")
-        csi.selectedItems = list(items)
-        csi.selectedTopItems = list(items)
-
         shouldMakeColor = len(self.childItems) > 0 and csi.withGUI
         if shouldMakeColor:
             self.init_colors(self.childItems)
@@ -462,6 +485,101 @@ class TreeItem(object):
                 raise ValueError("wrong choice of color type")
 
 
+class BulkRead(object):
+    """Reads the files of the data items inserted by one call of
+    :meth:`TreeItem.insert_data` concurrently in `singletons.nReadThreads`
+    threads and then finishes the data items in their order of insertion.
+    Parsing and hdf5 reading release the GIL in large part."""
+
+    def __init__(self):
+        self.entries = []  # (data item, lengthCheck, finishArgs, selection)
+        self.removed = []
+
+    def add(self, item, lengthCheck, finishArgs):
+        self.entries.append(
+            (item, lengthCheck, finishArgs, list(csi.selectedItems)))
+
+    def _read(self, entry):
+        entry[0].read_file(lengthCheck=entry[1], saveConfig=False)
+
+    def execute(self):
+        if not self.entries:
+            return
+        nThreads = min(csi.nReadThreads, len(self.entries))
+        if nThreads > 1:
+            with ThreadPoolExecutor(nThreads) as executor:
+                list(executor.map(self._read, self.entries))
+        else:
+            for entry in self.entries:
+                self._read(entry)
+
+        selectedItems = csi.selectedItems
+        lastItem = None
+        for item, lengthCheck, finishArgs, selection in self.entries:
+            if item.state[item.originNodeName] == \
+                    cco.DATA_STATE_MARKED_FOR_DELETION:
+                item.remove_from_parent()
+                self.removed.append(item)
+                continue
+            # as it was at the insertion, for copyTransformParams:
+            csi.selectedItems = selection
+            item._finish_read_file(*finishArgs)
+            if item.state[item.originNodeName] == cco.DATA_STATE_GOOD:
+                lastItem = item
+        csi.selectedItems = selectedItems
+        if lastItem is not None:
+            lastItem.save_load_config()
+
+    def is_removed(self, item):
+        return item in self.removed
+
+
+class Concatenation(object):
+    """Joins the arrays of *nParts* files along axis 0, part by part. With
+    *reduce*, each part is first summed over *axis* keeping the dimensions
+    (accumulated in float64 for float arrays); such sums of one frame are
+    written into an output array preallocated at the first part. Otherwise,
+    the parts are collected and joined once at the end. If any part is None,
+    so is the result."""
+
+    def __init__(self, nParts, axis=0, reduce=False):
+        self.nParts = nParts
+        self.axis = axis
+        self.reduce = reduce
+        self.parts = []
+        self.out = None
+        self.isNone = False
+
+    def add(self, ipart, arr):
+        if arr is None or self.isNone:
+            self.isNone = True
+            self.parts, self.out = [], None
+            return
+        if self.reduce:
+            isFloat = arr.dtype.kind == 'f'
+            summed = arr.sum(axis=self.axis, keepdims=True,
+                             dtype=np.float64 if isFloat else None)
+            arr = summed.astype(arr.dtype, copy=False) if isFloat else summed
+            if ipart == 0 and len(arr) == 1:
+                self.out = np.empty((self.nParts,) + arr.shape[1:], arr.dtype)
+            if self.out is not None:
+                if arr.shape == (1,) + self.out.shape[1:]:
+                    self.out[ipart] = arr[0]
+                    return
+                self.parts = [self.out[:ipart]]  # another shape, join later
+                self.out = None
+        self.parts.append(arr)
+
+    def result(self):
+        if self.isNone:
+            return
+        if self.out is not None:
+            return self.out
+        if len(self.parts) == 1:
+            return self.parts[0]
+        return np.concatenate(self.parts)
+
+
 class Spectrum(TreeItem):
     u"""
     This class is the main building block of the ParSeq data model and is
@@ -515,14 +633,17 @@ class Spectrum(TreeItem):
                 non-empty for a data item. As a minimum, it defines the key
                 `dataSource` and sets it to a list of hdf5 names (when for
                 hdf5 data), column numbers or expressions of 'Col1', 'Col2'
-                etc variables (when for column data). It may define
+                etc variables (when for column data), see :mod:`.formulas`
+                for the allowed expressions. It may define
                 'conversionFactors' as a list of either floats or strings;
                 a float is a multiplicative factor that converts to the node's
                 array unit and a string is another unit that cannot be
                 converted to the node's array unit, e.g. the node defines an
                 array with a 'mA' unit while the data was measured with a
                 'count' unit. It may define 'metadata': a comma separated str
-                of hdf5 attribute names that define metadata.
+                of hdf5 attribute names that define metadata. For column
+                files, it may define 'parser', the parsing engine, see
+                :mod:`.columnfile`.
 
             *originNodeName*, *terminalNodeName*: str
                 The data propagation is between origin node and terminal node,
@@ -609,6 +730,9 @@ class Spectrum(TreeItem):
         self.aliasExtra = None  # for extra name qualifier
         self.meta = {'text': '', 'modified': '', 'size': 0}
         self.combinesTo = []  # list of instances of Spectrum if not empty
+        self.fingerprints = {}  # transform name: (arraysHash, paramsHash)
+        self.evictedArrays = {}  # array name: node name, see core/memory.py
+        self.lazyArrays = {}  # array name: LazyArray, see core/chunked.py
 
         self.transformParams = {}  # each transform will add to this dict
         self.dontSaveParamsWhenUnused = {}  # paramName=paramUsed
@@ -733,6 +857,22 @@ class Spectrum(TreeItem):
             res[yName] = plotParams
         return res
 
+    def __getattr__(self, name):
+        # only called for a missing attribute: reads a lazy array or
+        # recalculates an evicted array
+        lazy = self.__dict__.get('lazyArrays')
+        if lazy and name in lazy:
+            arr = lazy.pop(name).read()
+            setattr(self, name, arr)
+            return arr
+        evicted = self.__dict__.get('evictedArrays')
+        if evicted and name in evicted:
+            cme.materialize(self, evicted[name])
+            if name in self.__dict__:
+                return self.__dict__[name]
+        raise AttributeError("'{0}' object has no attribute '{1}'".format(
+            self.__class__.__name__, name))
+
     def get_state(self, nodeName):
         if self.error is not None:
             return cco.DATA_STATE_BAD
@@ -742,6 +882,7 @@ class Spectrum(TreeItem):
                   copyTransformParams=True, transformParams={}, fitParams={},
                   concatenate=False, lengthCheck=None):
         fromNode = csi.nodes[self.originNodeName]
+        tmpalias = None
         if isinstance(self.madeOf, dict):
             self.dataType = cco.DATA_BRANCH
             if self.alias == 'auto':
@@ -759,39 +900,17 @@ class Spectrum(TreeItem):
             if concatenate:
                 axis, reduce = concatenate[:2] \
                     if isinstance(concatenate, (list, tuple)) else (0, False)
-                madeOfTmp = list(self.madeOf)
-                for iconcat, madeOf in enumerate(madeOfTmp):
-                    self.madeOf = madeOf.replace('\\', '/')
-                    if iconcat == 0:
-                        if self.madeOf.startswith('silx:'):
-                            self.dataType = cco.DATA_DATASET
-                        else:
-                            self.dataType = cco.DATA_COLUMN_FILE
-                        self.set_auto_color_tag()
-                    if shouldLoadNow:
-                        self.read_file()
-                    for aName in fromNode.arrays:
-                        setName = fromNode.get_prop(aName, 'raw')
-                        if iconcat == 0:
-                            if reduce:
-                                concatTmp = getattr(self, setName).sum(
-                                    axis=axis, keepdims=True)
-                            else:
-                                concatTmp = copy.copy(getattr(self, setName))
-                            setattr(self, setName+'Concat', concatTmp)
-                        else:
-                            if reduce:
-                                tmp = getattr(self, setName).sum(
-                                    axis=axis, keepdims=True)
-                            else:
-                                tmp = copy.copy(getattr(self, setName))
-                            if getattr(self, setName+'Concat') is not None:
-                                concatTmp = np.concatenate(
-                                    (getattr(self, setName+'Concat'), tmp))
-                                setattr(self, setName+'Concat', concatTmp)
-                                setattr(self, setName, concatTmp)
-                            else:
-                                setattr(self, setName, None)
+                madeOfTmp = [madeOf.replace('\\', '/')
+                             for madeOf in self.madeOf]
+                self.madeOf = madeOfTmp[0]
+                if self.madeOf.startswith('silx:'):
+                    self.dataType = cco.DATA_DATASET
+                else:
+                    self.dataType = cco.DATA_COLUMN_FILE
+                self.set_auto_color_tag()
+                if shouldLoadNow:
+                    self.read_concatenated(madeOfTmp, axis, reduce)
+                self.madeOf = madeOfTmp[-1]
                 if self.state[fromNode.name] == cco.DATA_STATE_GOOD:
                     shapes = self.check_shape()
                     if isinstance(shapes, dict):
@@ -824,39 +943,119 @@ class Spectrum(TreeItem):
             else:
                 self.dataType = cco.DATA_COLUMN_FILE
             self.set_auto_color_tag()
+            finishArgs = (copyTransformParams, transformParams, fitParams,
+                          runDownstream)
             if shouldLoadNow:
+                if activeRead is not None:  # the file is read by activeRead
+                    activeRead.add(self, lengthCheck, finishArgs)
+                    return
                 self.read_file(lengthCheck=lengthCheck)
-
-            if self.state[fromNode.name] == cco.DATA_STATE_MARKED_FOR_DELETION:
-                return
-            elif self.state[fromNode.name] == cco.DATA_STATE_GOOD:
-                shapes = self.check_shape()
-                if isinstance(shapes, dict):
-                    syslogger.log(
-                        100,
-                        'Incompatible data shapes in {0}:\n{1}'.format(
-                            fromNode.name, shapes))
-                    self.state[self.originNodeName] = cco.DATA_STATE_BAD
-                    self.badShapes = shapes
-                    self.colorTag = 3
-
-            basename = osp.basename(self.madeOf)
-            if self.alias == 'auto':
-                tmpalias = osp.splitext(basename)[0]
-                if '::' in self.madeOf:
-                    pos = self.madeOf.find('::')
-                    h5name = osp.splitext(osp.basename(self.madeOf[:pos]))[0]
-                    if pos == len(self.madeOf)-2:  # ends with '::'
-                        tmpalias = h5name
-                    else:
-                        tmpalias = '/'.join([h5name, tmpalias])
-
-                if self.aliasExtra:
-                    tmpalias += ': {0}'.format(self.aliasExtra)
-                if self.suffix:
-                    tmpalias += self.suffix
+            self._finish_read_file(*finishArgs)
+            return
         else:
             raise ValueError('unknown data type of {0}'.format(self.alias))
+        self._finish_read_data(tmpalias, copyTransformParams,
+                               transformParams, fitParams, runDownstream)
+
+    def _read_part(self, madeOf):
+        part = copy.copy(self)
+        part.madeOf = madeOf
+        part.state = dict(self.state)
+        part.meta = dict(self.meta)
+        part.read_file(saveConfig=False)
+        return part
+
+    def _iter_parts(self, madeOfs):
+        """Yields the data items read from *madeOfs* in their order, read
+        ahead in `singletons.nReadThreads` threads."""
+        nThreads = min(csi.nReadThreads, len(madeOfs))
+        if nThreads <= 1:
+            for madeOf in madeOfs:
+                yield self._read_part(madeOf)
+            return
+        with ThreadPoolExecutor(nThreads) as executor:
+            futures = deque()
+            for madeOf in madeOfs:
+                futures.append(executor.submit(self._read_part, madeOf))
+                if len(futures) > nThreads:
+                    yield futures.popleft().result()
+            while futures:
+                yield futures.popleft().result()
+
+    def read_concatenated(self, madeOfs, axis=0, reduce=False):
+        """Reads the files or datasets *madeOfs* and joins their arrays along
+        axis 0 into this data item, see :class:`Concatenation`. The parts are
+        read in threads and are released once added, so only the joined
+        arrays and a few parts are held in memory."""
+        fromNode = csi.nodes[self.originNodeName]
+        setNames = [fromNode.get_prop(aName, 'raw')
+                    for aName in fromNode.arrays]
+        concats = [Concatenation(len(madeOfs), axis, reduce)
+                   for setName in setNames]
+        parts = self._iter_parts(madeOfs)
+        for ipart, part in enumerate(parts):
+            self.state = part.state
+            if part.state[fromNode.name] != cco.DATA_STATE_GOOD:
+                parts.close()
+                for setName in setNames:
+                    setattr(self, setName, None)
+                return
+            for setName, concat in zip(setNames, concats):
+                concat.add(ipart, getattr(part, setName, None))
+            self.madeOf = part.madeOf
+            self.meta = part.meta
+            self.aliasExtra = part.aliasExtra
+        self.lazyArrays = {}
+        for setName, concat in zip(setNames, concats):
+            setattr(self, setName, concat.result())
+        try:
+            self.meta['length'] = len(getattr(self, setNames[0]))
+        except TypeError:  # another type, not array
+            pass
+        self.save_load_config()
+
+    def _finish_read_file(self, copyTransformParams=True,
+                          transformParams={}, fitParams={},
+                          runDownstream=False):
+        """The part of :meth:`read_data` for a file or a dataset after
+        :meth:`read_file`."""
+        fromNode = csi.nodes[self.originNodeName]
+        if self.state[fromNode.name] == cco.DATA_STATE_MARKED_FOR_DELETION:
+            return
+        elif self.state[fromNode.name] == cco.DATA_STATE_GOOD:
+            shapes = self.check_shape()
+            if isinstance(shapes, dict):
+                syslogger.log(
+                    100,
+                    'Incompatible data shapes in {0}:\n{1}'.format(
+                        fromNode.name, shapes))
+                self.state[self.originNodeName] = cco.DATA_STATE_BAD
+                self.badShapes = shapes
+                self.colorTag = 3
+
+        tmpalias = None
+        basename = osp.basename(self.madeOf)
+        if self.alias == 'auto':
+            tmpalias = osp.splitext(basename)[0]
+            if '::' in self.madeOf:
+                pos = self.madeOf.find('::')
+                h5name = osp.splitext(osp.basename(self.madeOf[:pos]))[0]
+                if pos == len(self.madeOf)-2:  # ends with '::'
+                    tmpalias = h5name
+                else:
+                    tmpalias = '/'.join([h5name, tmpalias])
+
+            if self.aliasExtra:
+                tmpalias += ': {0}'.format(self.aliasExtra)
+            if self.suffix:
+                tmpalias += self.suffix
+        self._finish_read_data(tmpalias, copyTransformParams,
+                               transformParams, fitParams, runDownstream)
+
+    def _finish_read_data(self, tmpalias, copyTransformParams=True,
+                          transformParams={}, fitParams={},
+                          runDownstream=False):
+        fromNode = csi.nodes[self.originNodeName]
         if self.alias == 'auto':
             # check duplicates:
             allLoadedItemNames = [d.alias for d in csi.allLoadedItems
@@ -899,10 +1098,12 @@ class Spectrum(TreeItem):
 
         if runDownstream and fromNode.transformsOut and \
                 self.state[fromNode.name] == cco.DATA_STATE_GOOD:
+            plan = ctr.ExecutionPlan()
             for tr in fromNode.transformsOut:
-                tr.run(dataItems=[self])  # no need for multiprocessing here
-                if csi.model is not None:
-                    csi.model.invalidateData()
+                plan.add(tr, [self])  # no need for multiprocessing here
+            plan.execute()
+            if csi.model is not None:
+                csi.model.invalidateData()
 
     def set_auto_color_tag(self):
         if self.colorTag != 0:
@@ -929,9 +1130,10 @@ class Spectrum(TreeItem):
                 stem = arrName
                 sl = '0'
             checkName = fromNode.get_prop(stem, 'raw')
-            arr = getattr(self, checkName)
+            arr = cch.get_input(self, checkName)
             try:
-                shape = arr.shape[eval(sl)] if arr is not None else []
+                shape = arr.shape[cfm.literal_eval(sl)] if arr is not None \
+                    else []
                 shapes[checkName] = shape
             except IndexError:
                 return False
@@ -1093,8 +1295,8 @@ class Spectrum(TreeItem):
                 continue
             try:
                 # to expand possible list comprehension or string expressions
-                ds = str(eval(ds))
-            except:  # noqa
+                ds = str(cfm.literal_eval(ds))
+            except ValueError:
                 pass
 
             if ((ds.startswith('[') and ds.endswith(']')) or
@@ -1153,21 +1355,25 @@ class Spectrum(TreeItem):
 
         return group
 
-    def read_file(self, lengthCheck=None):
+    def read_file(self, lengthCheck=None, saveConfig=True):
+        """Reads the data file or dataset *madeOf*. *saveConfig*=False leaves
+        the load config as is, e.g. when reading in a thread."""
         madeOf = self.madeOf
         fromNode = csi.nodes[self.originNodeName]
         df = dict(self.dataFormat)
         df.update(csi.extraDataFormat)
-        formatSection = 'Format_' + fromNode.name
-        config.configLoad[formatSection] = dict(df)
+        if saveConfig:
+            formatSection = 'Format_' + fromNode.name
+            config.configLoad[formatSection] = dict(df)
 
         arr = []
+        self.lazyArrays = {}
         if self.dataType == cco.DATA_COLUMN_FILE:
-            header = cco.get_header(madeOf, df, searchAllLines=True)
+            header = []  # read together with the data
         elif self.dataType == cco.DATA_DATASET:
             header = []
             try:
-                label = silx_io.get_data(madeOf + "/" + df["labelName"])
+                label = chp.get_data(madeOf + "/" + df["labelName"])
                 self.aliasExtra = label.decode("utf-8")
                 header.append(label)
             except (ValueError, KeyError):
@@ -1181,7 +1387,7 @@ class Spectrum(TreeItem):
 
             for md in mds:
                 try:
-                    mdres = silx_io.get_data(madeOf + "/" + md)
+                    mdres = chp.get_data(madeOf + "/" + md)
                     if isinstance(mdres, bytes):
                         mdres = mdres.decode("utf-8")
                     header.append("<b>{0}</b>: {1}<br>".format(md, mdres))
@@ -1191,35 +1397,28 @@ class Spectrum(TreeItem):
             raise TypeError('wrong datafile type')
 
         try:  # if True:
-            df['skip_header'] = df.pop('skiprows', 0)
             dataSource = df.pop('dataSource', None)
             sliceStrs = df.pop('slices', ['' for ds in dataSource])
             conversionFactors = df.pop('conversionFactors',
                                        [None for arr in fromNode.arrays])
             df.pop('metadata', None)
-            cols = 0
-            for ds in dataSource:
-                try:
-                    ds = int(ds)
-                except Exception:
-                    pass
-                if isinstance(ds, str) and "Col" in ds:
-                    regex = re.compile('Col([0-9]*)')
-                    # remove possible duplicates by list(dict.fromkeys())
-                    subkeys = list(dict.fromkeys(regex.findall(ds)))
-                    for ch in subkeys:
-                        cols = max(cols, int(ch))
-                elif isinstance(ds, int):
-                    cols = max(cols, ds)
-            # important for column files that have incomplete columns:
-            df['usecols'] = list(range(cols+1))
             if dataSource is None:
                 raise ValueError('bad dataSource settings')
             if self.dataType == cco.DATA_COLUMN_FILE:
-                with warnings.catch_warnings():
-                    warnings.simplefilter("ignore")
-                    arrs = np.genfromtxt(
-                        madeOf, unpack=True, encoding="utf-8", **df)
+                cols = 0
+                for ds in dataSource:
+                    try:
+                        ds = int(ds)
+                    except Exception:
+                        pass
+                    if isinstance(ds, int):
+                        cols = max(cols, ds)
+                    elif ds:
+                        cols = max(
+                            [cols] + cfm.compile_formula(ds).columns)
+                # important for column files that have incomplete columns:
+                df['usecols'] = list(range(cols+1))
+                header, arrs = ccf.read_column_file(madeOf, df)
                 if len(arrs) == 0:
                     raise ValueError('bad data file')
 
@@ -1251,18 +1450,25 @@ class Spectrum(TreeItem):
                         else:
                             arr = self.interpret_array_formula(txt, arrs)
                     else:
-                        arr = self.interpret_array_formula(txt)
+                        url = cch.get_lazy_url(self, txt)
+                        if url is not None and not sliceStr and \
+                                fromNode.get_prop(aName, 'lazy'):
+                            arr = cch.LazyArray(
+                                url, fromNode.get_prop(aName, 'dtype'))
+                            self.__dict__.pop(setName, None)
+                            self.lazyArrays[setName] = arr
+                            continue
+                        if url is not None and sliceStr:
+                            # only the slice or the sum is read
+                            arr = cch.LazyArray(url)
+                            if txt.startswith('silx:'):
+                                config.put(config.configLoad, 'Data',
+                                           self.originNodeName+'_silx', txt)
+                        else:
+                            arr = self.interpret_array_formula(txt)
                         if sliceStr:
-                            if 'axis' in sliceStr or 'sum' in sliceStr:
-                                # sum axes
-                                sumlst = \
-                                    sliceStr[sliceStr.find('=')+1:].split(',')
-                                arr = arr.sum(axis=[int(ax) for ax in sumlst])
-                            else:
-                                sliceTuple = tuple(
-                                    cco.parse_slice_str(slc)
-                                    for slc in sliceStr.split(','))
-                                arr = arr[sliceTuple]
+                            arr = self.apply_slice_str(arr, sliceStr)
+                    arr = cast_array(arr, fromNode.get_prop(aName, 'dtype'))
                     setattr(self, setName, arr)
                 except Exception as e:
                     setattr(self, setName, None)
@@ -1291,8 +1497,12 @@ class Spectrum(TreeItem):
                     syslogger.log(100, errorTxt)
                     header.append(errorTxt+'\n')
 
+                isSorted = np.array_equal(
+                    sortIndices, np.arange(len(sortIndices)))
                 for aName in fromNode.arrays:
                     setName = fromNode.get_prop(aName, 'raw')
+                    if isSorted and setName in self.lazyArrays:
+                        continue  # stays unread
                     arrt = getattr(self, setName)
                     if isinstance(arrt, np.ndarray):
                         setattr(self, setName, arrt[sortIndices])
@@ -1322,7 +1532,16 @@ class Spectrum(TreeItem):
             self.meta['length'] = len(arr)
         except TypeError:  # another type, not array
             pass
+        if saveConfig:
+            self.save_load_config()
 
+    def save_load_config(self):
+        """Stores the data format and the location of this data item as the
+        last loaded ones."""
+        fromNode = csi.nodes[self.originNodeName]
+        df = dict(self.dataFormat)
+        df.update(csi.extraDataFormat)
+        config.configLoad['Format_' + fromNode.name] = df
         start = 5 if self.madeOf.startswith('silx:') else 0
         end = self.madeOf.find('::') if '::' in self.madeOf else None
         path = self.madeOf[start:end]
@@ -1333,58 +1552,33 @@ class Spectrum(TreeItem):
         config.put(config.configLoad, 'Data', fromNode.name, toSave)
         config.write_configs('transform, load')
 
-    def interpret_array_formula(self, colStr, treeObj=None):
-        if "np." in colStr:
-            try:
-                arr = eval(colStr)
-                return arr
-            except Exception:
-                pass
-        try:
-            # to expand string expressions
-            colStr = str(eval(colStr))
-        except Exception:
-            pass
+    @staticmethod
+    def apply_slice_str(arr, sliceStr):
+        """Applies the slice string of `dataFormat` to *arr*, an array or a
+        :class:`.LazyArray`: either a comma separated slice or a sum over
+        axes as 'sum=0,1' or 'axis=0,1'."""
+        if 'axis' in sliceStr or 'sum' in sliceStr:
+            sumlst = sliceStr[sliceStr.find('=')+1:].split(',')
+            return arr.sum(axis=tuple(int(ax) for ax in sumlst),
+                           dtype=np.float64 if arr.dtype.kind == 'f' else None)
+        sliceTuple = tuple(
+            cco.parse_slice_str(slc) for slc in sliceStr.split(','))
+        return arr[sliceTuple]
 
-        keys = re.findall(r'\[(.*?)\]', colStr)
-        if len(keys) == 0:
-            colStr = colStr.replace('col', 'Col')
-            if "Col" in colStr:
-                regex = re.compile('Col([0-9]*)')
-                # remove possible duplicates by list(dict.fromkeys())
-                subkeys = list(dict.fromkeys(regex.findall(colStr)))
-                keys = ['Col'+ch for ch in subkeys]
-                for ch in subkeys:
-                    colStr = colStr.replace('Col'+ch, 'd["Col{0}"]'.format(ch))
-            else:
-                keys = [colStr]
-                colStr = 'd[r"{0}"]'.format(colStr)
-        else:
-            # remove outer quotes:
-            keys = [k[1:-1] if k.startswith(('"', "'")) else k for k in keys]
-        d = {}
-        _locals = dict(d=d, np=np)
-        if treeObj is None:  # is Hdf5Item
-            for k in keys:
-                if k.startswith("silx:"):
-                    d[k] = silx_io.get_data(k)
-                    config.put(config.configLoad, 'Data',
-                               self.originNodeName+'_silx', k)
-                else:
-                    d[k] = silx_io.get_data('/'.join((self.madeOf, k)))
-        else:  # arrays from column file
-            for k in keys:
-                kl = k.lower()
-                if "col" in kl:
-                    kn = int(kl[kl.find('col')+3:])
-                else:
-                    kn = int(k)
-                d[k] = treeObj[kn]
-                d[kn] = d[k]
-                _locals[k] = k
-        # keyword  `locals` is an error in Py<3.13,
-        # using just `_locals` (without globals()) does not work
-        return eval(colStr, {}, _locals)
+    def interpret_array_formula(self, colStr, treeObj=None):
+        """Evaluates the `dataSource` formula *colStr*, compiled once by
+        :func:`.formulas.compile_formula`, for the hdf5 item or, if
+        *treeObj* is given, for the columns *treeObj*."""
+        formula = cfm.compile_formula(colStr)
+        if treeObj is not None:  # arrays from column file
+            return formula.evaluate_columns(treeObj)
+        for k in formula.keys:
+            if isinstance(k, str) and k.startswith("silx:"):
+                config.put(config.configLoad, 'Data',
+                           self.originNodeName+'_silx', k)
+        return formula.evaluate(
+            lambda k: chp.get_data(k) if k.startswith("silx:") else
+            chp.get_data('/'.join((self.madeOf, k))))
 
     def convert_units(self, conversionFactors):
         if not conversionFactors:
@@ -1402,7 +1596,7 @@ class Spectrum(TreeItem):
                 if isinstance(cFactor, str):
                     if cFactor.startswith('lim'):
                         secondPassNeeded = True
-                        mn, mx = eval(cFactor[3:])
+                        mn, mx = cfm.literal_eval(cFactor[3:])
                         where = ((mn < arr) if mn is not None else True) & \
                             ((arr < mx) if mx is not None else True)
                         if where.sum() == 0:
@@ -1413,10 +1607,10 @@ class Spectrum(TreeItem):
                             errMsg += 'Remove it from your conversions!'
                             syslogger.log(100, errMsg)
                     elif cFactor.startswith('slice'):
-                        sl = eval(cFactor)
+                        sl = cfm.literal_eval(cFactor)
                         setattr(self, setName, arr[sl])
                     elif cFactor.startswith('transpose'):
-                        axes = eval(cFactor[9:])
+                        axes = cfm.literal_eval(cFactor[9:])
                         setattr(self, setName, arr.transpose(*axes))
                     elif cFactor.startswith('f'):
                         arr *= 1e15
@@ -1442,6 +1636,7 @@ class Spectrum(TreeItem):
                 syslogger.error('Error in convert_units for {0}:\n{1}'.format(
                     aName, err))
                 setattr(self, setName, None)
+        fromNode.cast_arrays(self, raw=True)  # arr * cFactor may upcast
 
         if secondPassNeeded:
             for aName in fromNode.arrays:
@@ -1545,7 +1740,8 @@ class Spectrum(TreeItem):
                     sumx = 0
                     try:
                         for data in madeOf:
-                            sumx += np.array(getattr(data, xName))
+                            sumx += to_accumulator(
+                                np.asarray(getattr(data, xName)))
                     except AttributeError:
                         continue
                     setattr(self, xName, sumx/ns)
@@ -1572,7 +1768,9 @@ class Spectrum(TreeItem):
                     if ns == 0:  # arrayName is optional, all arrays are None
                         setattr(self, dName, None)
                         continue
-                    s = sum(arr for arr in arrays if arr is not None)
+                    # accumulated in float64 also for float32 arrays:
+                    s = sum(to_accumulator(arr) for arr in arrays
+                            if arr is not None)
 
                     if what == cco.COMBINE_AVE:
                         v = s / ns
@@ -1627,6 +1825,7 @@ class Spectrum(TreeItem):
                 elif dim < fromNode.plotDimension:
                     setattr(self, dName, v/ns)
 
+            fromNode.cast_arrays(self, raw=True)
             self.meta['length'] = len(dimArray) if dimArray is not None else 0
             self.state[fromNode.name] = cco.DATA_STATE_GOOD
         except AssertionError:
@@ -1668,6 +1867,7 @@ class Spectrum(TreeItem):
                         base.branch = self.parentItem
                 else:
                     raise ValueError('unknown data type')
+            fromNode.cast_arrays(self)
             self.state[fromNode.name] = cco.DATA_STATE_GOOD
 
         except Exception as e:
@@ -1685,6 +1885,7 @@ class Spectrum(TreeItem):
                 for arrayName, arr in zip(fromNode.arrays, res):
                     setName = fromNode.get_prop(arrayName, 'raw')
                     setattr(self, setName, arr)
+                fromNode.cast_arrays(self, raw=True)
             self.state[fromNode.name] = cco.DATA_STATE_GOOD
         except Exception as e:
             syslogger.error('create_data of {0} ended with error:\n{1}'
@@ -2037,7 +2238,7 @@ class Spectrum(TreeItem):
                                 if pos > 0:
                                     stem = kName[:pos]
                                     sl = kName[pos+1:-1]
-                                    ax = eval(sl)
+                                    ax = cfm.literal_eval(sl)
                                 else:
                                     stem = kName
                                     sl = '0'
@@ -2050,7 +2251,7 @@ class Spectrum(TreeItem):
                                 except AttributeError:
                                     continue
                                 try:
-                                    shape = arr.shape[eval(sl)] \
+                                    shape = arr.shape[cfm.literal_eval(sl)] \
                                         if arr is not None else []
                                 except IndexError:
                                     continue
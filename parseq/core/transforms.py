@@ -8,9 +8,18 @@ transformation node (`fromNode`) given arrays defined in another transformation
 node (`toNode`). Each transformation defines a dictionary of transformation
 parameters; the values of these parameters are individual per data item. Each
 transformation in a pipeline requires subclassing from :class:`Transform`.
+
+A transformation run with *runDownstream=True* does not call the downstream
+transformations recursively. Instead, the (transform, data items) pairs
+reachable from the run are collected into an :class:`ExecutionPlan` that runs
+each downstream transform once, in the order of data flow, for the union of
+the data items sent to it. Thus, a transform below converging branches of the
+pipeline or below several groups of data is not rerun for the same item. The
+executing plan is kept per thread (see :func:`get_active_plan`), so runs in
+different threads, e.g. the GUI tasker and a script, do not mix their plans.
 """
 __author__ = "Konstantin Klementiev"
-__date__ = "28 Apr 2024"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 import sys
@@ -18,6 +27,7 @@ import os
 import numpy as np
 
 import traceback
+import hashlib
 # import types
 if sys.version_info < (3, 1):
     from inspect import getargspec
@@ -30,14 +40,32 @@ else:
 
 
 import time
-import multiprocessing
 import threading
-import errno
+import multiprocessing
+from functools import partial
+from collections import OrderedDict
 
 from . import singletons as csi
 from . import commons as cco
 from .logger import logger, syslogger
 from .config import configTransforms
+from .workers import (get_pool, get_pool_size, get_remote_pool, get_epoch,
+                      is_cancelled, Progress)
+from .pipeline import PipelinedRun
+from . import profiling as cpr
+from . import autotune as cat
+from . import progress as cpg
+from . import memory as cme
+from . import chunked as cch
+
+_planState = threading.local()  # .plan: the ExecutionPlan being executed
+
+
+def get_active_plan():
+    """Returns the :class:`ExecutionPlan` executed in the calling thread or
+    None."""
+    return getattr(_planState, 'plan', None)
+
 
 # class Param(object):
 #     def __init__(self, value, limits=[], step=None):
@@ -82,11 +110,80 @@ class Transform(object):
     lists *inArrays* and *outArrays* must be defined to send the operational
     arrays (those used in :meth:`run_main`) over process-shared queues. The
     value can be an integer, 'all' or 'half' or 'quarter' which refer to the
-    hardware limit `multiprocessing.cpu_count()`.
+    hardware limit `multiprocessing.cpu_count()`. The threads and processes
+    are not created per data item but are taken from session-wide worker pools
+    (see :mod:`.workers`) that are reused by all transforms and fits. If
+    remote worker daemons are set (see :mod:`.remote`), the transforms with
+    *nProcesses* > 1 send their data items to them instead of local processes.
+    Either value can also be 'auto': the transform then chooses at each run
+    between serial execution and the pool(s) set to 'auto', and the number of
+    workers, by the per-item cost measured in its recent runs (see
+    :mod:`.autotune`).
+
+    *useSharedMemory*, bool, default True, and *sharedMemoryMinSize*, int,
+    default 1 MB: with multiprocessing, the arrays in *inArrays* and
+    *outArrays* larger than *sharedMemoryMinSize* bytes are passed via shared
+    memory instead of being pickled (see :mod:`.sharedmem`).
+
+    The output arrays are converted to the *dtype* of their arrays in
+    `toNode`, if defined (see :class:`.Node`); in worker processes this is
+    done before sending them back.
 
     *progressTimeDelta*, float, default 1.0 sec, a timeout delta to report on
     transformation progress. Only needed if :meth:`run_main` is defined with
-    a parameter *progress*.
+    a parameter *progress*. The progress of all data items of a run is
+    reported in batches by one aggregator thread (see :mod:`.progress`).
+
+    The wall, queue and transfer times of every transformed data item are
+    recorded and the profiling of :meth:`run_main` can be switched on at run
+    time, see :mod:`.profiling`.
+
+    *timeout*, float, default None, the maximal time in seconds of
+    transforming one data item in a worker pool. A data item that takes
+    longer is marked as bad and its worker is replaced (see :mod:`.workers`).
+    Without a pool, a transformation cannot be interrupted from outside and
+    *timeout* is not applied.
+
+    *skipUnchanged*, bool, default False. If True, a data item is not
+    transformed again if its input arrays and transformation parameters have
+    not changed since the last successful transformation. The comparison is
+    done by a fingerprint: a hash of the arrays listed in *inArrays* (or, if
+    this list is empty, of all the arrays of `fromNode`) and of the values of
+    the parameters in *defaultParams* plus the corrections at `toNode`. Only
+    switch it on if :meth:`run_main` depends on nothing else, in particular it
+    is never applied to transforms that use *allData*.
+
+    *useDiskCache*, bool, default False, and *cacheVersion*, any repr-able
+    value, default 0: if True and a disk cache is opened, the results of
+    :meth:`run_main` are stored in and restored from the cache by the same
+    fingerprint as above (see :mod:`.diskcache`). The outputs are the
+    attributes in *outArrays* or, if this list is empty, all the arrays of
+    `toNode`; arrays are stored as such, other values (scalars etc.) and the
+    dict returned by :meth:`run_main`, if any, are pickled.
+    Change *cacheVersion* whenever the transformation algorithm changes.
+
+    *chunkAxis*, int, default None, and *chunkLength*, int, default None: a
+    transform that works frame by frame (or by blocks of frames) along
+    *chunkAxis* of its *inArrays* can declare this axis. Its
+    :meth:`run_main` is then called per chunk of *chunkLength* frames (or, if
+    None, of a size set in :mod:`.chunked`) with the slices of *inArrays* as
+    attributes of *data*, and the output chunks are written into
+    preallocated, possibly memory mapped, arrays. The input arrays may be
+    lazy hdf5 datasets that are never read in full. The chunked transforms
+    run in the calling thread, without worker pools and batches.
+
+    Optionally, a static or class method `run_main_batch(cls, batch)` can be
+    defined to transform several data items at once with whole-array
+    operations. If it is defined and *inArrays* is not empty, the data items
+    whose *inArrays* have equal shapes are grouped, and the method is called
+    once per group of two or more items; the other items go to
+    :meth:`run_main` as usual. *batch* is an instance of :class:`DataBatch`
+    that has the stacked input arrays as attributes, with the first dimension
+    running over the data items. The method must set the stacked output
+    arrays (those in *outArrays* or, if this list is empty, the arrays of
+    `toNode`) as attributes of *batch*. It returns True when successful or a
+    sequence of per-item return values of the same meaning as those of
+    :meth:`run_main`.
 
     *dontSaveParamsWhenUnused*, dict, is a class variable that optionally
     defines transformation parameters to be removed from saved project files if
@@ -101,6 +198,15 @@ class Transform(object):
     inArrays = []
     outArrays = []
     progressTimeDelta = 1.0  # sec
+    timeout = None  # sec
+    useSharedMemory = True
+    sharedMemoryMinSize = 2**20  # bytes
+    skipUnchanged = False
+    useDiskCache = False
+    cacheVersion = 0
+    chunkAxis = None
+    chunkLength = None
+    run_main_batch = None
     dontSaveParamsWhenUnused = dict()  # paramName=paramUsed
 
     def __init__(self, fromNode, toNode):
@@ -133,6 +239,8 @@ class Transform(object):
         if self not in toNode.transformsIn:
             toNode.transformsIn.append(self)
         self.sendSignals = False
+        self.startEpoch = None  # cancellation epoch of the current run
+        self.costModel = cat.CostModel()  # for nThreads/nProcesses = 'auto'
         self.read_ini_params()
 
         if fromNode is toNode:
@@ -193,72 +301,315 @@ class Transform(object):
         # data = csi.selectedItems[0]
         # dtparams = data.transformParams
 
-    def _get_progress1(self, alias, progress):
+    def _get_progressN(self, alias, value=1.0):
         if not hasattr(self.toNode, 'widget'):
             return
         if self.toNode.widget is None:
             return
-        self.toNode.widget.tree.transformProgress.emit([alias, progress.value])
+        self.toNode.widget.tree.transformProgress.emit([alias, value])
 
-    def _get_progressN(self, alias, worker=None):
+    def _get_progress_batch(self, values):
         if not hasattr(self.toNode, 'widget'):
             return
         if self.toNode.widget is None:
             return
-        if worker is None:
-            self.toNode.widget.tree.transformProgress.emit([alias, 1.0])
+        self.toNode.widget.tree.transformProgressBatch.emit(values)
+
+    def _make_progress_board(self, items, args, pool=None, options=None):
+        """Returns a :class:`.progress.ProgressBoard` of *items* or None if
+        the progress is not reported. For a pool, sets *options* for the
+        workers."""
+        if 'progress' not in args or not self.sendSignals:
+            return
+        board = cpg.make_board(items, self._get_progress_batch,
+                               self.progressTimeDelta, pool)
+        if options is not None:
+            if board is None:
+                options['progressMessages'] = True
+            else:
+                options['progressBoard'] = board.desc
+        return board
+
+    def _put_in_data(self, pool, options, runId, index, item):
+        if not pool.put_in_data(
+                runId, index, item, self.__class__.run_main, self.name,
+                self.inArrays, self.outArrays,
+                inFields=('transformParams', 'alias'),
+                outFields=('transformParams',), options=options):
+            item.state[self.toNode.name] = cco.DATA_STATE_BAD
+            item.beingTransformed = False
+            return False
+        item.beingTransformed = self.name
+        item.transfortm_t0 = time.time()
+        return True
+
+    def _hash_arrays(self, data):
+        fingerprint = hashlib.sha1()
+        for key in self.inArrays if self.inArrays else self.fromNode.arrays:
+            arr = cch.get_input(data, key)
+            if isinstance(arr, cch.LazyArray):  # by reference, not read
+                fingerprint.update(repr((key, arr.url, arr.shape, arr.mtime))
+                                   .encode())
+            elif isinstance(arr, np.ndarray):
+                fingerprint.update(repr((key, arr.shape, arr.dtype.str))
+                                   .encode())
+                fingerprint.update(np.ascontiguousarray(arr).data)
+            else:
+                fingerprint.update(repr((key, arr)).encode())
+        return fingerprint.hexdigest()
+
+    def _hash_params(self, data):
+        keys = sorted(self.defaultParams) + ['correction_' + self.toNode.name]
+        fingerprint = hashlib.sha1(repr(
+            [(key, data.transformParams.get(key)) for key in keys]).encode())
+        return fingerprint.hexdigest()
+
+    def get_fingerprint(self, data, arraysHash=None):
+        """Returns a tuple of the hashes of the input arrays and of the
+        transformation parameters of *data*."""
+        if arraysHash is None:
+            arraysHash = self._hash_arrays(data)
+        return arraysHash, self._hash_params(data)
+
+    def _uses_disk_cache(self):
+        return self.useDiskCache and csi.diskCache is not None
+
+    def _is_unchanged(self, data, args):
+        """Tells whether *data* can skip this transform. Otherwise stores the
+        fingerprint of *data* to be used in :meth:`_store_fingerprint`."""
+        if not (self.skipUnchanged or self._uses_disk_cache()) or \
+                'allData' in args:
+            return False
+        fingerprint = self.get_fingerprint(data)
+        if self.skipUnchanged and \
+                data.state[self.toNode.name] == cco.DATA_STATE_GOOD and \
+                data.fingerprints.get(self.name) == fingerprint:
+            return True
+        data.transfortmFingerprint = fingerprint
+        return False
+
+    def _store_fingerprint(self, data, res=None):
+        fingerprint = getattr(data, 'transfortmFingerprint', None)
+        if fingerprint is None:
+            return
+        del data.transfortmFingerprint
+        if data.state[self.toNode.name] != cco.DATA_STATE_GOOD:
+            data.fingerprints.pop(self.name, None)
+            return
+        if self._uses_disk_cache():
+            self._put_to_cache(data, fingerprint, res)
+        if self.skipUnchanged:  # after run_main, params may have changed
+            data.fingerprints[self.name] = self.get_fingerprint(
+                data, fingerprint[0])
+
+    def _get_cache_key(self, fingerprint):
+        return csi.diskCache.make_key(
+            self.name, self.cacheVersion, csi.pipelineName, csi.appVersion,
+            fingerprint)
+
+    def _get_out_keys(self):
+        return self.outArrays if self.outArrays else self.toNode.arrays
+
+    def _put_to_cache(self, data, fingerprint, res=None):
+        entry = {}
+        for key in self._get_out_keys():
+            if not hasattr(data, key):
+                continue
+            val = getattr(data, key)
+            if isinstance(val, np.ndarray) and not val.dtype.hasobject:
+                entry['array.' + key] = val
+            else:  # scalars and other objects, pickled
+                entry['value.' + key] = np.array([val], dtype=object)
+        if isinstance(res, dict):  # the fields set by the dict return
+            entry['result'] = np.array([res], dtype=object)
+        params = dict((key, data.transformParams[key])
+                      for key in self.defaultParams
+                      if key in data.transformParams)
+        entry['params'] = np.array([params], dtype=object)
+        entry['state'] = np.array(data.state[self.toNode.name])
+        csi.diskCache.put(self._get_cache_key(fingerprint), entry)
+
+    def _get_from_cache(self, data):
+        """On a cache hit, sets the output arrays and values, the fields of a
+        dict returned by :meth:`run_main`, the transformation parameters and
+        the state of *data* and returns True."""
+        fingerprint = getattr(data, 'transfortmFingerprint', None)
+        if fingerprint is None or not self._uses_disk_cache():
+            return False
+        entry = csi.diskCache.get(self._get_cache_key(fingerprint))
+        if entry is None:
+            return False
+        for key in entry:
+            if key.startswith('array.'):
+                setattr(data, key[len('array.'):], entry[key])
+            elif key.startswith('value.'):
+                setattr(data, key[len('value.'):], entry[key][0])
+        if 'result' in entry:
+            res = entry['result'][0]
+            for field in res:
+                setattr(self, field, res[field])
+        data.transformParams.update(entry['params'][0])
+        data.state[self.toNode.name] = int(entry['state'])
+        data.error = None
+        del data.transfortmFingerprint
+        if self.skipUnchanged:
+            data.fingerprints[self.name] = self.get_fingerprint(
+                data, fingerprint[0])
+        return True
+
+    def _is_batched(self, args):
+        return self.run_main_batch is not None and len(self.inArrays) > 0 \
+            and 'allData' not in args and self.chunkAxis is None
+
+    def _run_batches(self, items):
+        """Groups *items* by the shapes of their *inArrays* and runs
+        :meth:`run_main_batch` for the groups of more than one item. Returns
+        the remaining items."""
+        groups = OrderedDict()
+        for data in items:
+            shapes = tuple(getattr(getattr(data, key, None), 'shape', None)
+                           for key in self.inArrays)
+            groups.setdefault(shapes, []).append(data)
+        rest = []
+        for group in groups.values():
+            if len(group) > 1:
+                self._run_batch(group)
+            else:
+                rest.extend(group)
+        return rest
+
+    @logger(minLevel=20, attrs=[(0, 'name')])
+    def _run_batch(self, dataList):
+        t0 = time.time()
+        for data in dataList:
+            data.beingTransformed = self.name
+        syslogger.info('run "{0}" for a batch of {1} items'.format(
+            self.name, len(dataList)))
+        errorMsg = None
+        try:
+            batch = DataBatch(dataList, self.inArrays)
+            if cpr.is_profiled(self.name):
+                res, profile = cpr.run_profiled(self.run_main_batch, batch)
+                cpr.add_profile(self.name, profile)
+            else:
+                res = self.run_main_batch(batch)
+            batch.unstack(self.outArrays if self.outArrays else
+                          self.toNode.arrays)
+        except Exception:
+            res = None
+            errorMsg = 'failed "{0}" transform for data: {1}'.format(
+                self.name, ', '.join(data.alias for data in dataList))
+            errorMsg += "\nwith the following traceback:\n"
+            tb = traceback.format_exc()
+            errorMsg += "".join(tb[:-1])  # remove last empty line
+            syslogger.log(100, errorMsg)
+        if not isinstance(res, (list, tuple, np.ndarray)):
+            res = [res] * len(dataList)
+        dt = (time.time() - t0) / len(dataList)
+        for data, resData in zip(dataList, res):
+            data.error = errorMsg
+            if resData is None:
+                data.state[self.toNode.name] = cco.DATA_STATE_BAD
+            elif isinstance(resData, (bool, np.bool_)):
+                data.state[self.toNode.name] = cco.DATA_STATE_GOOD \
+                    if resData else cco.DATA_STATE_BAD
+            elif isinstance(resData, (int, np.integer)):
+                data.state[self.toNode.name] = int(resData)
+            data.beingTransformed = False
+            data.transfortmTimes[self.name] = dt
+            cpr.add_record(name=self.name, kind='transform', alias=data.alias,
+                           worker='batch', start=t0, wall=dt,
+                           state=data.state[self.toNode.name])
+            self._store_fingerprint(data)
+
+    def _get_own_out_keys(self):
+        ownKeys = self.toNode.get_own_arrays()
+        return [key for key in self._get_out_keys() if key in ownKeys]
+
+    def _get_options(self):
+        return dict(kind='transform', progressTimeDelta=self.progressTimeDelta,
+                    sharedMemoryMinSize=self.sharedMemoryMinSize
+                    if self.useSharedMemory else None,
+                    startEpoch=self.startEpoch,
+                    profile=cpr.is_profiled(self.name),
+                    outDtypes=self.toNode.get_dtypes(
+                        self._get_own_out_keys()))
+
+    def _set_cancelled(self, data):
+        data.state[self.toNode.name] = cco.DATA_STATE_BAD
+        data.error = 'Cancelled "{0}" transform for data: {1}'.format(
+            self.name, data.alias)
+        data.beingTransformed = False
+
+    def _get_results(self, pool, item, msg):
+        outDict, res, item.error = msg[3:6]
+        tGet = time.time()
+        pool.get_out_data(item, outDict)
+        tGet = time.time() - tGet
+        if res is None:
+            item.state[self.toNode.name] = cco.DATA_STATE_BAD
+        elif isinstance(res, dict):
+            for field in res:
+                setattr(self, field, res[field])
+            item.state[self.toNode.name] = cco.DATA_STATE_GOOD
+        elif isinstance(res, bool):
+            item.state[self.toNode.name] = cco.DATA_STATE_GOOD\
+                if res else cco.DATA_STATE_BAD
+        elif isinstance(res, int):
+            item.state[self.toNode.name] = res
+        # timed only if the task has run in a worker (the message has the
+        # worker info), not if it was cancelled before submission or start:
+        if getattr(item, 'transfortm_t0', None) is not None and len(msg) > 6:
+            item.transfortmTimes[self.name] = \
+                time.time() - item.transfortm_t0
         else:
-            ps = worker.get_progress()
-            if len(ps) == 0:
-                return
-            self.toNode.widget.tree.transformProgress.emit([alias, ps[-1]])
+            item.transfortmTimes.pop(self.name, None)
+        item.transfortm_t0 = None
+        submitted = pool.pop_submitted(msg[1], msg[2])
+        info = msg[6] if len(msg) > 6 else None
+        cpr.add_pool_record(
+            self.name, 'transform', item.alias, item.state[self.toNode.name],
+            submitted, info, tGet)
+        if self._is_auto() and info and res is not None:
+            self.costModel.add_task(pool.workerType, info)
+            if pool.workerType == 'process' and submitted:
+                self.costModel.add_transfer(
+                    submitted[1] + info['transfer'] + tGet,
+                    submitted[2] + info['nBytes'])
+        item.beingTransformed = False
+        self._store_fingerprint(item, res)
 
     @logger(minLevel=20, attrs=[(0, 'name')])
-    def _run_multi_worker(self, workers, workedItems, args):
-        wt = workers[0].workerType
+    def _run_multi_worker(self, pool, workedItems, args, nWorkers):
         syslogger.info(
-            'run "{0}" in {1} {2}{3}'.format(
-                self.name, len(workers), wt, '' if len(workers) == 1 else 's'))
+            'run "{0}" for {1} item{2} in {3} {4}{5}'.format(
+                self.name, len(workedItems),
+                '' if len(workedItems) == 1 else 's', nWorkers,
+                pool.workerType, '' if nWorkers == 1 else 's'))
         # if self.sendSignals:
         #     csi.mainWindow.beforeDataTransformSignal.emit(workedItems)
 
-        for worker, item in zip(workers, workedItems):
-            if 'progress' in args and self.sendSignals:
-                worker.timer = NTimer(
-                    self.progressTimeDelta,
-                    self._get_progressN, [item.alias, worker])
-                worker.timer.start()
-            if not worker.put_in_data(item):
-                item.state[self.toNode.name] = cco.DATA_STATE_BAD
-                item.beingTransformed = False
-                continue
-            else:
-                item.beingTransformed = self.name
-            item.transfortm_t0 = time.time()
-            worker.start()
-
-        for worker, item in zip(workers, workedItems):
-            if not item.beingTransformed:
-                continue
-            worker.get_out_data(item)
-            res = worker.get_results(self)
-            if isinstance(res, bool):
-                item.state[self.toNode.name] = cco.DATA_STATE_GOOD\
-                    if res else cco.DATA_STATE_BAD
-            elif isinstance(res, int):
-                item.state[self.toNode.name] = res
-            item.error = worker.get_error()
-            item.transfortmTimes[self.name] = time.time() - item.transfortm_t0
-
-        for worker, item in zip(workers, workedItems):
-            if 'progress' in args and self.sendSignals:
-                worker.timer.cancel()
-            if not item.beingTransformed:
-                continue
-            worker.join(60.)
-            item.beingTransformed = False
-            if 'progress' in args and self.sendSignals:
-                self._get_progressN(item.alias)
+        options = self._get_options()
+        board = self._make_progress_board(workedItems, args, pool, options)
+        for item in workedItems:
+            item.transfortm_t0 = None  # set at submission
+        put_in = partial(self._put_in_data, pool, options)
+        try:
+            for msg in pool.dispatch(workedItems, put_in, nWorkers,
+                                     self.timeout, options['startEpoch']):
+                item = workedItems[msg[2]]
+                if msg[0] == 'progress':  # only without a board
+                    if 'progress' in args and self.sendSignals:
+                        self._get_progressN(item.alias, msg[3])
+                    continue
+                self._get_results(pool, item, msg)
+                if board is not None:
+                    board.values[msg[2]] = 1.
+                elif 'progress' in args and self.sendSignals:
+                    self._get_progressN(item.alias)
+        finally:
+            if board is not None:
+                board.close()
 
         # if self.sendSignals:
         #     csi.mainWindow.afterDataTransformSignal.emit(workedItems)
@@ -270,30 +621,30 @@ class Transform(object):
         # if self.sendSignals:
         #     csi.mainWindow.beforeDataTransformSignal.emit([data])
         syslogger.info('run "{0}" for {1}'.format(self.name, data.alias))
+        board = self._make_progress_board([data], args)
         try:
             argVals = [data]
             if 'allData' in args:
                 allData = csi.allLoadedItems
                 argVals.append(allData)
             if 'progress' in args:
-                progress = DataProxy()
-                progress.value = 1.
+                progress = Progress(self.startEpoch, None if board is None
+                                    else board.values)
                 argVals.append(progress)
-                timer = NTimer(self.progressTimeDelta, self._get_progress1,
-                               [data.alias, progress])
-                timer.start()
+            runMain = self.run_main
+            if self.chunkAxis is not None:
+                chunkedRun = cch.ChunkedRun(self, data)
+                if chunkedRun.is_needed():
+                    runMain = chunkedRun.run
+            if cpr.is_profiled(self.name):
+                res, profile = cpr.run_profiled(runMain, *argVals)
+                cpr.add_profile(self.name, profile)
             else:
-                timer = None
-            res = self.run_main(*argVals)
-            if timer is not None:
-                timer.cancel()
+                res = runMain(*argVals)
             data.error = None
             if 'progress' in args:
                 progress.value = 1.
-                self._get_progress1(data.alias, progress)
         except Exception:
-            if timer is not None:
-                timer.cancel()
             res = None
             errorMsg = 'failed "{0}" transform for data: {1}'.format(
                 self.name, data.alias)
@@ -302,11 +653,14 @@ class Transform(object):
             errorMsg += "".join(tb[:-1])  # remove last empty line
             syslogger.log(100, errorMsg)
             data.error = errorMsg
+        if board is not None:
+            board.close()
         if res is None:
             data.state[self.toNode.name] = cco.DATA_STATE_BAD
         elif isinstance(res, dict):
             for field in res:
                 setattr(self, field, res[field])
+            data.state[self.toNode.name] = cco.DATA_STATE_GOOD
         elif isinstance(res, bool):
             data.state[self.toNode.name] = cco.DATA_STATE_GOOD \
                 if res is not None else cco.DATA_STATE_BAD
@@ -314,16 +668,40 @@ class Transform(object):
             data.state[self.toNode.name] = res
         data.beingTransformed = False
         data.transfortmTimes[self.name] = time.time() - data.transfortm_t0
+        if self._is_auto() and res is not None:
+            self.costModel.add_serial(data.transfortmTimes[self.name])
+        cpr.add_record(name=self.name, kind='transform', alias=data.alias,
+                       worker='main', start=data.transfortm_t0,
+                       wall=data.transfortmTimes[self.name],
+                       state=data.state[self.toNode.name])
+        self._store_fingerprint(data, res)
         # if self.sendSignals:
         #     csi.mainWindow.afterDataTransformSignal.emit([data])
 
-    @logger(minLevel=20, attrs=[(0, 'name')])
-    def run(self, params={}, updateUndo=True, runDownstream=True,
-            dataItems=None):
-        np.seterr(all='raise')
-        items = dataItems if dataItems is not None else csi.selectedItems
-        self.run_pre(params, items, updateUndo)
-
+    def _is_auto(self):
+        return self.nThreads == 'auto' or self.nProcesses == 'auto'
+
+    def _get_auto_pool(self, nItems, items):
+        if 'allData' in self._get_args(None):
+            return None, 1
+        modes = [mode for mode, n in (('thread', self.nThreads),
+                                      ('process', self.nProcesses))
+                 if n == 'auto']
+        mode, nWorkers = self.costModel.choose(
+            modes, nItems, cat.get_nbytes(items, self.inArrays),
+            dict((mode, get_pool_size(mode)) for mode in modes))
+        if mode == 'serial':
+            return None, 1
+        return get_pool(mode, nWorkers), nWorkers
+
+    def _get_pool(self, nItems, items=()):
+        """Returns a tuple (pool, nWorkers); pool is None if the items are to
+        be transformed one by one in the calling thread. *items* serve the
+        'auto' mode to estimate the transfer size."""
+        if self.chunkAxis is not None:
+            return None, 1
+        if self._is_auto():
+            return self._get_auto_pool(nItems, items)
         nC = multiprocessing.cpu_count()
         if isinstance(self.nThreads, str):
             self.nThreads = max(nC//2, 1) if self.nThreads.startswith('h')\
@@ -332,19 +710,19 @@ class Transform(object):
             self.nProcesses = max(nC//2, 1) if self.nProcesses.startswith('h')\
                 else max(nC//4, 1) if self.nProcesses.startswith('q') else nC
 
-        workerClass = None
-        if len(items) > 1:
+        if nItems > 1:
             if self.nThreads > 1:
-                workerClass = BackendThread
-                cpus = self.nThreads
+                return get_pool('thread', self.nThreads), self.nThreads
             elif self.nProcesses > 1:
-                workerClass = BackendProcess
-                cpus = self.nProcesses
-            if workerClass is not None:
-                workers, workedItems = [], []
+                pool = get_remote_pool()
+                if pool is not None:
+                    return pool, len(pool.workers)
+                return get_pool('process', self.nProcesses), self.nProcesses
+        return None, 1
 
+    def _get_args(self, pool):
         args = getargspec(self.__class__.run_main)[0]
-        if 'allData' in args and workerClass is not None:
+        if 'allData' in args and pool is not None:
             raise SyntaxError(
                 'IMPORTANT: remove "allData" when running in multithreading'
                 ' or multiprocessing!')
@@ -352,71 +730,130 @@ class Transform(object):
             raise SyntaxError(
                 'IMPORTANT: remove "self" from "run_main()" parameters as'
                 ' this is a static method, not an instance method!')
+        return args
+
+    def _is_to_be_transformed(self, data):
+        """Checks the state of *data* at `fromNode` and whether this transform
+        belongs to the transforms of *data*. Sets the state at `toNode` for
+        the rejected data."""
+        # if (not self.isHeadTransform and
+        #         data.state[self.fromNode.name] == cco.DATA_STATE_BAD):
+        if data.state[self.fromNode.name] == cco.DATA_STATE_BAD:
+            data.state[self.toNode.name] = cco.DATA_STATE_BAD
+            syslogger.error('bad data {0} at {1}'.format(
+                data.alias, self.fromNode.name))
+            return False
+        elif data.state[self.fromNode.name] == cco.DATA_STATE_NOTFOUND:
+            syslogger.error('data {0} not found'.format(data.alias))
+            return False
+
+        if data.transformNames == 'each':
+            if not (self.fromNode.is_between_nodes(
+                        data.originNodeName, data.terminalNodeName) and
+                    self.toNode.is_between_nodes(
+                        data.originNodeName, data.terminalNodeName)):
+                if data.dataType != cco.DATA_COMBINATION:
+                    data.state[self.toNode.name] = cco.DATA_STATE_UNDEFINED
+                syslogger.info(
+                    data.alias, 'not between "{0}" and "{1}"'.format(
+                        self.fromNode.name, self.toNode.name))
+                return False
+            # if not data.state[self.fromNode.name] == cco.DATA_STATE_GOOD:
+            #     return False
+        elif isinstance(data.transformNames, (tuple, list)):
+            if self.name not in data.transformNames:
+                if data.dataType != cco.DATA_COMBINATION:
+                    data.state[self.toNode.name] = cco.DATA_STATE_UNDEFINED
+                syslogger.info(
+                    data.alias, 'not between "{0}" and "{1}"'.format(
+                        self.fromNode.name, self.toNode.name))
+                return False
+        else:
+            raise ValueError('unknown `transformNames`="{0}" for "{1}"'
+                             .format(data.transformNames, data.alias))
+        return True
+
+    @logger(minLevel=20, attrs=[(0, 'name')])
+    def run(self, params={}, updateUndo=True, runDownstream=True,
+            dataItems=None, startEpoch=None, isKept=None):
+        """*startEpoch* is the cancellation epoch of the run that has
+        initiated this one, e.g. of an :class:`ExecutionPlan`, so that
+        :func:`.workers.cancel_runs` stops all its transforms; by default,
+        the current epoch. *isKept* is passed to
+        :func:`.memory.enforce_budget` to protect the arrays still needed by
+        the initiating run."""
+        items = dataItems if dataItems is not None else csi.selectedItems
+        if runDownstream and csi.runPipelined and any(
+                tr is not self for tr in self.toNode.transformsOut):
+            return PipelinedRun(self, items).run(
+                params, updateUndo, startEpoch)
+
+        np.seterr(all='raise')
+        self.run_pre(params, items, updateUndo, startEpoch)
+        args = self._get_args(None)
+        workedItems, skippedItems, cachedItems = [], [], []
 
         if self.sendSignals:
             csi.mainWindow.beforeDataTransformSignal.emit(items)
         for data in items:
-            # if (not self.isHeadTransform and
-            #         data.state[self.fromNode.name] == cco.DATA_STATE_BAD):
-            if data.state[self.fromNode.name] == cco.DATA_STATE_BAD:
-                data.state[self.toNode.name] = cco.DATA_STATE_BAD
-                syslogger.error('bad data {0} at {1}'.format(
-                    data.alias, self.fromNode.name))
+            if not self._is_to_be_transformed(data):
                 continue
-            elif data.state[self.fromNode.name] == cco.DATA_STATE_NOTFOUND:
-                syslogger.error('data {0} not found'.format(data.alias))
+            if self._is_unchanged(data, args):
+                skippedItems.append(data)
                 continue
-
-            if data.transformNames == 'each':
-                if not (self.fromNode.is_between_nodes(
-                            data.originNodeName, data.terminalNodeName) and
-                        self.toNode.is_between_nodes(
-                            data.originNodeName, data.terminalNodeName)):
-                    if data.dataType != cco.DATA_COMBINATION:
-                        data.state[self.toNode.name] = cco.DATA_STATE_UNDEFINED
-                    syslogger.info(
-                        data.alias, 'not between "{0}" and "{1}"'.format(
-                            self.fromNode.name, self.toNode.name))
-                    continue
-                # if not data.state[self.fromNode.name] == cco.DATA_STATE_GOOD:
-                #     continue
-            elif isinstance(data.transformNames, (tuple, list)):
-                if self.name not in data.transformNames:
-                    if data.dataType != cco.DATA_COMBINATION:
-                        data.state[self.toNode.name] = cco.DATA_STATE_UNDEFINED
-                    syslogger.info(
-                        data.alias, 'not between "{0}" and "{1}"'.format(
-                            self.fromNode.name, self.toNode.name))
+            if self._get_from_cache(data):
+                cachedItems.append(data)
+                continue
+            workedItems.append(data)
+        if self._is_batched(args):
+            workedItems = self._run_batches(workedItems)
+        pool, cpus = self._get_pool(len(workedItems), workedItems)
+        self._get_args(pool)  # checks allData
+        if pool is None:  # no multipro
+            for i, data in enumerate(workedItems):
+                if is_cancelled(self.startEpoch):
+                    self._set_cancelled(data)
                     continue
-            else:
-                raise ValueError('unknown `transformNames`="{0}" for "{1}"'
-                                 .format(data.transformNames, data.alias))
-
-            if workerClass is not None:  # with multipro
-                worker = workerClass(
-                    self.__class__.run_main, self.__class__.name,
-                    self.inArrays, self.outArrays, self.progressTimeDelta)
-                workers.append(worker)
-                workedItems.append(data)
-                if len(workers) == cpus:
-                    self._run_multi_worker(workers, workedItems, args)
-                    workers, workedItems = [], []
-            else:  # no multipro
                 self._run_single_worker(data, args)
-        if workerClass is not None:  # with multipro on remaining workedItems
-            if len(workers) > 0:
-                self._run_multi_worker(workers, workedItems, args)
+                if self._is_auto():  # the cost may have changed
+                    rest = workedItems[i+1:]
+                    pool, cpus = self._get_pool(len(rest), rest)
+                    if pool is not None:
+                        workedItems = rest
+                        break
+        if pool is not None and len(workedItems) > 0:  # with multipro
+            t0 = time.time()
+            self._run_multi_worker(pool, workedItems, args, cpus)
+            if self._is_auto():
+                self.costModel.add_run(pool.workerType, len(workedItems),
+                                       cpus, time.time() - t0)
 
         if self.sendSignals:
             csi.mainWindow.afterDataTransformSignal.emit(items)
+        if skippedItems:
+            syslogger.info('"{0}" skipped {1} unchanged item{2}'.format(
+                self.name, len(skippedItems),
+                '' if len(skippedItems) == 1 else 's'))
+        if cachedItems:
+            syslogger.info('"{0}" took {1} item{2} from disk cache'.format(
+                self.name, len(cachedItems),
+                '' if len(cachedItems) == 1 else 's'))
         postItems = [it for it in items
                      if it.state[self.toNode.name] == cco.DATA_STATE_GOOD]
-        self.run_post(postItems, runDownstream)
+        if is_cancelled(self.startEpoch):
+            syslogger.info('"{0}" cancelled'.format(self.name))
+            runDownstream = False
+        self.run_post(postItems, runDownstream, skippedItems)
+        if get_active_plan() is None:
+            cme.enforce_budget(isKept)
         np.seterr(all='warn')
 
         return [it for it in items if it.error is not None]  # error items
 
-    def run_pre(self, params={}, dataItems=None, updateUndo=True):
+    def run_pre(self, params={}, dataItems=None, updateUndo=True,
+                startEpoch=None):
+        # see workers.cancel_runs():
+        self.startEpoch = get_epoch() if startEpoch is None else startEpoch
         if params:
             # if updateUndo:
             #     self.push_to_undo_list(params, dataItems)
@@ -459,7 +896,9 @@ class Transform(object):
         :code:`progress.value = 0.5` (means 50% completion). If used with GUI,
         progress will be visualized as an expanding colored background
         rectangle in the data tree. Quick transformations do not need progress
-        reporting.
+        reporting. A heavy transformation should also check the property
+        `progress.isCancelled` and, if it is True, return None to stop early
+        after the user has pressed the Stop button.
 
         Should an error happen during the transformation, the error state will
         be reported in the ParSeq status bar and the traceback will be shown in
@@ -471,9 +910,15 @@ class Transform(object):
         """
         raise NotImplementedError  # must be overridden
 
-    def run_post(self, dataItems, runDownstream=True):
+    def run_post(self, dataItems, runDownstream=True, skippedItems=[]):
+        skippedIds = set(id(data) for data in skippedItems)
+        for data in dataItems:
+            if id(data) not in skippedIds:  # skipped were corrected earlier
+                data.make_corrections(self.toNode)
+        outKeys = self._get_own_out_keys()
         for data in dataItems:
-            data.make_corrections(self.toNode)
+            self.toNode.cast_arrays(data, outKeys)
+        cme.add_items(self.toNode, dataItems)
 
         # do data.calc_combined() if a member of data.combinesTo has
         # its originNode as toNode:
@@ -486,11 +931,12 @@ class Transform(object):
                 if d.originNodeName in [self.toNode.name, self.fromNode.name] \
                         and d not in toBeUpdated:
                     toBeUpdated.append(d)
-        if toBeUpdated:
-            for d in toBeUpdated:
-                d.calc_combined()
-            if d.originNodeName in [self.toNode.name, self.fromNode.name]:
-                self.run(dataItems=toBeUpdated, runDownstream=False)
+        for d in toBeUpdated:
+            d.calc_combined()
+        activePlan = get_active_plan()
+        if toBeUpdated and not runDownstream:
+            self.run(dataItems=toBeUpdated, runDownstream=False,
+                     startEpoch=self.startEpoch)
 
         if self.sendSignals:
             csi.mainWindow.afterTransformSignal.emit(self.toNode.widget)
@@ -499,211 +945,123 @@ class Transform(object):
                 self.toNode.widget.onTransform = False
 
         if runDownstream:
+            plan = activePlan if activePlan is not None else \
+                ExecutionPlan(self.startEpoch)
+            # the recalculated combined items pass this transform again and
+            # then go downstream:
+            plan.add(self, toBeUpdated, again=True)
             for tr in self.toNode.transformsOut:
                 if self is tr:
                     continue
                 newItems = dataItems.copy()
-                newItems += [it for it in toBeUpdated if it not in newItems]
                 # for data in dataItems:
                 #     if data.branch is not None:
                 #         newItems += [it for it in data.branch.get_items()
                 #                      if it not in newItems]
-                tr.run(dataItems=newItems)
-
-
-class GenericProcessOrThread(object):
-    def __init__(self, func, inArrays, outArrays):
-        self.func = func
-        self.inArrays = inArrays
-        self.outArrays = outArrays
-        # self.started_event.clear()
-        # self.finished_event.clear()
-
-    @logger(minLevel=20, attrs=[(0, 'transformName'), (1, 'alias')])
-    def put_in_data(self, item):
-        res = {'transformParams': item.transformParams,
-               'alias': item.alias}
-        for key in self.inArrays:
-            try:
-                # if not hasattr(item, key):
-                #     setattr(item, key, None)
-                res[key] = getattr(item, key)
-            except AttributeError as e:
-                syslogger.error(
-                    'Error in put_in_data() for spectrum {0}:\n{1}'.format(
-                        item.alias, e))
-                # raise e
-                return False
-                # res[key] = None
-        self.inDataQueue.put(res)
-        return True
-
-    @logger(minLevel=20, attrs=[(0, 'transformName')])
-    def get_in_data(self, item):
-        outDict = retry_on_eintr(self.inDataQueue.get)
-        for field in outDict:
-            setattr(item, field, outDict[field])
-
-    @logger(minLevel=20, attrs=[(0, 'transformName'), (1, 'alias')])
-    def put_out_data(self, item):
-        res = {'transformParams': item.transformParams}
-        for key in self.outArrays:
-            try:
-                res[key] = getattr(item, key)
-            except AttributeError:  # arrays can be conditionally missing
-                pass
-        self.outDataQueue.put(res)
-
-    @logger(minLevel=20, attrs=[(0, 'transformName'), (1, 'alias')])
-    def get_out_data(self, item):
-        outDict = retry_on_eintr(self.outDataQueue.get)
-        for field in outDict:
-            setattr(item, field, outDict[field])
-
-    def put_results(self, obj):
-        self.resultQueue.put(obj)
-
-    @logger(minLevel=20, attrs=[(0, 'transformName'), (1, 'name')])
-    def get_results(self, obj):
-        res = retry_on_eintr(self.resultQueue.get)
-        if res is None:
-            return False
-        elif isinstance(res, dict):
-            for field in res:
-                setattr(obj, field, res[field])
-            return True
-        return res
+                plan.add(tr, newItems)
+            if plan is not activePlan:
+                plan.execute()
+
+
+class DataBatch(object):
+    """A group of data items transformed together by
+    :meth:`Transform.run_main_batch`. The attributes *items*, *alias* and
+    *transformParams* are lists over the data items; the attributes named in
+    *inArrays* are the stacked arrays of the items or, if these are not
+    arrays, lists."""
+
+    def __init__(self, items, inArrays):
+        self.items = items
+        self.alias = [data.alias for data in items]
+        self.transformParams = [data.transformParams for data in items]
+        for key in inArrays:
+            vals = [getattr(data, key) for data in items]
+            if isinstance(vals[0], np.ndarray):
+                vals = np.stack(vals)
+            setattr(self, key, vals)
+
+    def __len__(self):
+        return len(self.items)
 
-    def put_error(self, obj):
-        self.errorQueue.put(obj)
-
-    def get_error(self):
-        return retry_on_eintr(self.errorQueue.get)
-
-    def put_progress(self):
-        self.progressQueue.put_nowait(self.progress.value)
+    def __repr__(self):
+        return "DataBatch of {0}".format(', '.join(self.alias))
 
-    def get_progress(self):
-        values = []
-        try:
-            while not self.progressQueue.empty():
-                values.append(retry_on_eintr(self.progressQueue.get_nowait))
-        except Exception:
-            pass
-        return values
+    def get_param(self, key):
+        """Returns an array of the parameter *key* over the data items."""
+        return np.array([params[key] for params in self.transformParams])
 
-    # @logger(minLevel=20, printClass=True)
-    def run(self):
-        # self.started_event.set()
-        np.seterr(all='raise')
-        data = DataProxy()
-        self.get_in_data(data)
+    def unstack(self, outArrays):
+        for key in outArrays:
+            vals = getattr(self, key, None)
+            if vals is None:
+                continue
+            if len(vals) != len(self.items):
+                raise ValueError('the batch array "{0}" must have {1} rows'
+                                 .format(key, len(self.items)))
+            for data, val in zip(self.items, vals):
+                # a row of a stacked array is a view of the whole batch array
+                # that would be kept alive and be counted by each data item:
+                if isinstance(vals, np.ndarray):
+                    val = val.copy()
+                setattr(data, key, val)
+
+
+class ExecutionPlan(object):
+    """Collects the data items to be transformed by each transform and runs
+    every transform once, in the order of `csi.transforms`, i.e. of data flow.
+    While a plan executes in a thread, the downstream runs requested by
+    :meth:`Transform.run_post` in that thread are added to it instead of being
+    run at once, as is the rerun of the recalculated combined items.
+    A (transform, data item) pair is run at most once per plan. After each
+    transform, the memory budget is enforced, except for the input nodes of
+    the pending transforms (see :mod:`.memory`).
+
+    All transforms of the plan run in the cancellation epoch *startEpoch* of
+    the run that has created the plan (by default, the current one). Once
+    the plan is cancelled by :func:`.workers.cancel_runs`, its pending
+    transforms are not run and their data items are marked as cancelled."""
+
+    def __init__(self, startEpoch=None):
+        self.pending = OrderedDict()  # transform: list of data items
+        self.done = set()  # (transform name, id(data item))
+        self.startEpoch = get_epoch() if startEpoch is None else startEpoch
+
+    def add(self, transform, items, again=False):
+        """Adds *items* to the pending items of *transform*. The items already
+        run by *transform* in this plan are skipped unless *again* is True,
+        as for recalculated combined items."""
+        pending = self.pending.setdefault(transform, [])
+        ids = set(id(it) for it in pending)
+        for it in items:
+            if id(it) in ids or \
+                    (not again and (transform.name, id(it)) in self.done):
+                continue
+            pending.append(it)
+            ids.add(id(it))
+        if not pending:
+            del self.pending[transform]
+
+    def pop_next(self):
+        """Returns the most upstream pending transform and its items."""
+        order = list(csi.transforms.values())
+        transform = min(self.pending, key=order.index)
+        return transform, self.pending.pop(transform)
+
+    def execute(self):
+        prevPlan, _planState.plan = get_active_plan(), self
         try:
-            args = getargspec(self.func)[0]
-            if 'progress' in args:
-                self.progress = DataProxy()
-                self.progress.value = 1.
-                timer = NTimer(self.progressTimeDelta, self.put_progress)
-                timer.start()
-                res = self.func(data, self.progress)
-                timer.cancel()
-                self.progress.value = 1.
-                self.put_progress()
-            else:
-                res = self.func(data)
-            self.put_results(res)
-            self.put_error(None)
-        except Exception:
-            self.put_results(None)
-            errorMsg = 'Failed "{0}" transform for data: {1}'.format(
-                self.transformName, data.alias)
-            errorMsg += "\nwith the following traceback:\n"
-            tb = traceback.format_exc()
-            errorMsg += "".join(tb[:-1])  # remove last empty line
-            self.put_error(errorMsg)
-            syslogger.log(100, errorMsg)
+            while self.pending:
+                transform, items = self.pop_next()
+                if is_cancelled(self.startEpoch):
+                    for it in items:
+                        transform._set_cancelled(it)
+                    continue
+                self.done.update((transform.name, id(it)) for it in items)
+                transform.run(dataItems=items, startEpoch=self.startEpoch)
+                inNodes = set(tr.fromNode for tr in self.pending)
+                cme.enforce_budget(lambda data, node: node in inNodes)
         finally:
-            self.put_out_data(data)
-            np.seterr(all='warn')
-        # self.started_event.clear()
-        # self.finished_event.set()
-
-
-def retry_on_eintr(function, *args, **kw):
-    """
-    Suggested in:
-    http://mail.python.org/pipermail/python-list/2011-February/1266462.html
-    as a solution for `IOError: [Errno 4] Interrupted system call` in Linux.
-    """
-    while True:
-        try:
-            return function(*args, **kw)
-        except IOError as e:
-            if e.errno == errno.EINTR:
-                continue
-            else:
-                raise
-
-
-class DataProxy(object):
-    """An empty object to attach fields to it. With a simple instance of
-    object() this is impossible but doable with an empty class."""
-
-    def __repr__(self):
-        return "DataProxy object for '{0}'".format(self.alias)
-
-
-class BackendProcess(GenericProcessOrThread, multiprocessing.Process):
-    def __init__(self, func, transformName, inArrays, outArrays,
-                 progressTimeDelta):
-        multiprocessing.Process.__init__(self)
-        self.transformName = transformName
-        self.progressTimeDelta = progressTimeDelta
-        self.multiName = 'multiprocessing'
-        self.workerType = 'process'
-        self.inDataQueue = multiprocessing.Queue()
-        self.outDataQueue = multiprocessing.Queue()
-        self.resultQueue = multiprocessing.Queue()
-        self.errorQueue = multiprocessing.Queue()
-        # self.started_event = multiprocessing.Event()
-        # self.finished_event = multiprocessing.Event()
-        self.progressQueue = multiprocessing.Queue()
-        sys.path.append(csi.parseqPath)  # to find parseq in multiprocessing
-        GenericProcessOrThread.__init__(self, func, inArrays, outArrays)
-
-    def run(self):
-        sys.path.append(csi.parseqPath)  # to find parseq in multiprocessing
-        GenericProcessOrThread.run(self)
-
-
-class BackendThread(GenericProcessOrThread, threading.Thread):
-    def __init__(self, func, transformName, inArrays, outArrays,
-                 progressTimeDelta):
-        threading.Thread.__init__(self)
-        self.transformName = transformName
-        self.progressTimeDelta = progressTimeDelta
-        self.multiName = 'multithreading'
-        self.workerType = 'thread'
-        if sys.version_info < (3, 1):
-            import Queue
-        else:
-            import queue
-            Queue = queue
-
-        self.inDataQueue = Queue.Queue()
-        self.outDataQueue = Queue.Queue()
-        self.resultQueue = Queue.Queue()
-        self.errorQueue = Queue.Queue()
-        # self.started_event = threading.Event()
-        # self.finished_event = threading.Event()
-        self.progressQueue = Queue.Queue()
-        GenericProcessOrThread.__init__(self, func, inArrays, outArrays)
-
-
-class NTimer(threading.Timer):
-    def run(self):
-        while not self.finished.wait(self.interval):
-            self.function(*self.args, **self.kwargs)
+            _planState.plan = prevPlan
 
 
 def connect_combined(items, parentItem):
@@ -747,6 +1105,7 @@ def run_transforms(items, parentItem, runParallel=True):
         else:
             itemsByOrigin[it.originNodeName].append(it)
 
+    plan = ExecutionPlan()
     for originNodeName, its in itemsByOrigin.items():
         for tr in csi.nodes[originNodeName].transformsOut:
             # first bottomItems, then topItems...:
@@ -759,13 +1118,17 @@ def run_transforms(items, parentItem, runParallel=True):
                 csi.tasker.thread().start()
             else:
                 # if len(itemsByOrigin) > 1, the transforms cannot be
-                # parallelized, so do it in the same thread:
-                tr.run(dataItems=its)
-                if hasattr(tr, 'widget'):  # when with GUI
-                    tr.widget.replotAllDownstream(tr.name)
+                # parallelized, so do it in the same thread, all groups in
+                # one plan to run the common downstream transforms once:
+                plan.add(tr, its)
 
             if tr.fromNode is tr.toNode:
                 break
+    headTransforms = list(plan.pending)
+    plan.execute()
+    for tr in headTransforms:
+        if hasattr(tr, 'widget'):  # when with GUI
+            tr.widget.replotAllDownstream(tr.name)
 
             # # no need for dependentItems, it is invoked in run_post:
             # # ...then dependentItems:
@@ -0,0 +1,788 @@
+# -*- coding: utf-8 -*-
+u"""
+Worker pools
+------------
+
+Transformations and fits that define *nThreads* or *nProcesses* > 1 are
+executed by long-lived workers -- threads or processes -- that are started
+once per session, on the first parallel run, and are reused by all subsequent
+runs of all transformations and fits. This avoids the cost of spawning a new
+process (and of re-importing the pipeline modules) for each data item.
+
+The workers pick tasks from a single task queue. A task contains the function
+to run (:meth:`.Transform.run_main` or :meth:`.Fit.run_main`), the data fields
+listed in *inArrays* plus a few bookkeeping fields and the list of fields to
+send back. The results are put into a common output queue and routed to the
+run that submitted the task. Large arrays travel between the main process and
+process workers in shared memory, see :mod:`.sharedmem`.
+
+A run does not proceed in batches of *nThreads* or *nProcesses* items.
+Instead, it keeps that many tasks in the pool and submits the next pending item
+as soon as any worker becomes idle; the results are collected in the order of
+completion. Thus, a long or failing item does not stall the remaining ones.
+
+Running transformations and fits can be cancelled by :func:`cancel_runs`,
+e.g. by the Stop button of the ParSeq main window. The cancellation is
+cooperative: `run_main` may poll `progress.isCancelled` and return early, the
+not yet started tasks are skipped and, after *cancelGrace* seconds, the still
+running tasks are aborted. A transformation or fit with a *timeout* has each
+of its tasks aborted after that many seconds. An aborted task marks its data
+item as bad. An aborting process worker is terminated and replaced by a new
+one. A thread cannot be stopped from outside; it is left to finish its task
+while a new thread takes its place in the pool.
+
+A third pool type, 'remote', has no local workers but one thread per remote
+worker daemon (see :mod:`.remote`) that sends the tasks to the daemon over TCP
+and receives the results back. The daemons are set by
+:func:`set_remote_workers`; then transforms with *nProcesses* > 1 use the
+remote pool instead of the local process pool. Each thread takes the next task
+from the common task queue as soon as its daemon has finished the previous
+one, so that faster hosts get more tasks. A task lost with a broken connection
+is queued again once. An aborted remote task is terminated by its daemon.
+
+The pools are shut down by :func:`shutdown_pools` that is invoked when the
+ParSeq main window closes and, as a fallback, at interpreter exit.
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys
+import numpy as np
+import traceback
+if sys.version_info < (3, 1):
+    from inspect import getargspec
+    import Queue as queue
+else:
+    from inspect import getfullargspec as getargspec
+    import queue
+
+import atexit
+import itertools
+import multiprocessing
+from multiprocessing.connection import Client, AuthenticationError
+import threading
+import time
+import errno
+
+from . import singletons as csi
+from . import sharedmem as csh
+from . import profiling as cpr
+from . import progress as cpg
+from .nodes import cast_array
+from .logger import syslogger
+
+pools = {}  # workerType: WorkerPool
+poolsLock = threading.Lock()
+cancelEpoch = None  # multiprocessing.Value, incremented by cancel_runs()
+cancelGrace = 2.  # s, time for cancelled tasks to finish by themselves
+checkInterval = 0.1  # s, of checking for cancellation and timeouts
+remoteAddresses = []  # of (host, port) of remote worker daemons
+remoteAuthkey = None  # bytes
+connectTimeout = 10.  # s, to connect to a remote worker daemon
+
+
+def get_cancel_epoch():
+    global cancelEpoch
+    if cancelEpoch is None:
+        cancelEpoch = multiprocessing.Value('i', 0)
+    return cancelEpoch
+
+
+def get_epoch():
+    """Returns the current cancellation epoch. A run that has started in this
+    epoch is cancelled by a later call of :func:`cancel_runs`."""
+    return get_cancel_epoch().value
+
+
+def is_cancelled(startEpoch):
+    return startEpoch is not None and get_cancel_epoch().value > startEpoch
+
+
+def cancel_runs():
+    """Cancels all transformations and fits that are running now."""
+    epoch = get_cancel_epoch()
+    with epoch.get_lock():
+        epoch.value += 1
+    syslogger.info('cancel running transforms and fits')
+
+
+def retry_on_eintr(function, *args, **kw):
+    """
+    Suggested in:
+    http://mail.python.org/pipermail/python-list/2011-February/1266462.html
+    as a solution for `IOError: [Errno 4] Interrupted system call` in Linux.
+    """
+    while True:
+        try:
+            return function(*args, **kw)
+        except IOError as e:
+            if e.errno == errno.EINTR:
+                continue
+            else:
+                raise
+
+
+class DataProxy(object):
+    """An empty object to attach fields to it. With a simple instance of
+    object() this is impossible but doable with an empty class."""
+
+    def __repr__(self):
+        return "DataProxy object for '{0}'".format(self.alias)
+
+
+def get_nbytes(val):
+    """The size of an array or a :class:`.sharedmem.SharedArray`."""
+    if isinstance(val, np.ndarray):
+        return val.nbytes
+    elif isinstance(val, csh.SharedArray):
+        return int(np.prod(val.shape)) * np.dtype(val.dtype).itemsize
+    return 0
+
+
+class NTimer(threading.Timer):
+    def run(self):
+        while not self.finished.wait(self.interval):
+            self.function(*self.args, **self.kwargs)
+
+
+class Progress(object):
+    """The *progress* argument of `run_main`. A heavy transformation sets
+    *value* from 0 to 1 and may poll *isCancelled* to return early. The value
+    is written to the slot *index* of the array *values* of a
+    :class:`.progress.ProgressBoard`, if given."""
+
+    def __init__(self, startEpoch=None, values=None, index=0):
+        self.values = values
+        self.index = index
+        self.value = 0.
+        self.startEpoch = get_epoch() if startEpoch is None else startEpoch
+
+    @property
+    def value(self):
+        return self._value
+
+    @value.setter
+    def value(self, val):
+        self._value = val
+        if self.values is not None:
+            self.values[self.index] = val
+
+    @property
+    def isCancelled(self):
+        return is_cancelled(self.startEpoch)
+
+
+class GenericProcessOrThread(object):
+    """The worker side of a pool: an endless loop over the task queue."""
+
+    def __init__(self, taskQueue, outQueue, workerIndex, epoch):
+        self.taskQueue = taskQueue
+        self.outQueue = outQueue
+        self.workerIndex = workerIndex
+        self.epoch = epoch
+        self.isRetired = False
+
+    def get_in_data(self, item, inDict):
+        for field in inDict:
+            val = inDict[field]
+            if isinstance(val, csh.SharedArray):
+                val = csh.get_array(val, track=False)
+            setattr(item, field, val)
+
+    def put_out_data(self, item, outFields, sharedMemoryMinSize=None,
+                     dtypes={}):
+        toShare = self.workerType == 'process' and csh.canReturn
+        res = {}
+        for key in outFields:
+            try:
+                val = getattr(item, key)
+            except AttributeError:  # arrays can be conditionally missing
+                continue
+            val = cast_array(val, dtypes.get(key))
+            if toShare and csh.is_shareable(val, sharedMemoryMinSize):
+                val, shm = csh.put_array(val, track=False)
+                shm.close()  # the main process will unlink it
+            res[key] = val
+        return res
+
+    def put_progress(self, runId, index, progress):
+        self.outQueue.put(('progress', runId, index, progress.value))
+
+    def run_task(self, task):
+        runId, index, func, name, inDict, outFields, options = task
+        startEpoch = options.get('startEpoch')
+        if is_cancelled(startEpoch):
+            errorMsg = 'Cancelled "{0}" {1} for data: {2}'.format(
+                name, options.get('kind', 'transform'), inDict.get('alias'))
+            self.outQueue.put(('done', runId, index, {}, None, errorMsg))
+            return
+        self.outQueue.put(('started', runId, index, self.workerIndex))
+        tStart = time.time()
+        data = DataProxy()
+        self.get_in_data(data, inDict)
+        tFunc = time.time()
+        timer = None
+        errorMsg = None
+        profile = None
+        try:
+            args = getargspec(func)[0]
+            argVals = [data]
+            if 'allData' in args:
+                argVals.append(options.get('allData'))
+            if 'progress' in args:
+                board = options.get('progressBoard')
+                progress = Progress(startEpoch, None if board is None else
+                                    cpg.get_values(board), index)
+                argVals.append(progress)
+                if options.get('progressMessages'):  # without a board
+                    timer = NTimer(options.get('progressTimeDelta', 1.),
+                                   self.put_progress,
+                                   [runId, index, progress])
+                    timer.start()
+            if options.get('profile'):
+                res, profile = cpr.run_profiled(func, *argVals)
+            else:
+                res = func(*argVals)
+            if 'progress' in args:
+                progress.value = 1.
+            if timer is not None:
+                timer.cancel()
+                self.put_progress(runId, index, progress)
+        except Exception:
+            if timer is not None:
+                timer.cancel()
+            res = None
+            errorMsg = 'Failed "{0}" {1} for data: {2}'.format(
+                name, options.get('kind', 'transform'), data.alias)
+            errorMsg += "\nwith the following traceback:\n"
+            tb = traceback.format_exc()
+            errorMsg += "".join(tb[:-1])  # remove last empty line
+            syslogger.log(100, errorMsg)
+        tOut = time.time()
+        outDict = self.put_out_data(
+            data, outFields, options.get('sharedMemoryMinSize'),
+            options.get('outDtypes', {}))
+        isProcess = self.workerType != 'thread'
+        info = dict(  # see profiling.add_pool_record()
+            worker='{0} {1}'.format(self.workerType, self.workerIndex),
+            tStart=tStart, wall=tOut-tFunc,
+            transfer=tFunc-tStart + time.time()-tOut,
+            nBytes=sum(get_nbytes(v) for v in outDict.values())
+            if isProcess else 0,
+            profile=profile)
+        self.outQueue.put(
+            ('done', runId, index, outDict, res, errorMsg, info))
+
+    def run(self):
+        global cancelEpoch
+        cancelEpoch = self.epoch  # the same object in threads
+        np.seterr(all='raise')
+        while True:
+            task = retry_on_eintr(self.taskQueue.get)
+            if task is None:  # poison pill from WorkerPool.shutdown()
+                break
+            self.run_task(task)
+            if self.isRetired:  # replaced after an aborted task
+                break
+        np.seterr(all='warn')
+
+
+class BackendProcess(GenericProcessOrThread, multiprocessing.Process):
+    def __init__(self, taskQueue, outQueue, workerIndex, epoch):
+        multiprocessing.Process.__init__(self)
+        self.daemon = True
+        self.multiName = 'multiprocessing'
+        self.workerType = 'process'
+        sys.path.append(csi.parseqPath)  # to find parseq in multiprocessing
+        GenericProcessOrThread.__init__(
+            self, taskQueue, outQueue, workerIndex, epoch)
+
+    def run(self):
+        sys.path.append(csi.parseqPath)  # to find parseq in multiprocessing
+        GenericProcessOrThread.run(self)
+
+
+class BackendThread(GenericProcessOrThread, threading.Thread):
+    def __init__(self, taskQueue, outQueue, workerIndex, epoch):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.multiName = 'multithreading'
+        self.workerType = 'thread'
+        GenericProcessOrThread.__init__(
+            self, taskQueue, outQueue, workerIndex, epoch)
+
+
+class BackendRemote(threading.Thread):
+    """A thread in the main process that serves one remote worker daemon: it
+    takes a task from the task queue, sends it over the connection and puts
+    the messages received back to the output queue."""
+
+    def __init__(self, taskQueue, outQueue, workerIndex, epoch, address):
+        threading.Thread.__init__(self)
+        self.daemon = True
+        self.workerType = 'remote'
+        self.taskQueue = taskQueue
+        self.outQueue = outQueue
+        self.workerIndex = workerIndex
+        self.address = address
+        self.isRetired = False
+        self.conn = None
+        self.connected = threading.Event()
+
+    def __repr__(self):
+        return 'remote {0}:{1}'.format(*self.address)
+
+    def retire(self):
+        """Stops waiting for the current task and lets the daemon abort it,
+        so that the daemon is free for a new connection."""
+        self.isRetired = True
+        if self.conn is not None:
+            try:
+                self.conn.send('abort')  # see remote.abortMessage
+            except (OSError, EOFError, ValueError):
+                pass
+            self.conn.close()
+
+    def run(self):
+        try:
+            self.conn = Client(self.address, authkey=remoteAuthkey)
+        except (OSError, EOFError, AuthenticationError) as e:
+            syslogger.error('cannot connect to {0}: {1}'.format(self, e))
+            return
+        finally:
+            self.connected.set()
+        while True:
+            task = retry_on_eintr(self.taskQueue.get)
+            if task is None:  # poison pill from WorkerPool.shutdown()
+                break
+            if not self.run_task(task) or self.isRetired:
+                break
+        try:
+            self.conn.close()
+        except OSError:
+            pass
+
+    def run_task(self, task):
+        """Returns False if the connection is lost."""
+        runId, index, func, name, inDict, outFields, options = task
+        kind = options.get('kind', 'transform')
+        if is_cancelled(options.get('startEpoch')):
+            errorMsg = 'Cancelled "{0}" {1} for data: {2}'.format(
+                name, kind, inDict.get('alias'))
+            self.outQueue.put(('done', runId, index, {}, None, errorMsg))
+            return True
+        remoteOptions = dict(options)
+        remoteOptions.pop('progressBoard', None)
+        try:
+            self.conn.send((runId, index, func, name, inDict, outFields,
+                            remoteOptions))
+        except (OSError, EOFError) as e:
+            return self.lose_task(task, e)
+        except Exception as e:  # not picklable, the connection is intact
+            errorMsg = 'Cannot send "{0}" {1} for data: {2} to {3}: {4}'\
+                .format(name, kind, inDict.get('alias'), self, e)
+            syslogger.error(errorMsg)
+            self.outQueue.put(('done', runId, index, {}, None, errorMsg))
+            return True
+        while True:
+            try:
+                msg = self.conn.recv()
+            except (OSError, EOFError) as e:
+                return self.lose_task(task, e)
+            if msg[0] == 'started':
+                msg = 'started', runId, index, self.workerIndex
+            elif msg[0] == 'failed':  # the daemon could not unpickle the task
+                msg = 'done', runId, index, {}, None, '{0}: {1}'.format(
+                    self, msg[1])
+            elif msg[0] == 'done' and len(msg) > 6:
+                msg[6]['worker'] = repr(self)
+            self.outQueue.put(msg)
+            if msg[0] == 'done':
+                return True
+
+    def lose_task(self, task, error):
+        if self.isRetired:  # aborted by WorkerPool.abort_task()
+            return False
+        options = task[6]
+        if options.get('isResent'):
+            errorMsg = 'Lost "{0}" for data: {1} at {2}: {3}'.format(
+                task[3], task[4].get('alias'), self, error)
+            syslogger.error(errorMsg)
+            self.outQueue.put(('done', task[0], task[1], {}, None, errorMsg))
+        else:
+            syslogger.error('lost connection to {0}: {1}, the task is '
+                            'queued again'.format(self, error))
+            options = dict(options, isResent=True)
+            self.taskQueue.put(task[:6] + (options,))
+        return False
+
+
+class WorkerPool(object):
+    """The main side of a pool. It owns the workers and the queues and routes
+    the worker output to the runs that have submitted the tasks."""
+
+    def __init__(self, workerType):
+        self.workerType = workerType
+        if workerType == 'process':
+            self.workerClass = BackendProcess
+            self.taskQueue = multiprocessing.Queue()
+            self.outQueue = multiprocessing.Queue()
+        elif workerType in ('thread', 'remote'):
+            self.workerClass = BackendThread if workerType == 'thread' else \
+                BackendRemote
+            self.taskQueue = queue.Queue()
+            self.outQueue = queue.Queue()
+        else:
+            raise ValueError('unknown worker type {0}'.format(workerType))
+        self.workers = []
+        self.workerCounter = itertools.count()
+        self.started = {}  # (runId, index): (workerIndex, start time)
+        self.runQueues = {}
+        self.externalRunQueues = set()
+        self.sharedBlocks = {}  # (runId, index): list of input shm blocks
+        self.submitted = {}  # (runId, index): (time, put time, input bytes)
+        self.runCounter = itertools.count()
+        self.lock = threading.Lock()
+        self.router = threading.Thread(target=self._route)
+        self.router.daemon = True
+        self.router.start()
+
+    def __repr__(self):
+        return "WorkerPool of {0} {1}{2}".format(
+            len(self.workers), self.workerType,
+            '' if len(self.workers) == 1 else 'es'
+            if self.workerType == 'process' else 's')
+
+    def ensure_workers(self, nWorkers):
+        """Starts new workers if the pool has fewer than *nWorkers* alive. A
+        remote pool has one worker per address in *remoteAddresses*, whatever
+        *nWorkers* is."""
+        if self.workerType == 'remote':
+            return self._ensure_remote_workers()
+        with self.lock:
+            self.workers = [w for w in self.workers if w.is_alive()]
+            while len(self.workers) < nWorkers:
+                self._start_worker()
+        return len(self.workers)
+
+    def _ensure_remote_workers(self):
+        with self.lock:
+            self.workers = [w for w in self.workers if w.is_alive()]
+            served = [w.address for w in self.workers]
+            newWorkers = [self._start_worker(address) for address in
+                          remoteAddresses if address not in served]
+        for worker in newWorkers:
+            worker.connected.wait(connectTimeout)
+        with self.lock:
+            self.workers = [w for w in self.workers if w.is_alive()]
+            return len(self.workers)
+
+    def _start_worker(self, address=None):
+        args = [self.taskQueue, self.outQueue, next(self.workerCounter),
+                get_cancel_epoch()]
+        if address is not None:
+            args.append(address)
+        worker = self.workerClass(*args)
+        worker.start()
+        self.workers.append(worker)
+        return worker
+
+    def get_expired(self, runId, indices, timeout):
+        """Returns those of *indices* of *runId* whose tasks have been running
+        longer than *timeout* seconds."""
+        now = time.time()
+        return [index for index in indices
+                if now - self.started.get((runId, index), (0, now))[1] >
+                timeout]
+
+    def abort_task(self, runId, index, errorMsg):
+        """Stops waiting for the task *index* of *runId*. The process that
+        runs the task is terminated and replaced; a thread is retired and
+        replaced; a remote worker sends an abort message to its daemon, which
+        terminates the task, and is replaced by a new connection. Returns a
+        'done' message for the task with *errorMsg*."""
+        workerIndex = self.started.pop((runId, index), (None,))[0]
+        with self.lock:
+            for worker in self.workers:
+                if worker.workerIndex != workerIndex:
+                    continue
+                self.workers.remove(worker)
+                if self.workerType == 'process':
+                    worker.terminate()
+                    worker.join(1.)
+                    self._start_worker()
+                elif self.workerType == 'remote':
+                    worker.retire()
+                    self._start_worker(worker.address)
+                else:
+                    worker.isRetired = True
+                    self._start_worker()
+                break
+        self.release_blocks(runId, index)
+        syslogger.error(errorMsg)
+        return ('done', runId, index, {}, None, errorMsg)
+
+    def open_run(self, runQueue=None):
+        """Registers a new run and returns its id. The messages of the run are
+        put to *runQueue*; several runs, also in different pools, may share one
+        queue; such a queue is not emptied by :meth:`close_run`."""
+        runId = next(self.runCounter)
+        if runQueue is None:
+            self.runQueues[runId] = queue.Queue()
+        else:
+            self.runQueues[runId] = runQueue
+            self.externalRunQueues.add(runId)
+        return runId
+
+    def close_run(self, runId):
+        runQueue = self.runQueues.pop(runId, None)
+        if runId in self.externalRunQueues:
+            self.externalRunQueues.discard(runId)
+            runQueue = None
+        while runQueue is not None and not runQueue.empty():
+            self.discard_output(runQueue.get())
+        for key in [k for k in self.sharedBlocks if k[0] == runId]:
+            self.release_blocks(*key)
+        for key in [k for k in self.submitted if k[0] == runId]:
+            del self.submitted[key]
+
+    def release_blocks(self, runId, index):
+        for shm in self.sharedBlocks.pop((runId, index), []):
+            csh.release(shm)
+
+    def put_in_data(self, runId, index, item, func, name, inArrays, outArrays,
+                    inFields=('alias',), outFields=(), options={}):
+        """Submits the task for *item*. Returns False if the item lacks any of
+        *inArrays*. For a process pool, the arrays larger than
+        options['sharedMemoryMinSize'] bytes are sent via shared memory."""
+        t0 = time.time()
+        minSize = options.get('sharedMemoryMinSize') \
+            if self.workerType == 'process' else None
+        res = {}
+        for key in inFields:
+            res[key] = getattr(item, key)
+        for key in inArrays:
+            try:
+                res[key] = getattr(item, key)
+            except AttributeError as e:
+                syslogger.error(
+                    'Error in put_in_data() for spectrum {0}:\n{1}'.format(
+                        item.alias, e))
+                self.release_blocks(runId, index)
+                return False
+            if csh.is_shareable(res[key], minSize):
+                res[key], shm = csh.put_array(res[key])
+                self.sharedBlocks.setdefault((runId, index), []).append(shm)
+        self.taskQueue.put((runId, index, func, name, res,
+                            list(outFields) + list(outArrays), options))
+        t1 = time.time()
+        nBytes = sum(get_nbytes(res[key]) for key in inArrays) \
+            if self.workerType != 'thread' else 0
+        self.submitted[runId, index] = t1, t1-t0, nBytes
+        return True
+
+    def pop_submitted(self, runId, index):
+        """Returns a tuple (submission time, time of putting the task, bytes
+        of input arrays) for a finished task or None."""
+        return self.submitted.pop((runId, index), None)
+
+    def _fill(self, runId, pending, put_in, nMax):
+        nPut = 0
+        while nPut < nMax:
+            for index, item in pending:
+                if put_in(runId, index, item):
+                    nPut += 1
+                    break
+            else:  # pending is exhausted
+                break
+        return nPut
+
+    def dispatch(self, items, put_in, nInFlight, timeout=None,
+                 startEpoch=None):
+        """A generator that runs *items* with no more than *nInFlight* tasks
+        being simultaneously in the pool. *put_in(runId, index, item)* submits
+        one item and returns False if the item cannot be sent. As soon as a
+        worker finishes a task, the next pending item is submitted, so that a
+        slow item does not hold back the others. The worker messages (see
+        :meth:`get`) are yielded in the order of their arrival, i.e. the
+        results come in the order of completion.
+
+        A task running longer than *timeout* seconds is aborted. If the run,
+        started in the cancellation epoch *startEpoch*, gets cancelled, the
+        pending items are not submitted and the running tasks are aborted
+        after *cancelGrace* seconds. The same happens at once if a remote pool
+        has lost all its daemons. An aborted or not submitted item gets a
+        'done' message with an error message and no result."""
+        runId = self.open_run()
+        pending = iter(enumerate(items))
+        running = set()
+
+        def put_in_running(runId, index, item):
+            if put_in(runId, index, item):
+                running.add(index)
+                return True
+            return False
+
+        tCancel = None
+        checkTime = checkInterval if (timeout or startEpoch is not None or
+                                      self.workerType == 'remote') else None
+        try:
+            self._fill(runId, pending, put_in_running, nInFlight)
+            while running:
+                try:
+                    msg = self.get(runId, checkTime)
+                except queue.Empty:
+                    msg = None
+                if msg is not None and msg[2] not in running:
+                    self.discard_output(msg)  # of an aborted task
+                elif msg is not None:
+                    if msg[0] == 'done':
+                        running.discard(msg[2])
+                        self.release_blocks(runId, msg[2])
+                        if tCancel is None:
+                            self._fill(runId, pending, put_in_running, 1)
+                    yield msg
+
+                if self.workerType == 'remote' and not any(
+                        w.is_alive() for w in self.workers):
+                    for index in list(running) + [i for i, it in pending]:
+                        running.discard(index)
+                        yield ('done', runId, index, {}, None,
+                               'No remote worker left for "{0}"'.format(
+                                   items[index].alias))
+                    break
+                if tCancel is None and is_cancelled(startEpoch):
+                    tCancel = time.time()
+                    for index, item in pending:
+                        yield ('done', runId, index, {}, None,
+                               'Cancelled "{0}"'.format(item.alias))
+                if tCancel is not None and time.time()-tCancel > cancelGrace:
+                    expired = list(running)
+                    errorStr = 'Aborted after cancellation'
+                elif timeout:
+                    expired = self.get_expired(runId, running, timeout)
+                    errorStr = 'Timed out after {0} s'.format(timeout)
+                else:
+                    expired = []
+                for index in expired:
+                    running.discard(index)
+                    yield self.abort_task(runId, index, '{0}: "{1}"'.format(
+                        errorStr, items[index].alias))
+                    if tCancel is None:
+                        self._fill(runId, pending, put_in_running, 1)
+        finally:
+            self.close_run(runId)
+
+    def get_out_data(self, item, outDict):
+        for field in outDict:
+            val = outDict[field]
+            if isinstance(val, csh.SharedArray):
+                val = csh.get_array(val, unlink=True)
+            setattr(item, field, val)
+
+    def get(self, runId, timeout=None):
+        """Returns the next message for *runId*: either ('progress', runId,
+        index, value) or ('done', runId, index, outDict, res, errorMsg[,
+        info]), where the optional *info* is a dict of worker timing."""
+        return self.runQueues[runId].get(timeout=timeout)
+
+    def _route(self):
+        while True:
+            msg = retry_on_eintr(self.outQueue.get)
+            if msg is None:
+                break
+            if msg[0] == 'started':
+                self.started[msg[1], msg[2]] = msg[3], time.time()
+                continue
+            elif msg[0] == 'done':
+                self.started.pop((msg[1], msg[2]), None)
+            runQueue = self.runQueues.get(msg[1])
+            if runQueue is not None:
+                runQueue.put(msg)
+            else:  # the run was closed
+                self.discard_output(msg)
+
+    @staticmethod
+    def discard_output(msg):
+        """Frees the shared output arrays of a message that is not used."""
+        if msg[0] != 'done':
+            return
+        for val in msg[3].values():
+            if isinstance(val, csh.SharedArray):
+                csh.discard(val)
+
+    def shutdown(self, timeout=2.):
+        with self.lock:
+            for worker in self.workers:
+                self.taskQueue.put(None)
+            for worker in self.workers:
+                worker.join(timeout)
+                if self.workerType == 'process' and worker.is_alive():
+                    worker.terminate()
+            self.workers = []
+        self.outQueue.put(None)
+        self.router.join(timeout)
+
+
+def get_pool(workerType, nWorkers):
+    """Returns the session-wide pool of *workerType* ('thread', 'process' or
+    'remote') that has at least *nWorkers* workers."""
+    with poolsLock:
+        if workerType not in pools:
+            pools[workerType] = WorkerPool(workerType)
+        pool = pools[workerType]
+    pool.ensure_workers(nWorkers)
+    return pool
+
+
+def get_pool_size(workerType):
+    """Returns the number of running workers in the pool of *workerType*."""
+    pool = pools.get(workerType)
+    if pool is None:
+        return 0
+    with pool.lock:
+        return len([w for w in pool.workers if w.is_alive()])
+
+
+def set_remote_workers(addresses, authkey):
+    """Sets the remote worker daemons. *addresses* is a list of 'host:port'
+    strings or (host, port) tuples, *authkey* is the shared secret of the
+    daemons as bytes or str. An empty list returns to local processes."""
+    global remoteAuthkey
+    with poolsLock:
+        pool = pools.pop('remote', None)
+    if pool is not None:
+        pool.shutdown()
+    del remoteAddresses[:]
+    for address in addresses:
+        if isinstance(address, str):
+            host, port = address.rsplit(':', 1)
+            address = host, int(port)
+        remoteAddresses.append(tuple(address))
+    remoteAuthkey = authkey.encode() if isinstance(authkey, str) else authkey
+
+
+def get_remote_pool():
+    """Returns the remote pool or None if no remote daemons are set or none
+    can be connected."""
+    if not remoteAddresses:
+        return
+    pool = get_pool('remote', len(remoteAddresses))
+    if get_pool_size('remote') == 0:
+        syslogger.error('no remote worker daemon is available')
+        return
+    return pool
+
+
+def shutdown_pools():
+    with poolsLock:
+        for pool in pools.values():
+            try:
+                pool.shutdown()
+            except Exception as e:
+                syslogger.error('Error in shutdown_pools(): {0}'.format(e))
+        pools.clear()
+
+
+atexit.register(shutdown_pools)
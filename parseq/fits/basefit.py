@@ -8,7 +8,7 @@ fitting parameters; they are individual per data item. Each fit in a pipeline
 requires subclassing from :class:`Fit`.
 """
 __author__ = "Konstantin Klementiev"
-__date__ = "15 Apr 2026"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 import sys
@@ -28,12 +28,15 @@ else:
     from inspect import getattr_static
 
 import multiprocessing
-import threading
-import errno
+from functools import partial
 
 from ..core import singletons as csi
 from ..core.logger import logger, syslogger
 from ..core.config import configFits
+from ..core import profiling as cpr
+from ..core import progress as cpg
+from ..core.workers import (
+    get_pool, get_remote_pool, get_epoch, is_cancelled, DataProxy, Progress)
 
 
 class Fit:
@@ -62,12 +65,20 @@ class Fit:
 
     *progressTimeDelta*, float, default 1.0 sec, a timeout delta to report on
     transformation progress. Only needed if :meth:`run_main` is defined with
-    a parameter *progress*.
+    a parameter *progress*. The progress is reported in batches as with
+    transforms (see :mod:`.core.progress`).
+
+    *timeout*, *useSharedMemory* and *sharedMemoryMinSize* have the same
+    meaning as in :class:`.core.transforms.Transform`. A fit that is timed
+    out or cancelled gets its fit curve erased.
     """
 
     nThreads = 1
     nProcesses = 1
     progressTimeDelta = 1.0  # sec
+    timeout = None  # sec
+    useSharedMemory = True
+    sharedMemoryMinSize = 2**20  # bytes
     defaultResult = dict(R=1., mesg='', ier=None, info={}, nparam=0)
     # dataAttrs = dict(x='e', y='mu', fit='fit')
     # allDataAttrs = dict(x='e', y='mu')
@@ -107,6 +118,7 @@ class Fit:
                              "is allowed".format(self.name))
         csi.fits[self.name] = self
         self.sendSignals = False
+        self.startEpoch = None  # cancellation epoch of the current run
         self.read_ini_params()
 
     @classmethod
@@ -142,65 +154,94 @@ class Fit:
                     raise KeyError("Unknown parameter '{0}'".format(par))
                 data.fitParams[par] = params[par]
 
-    def _get_progress1(self, alias, progress):
+    def _get_progressN(self, alias, value=1.0):
         if (self.node is None or not hasattr(self.node, 'widget') or
                 self.node.widget is None):
             return
-        self.node.widget.tree.transformProgress.emit([alias, progress.value])
+        self.node.widget.tree.transformProgress.emit([alias, value])
 
-    def _get_progressN(self, alias, worker=None):
+    def _get_progress_batch(self, values):
         if (self.node is None or not hasattr(self.node, 'widget') or
                 self.node.widget is None):
             return
-        if worker is None:
-            self.node.widget.tree.transformProgress.emit([alias, 1.0])
-        else:
-            ps = worker.get_progress()
-            if len(ps) == 0:
-                return
-            self.node.widget.tree.transformProgress.emit([alias, ps[-1]])
+        self.node.widget.tree.transformProgressBatch.emit(values)
+
+    def _make_progress_board(self, items, args, pool=None, options=None):
+        """Returns a :class:`.progress.ProgressBoard` of *items* or None if
+        the progress is not reported. For a pool, sets *options* for the
+        workers."""
+        if 'progress' not in args or not self.sendSignals:
+            return
+        board = cpg.make_board(items, self._get_progress_batch,
+                               self.progressTimeDelta, pool)
+        if options is not None:
+            if board is None:
+                options['progressMessages'] = True
+            else:
+                options['progressBoard'] = board.desc
+        return board
+
+    def _put_in_data(self, pool, inArrays, outArrays, options,
+                     runId, index, item):
+        if not pool.put_in_data(
+                runId, index, item, self.__class__.run_main, self.name,
+                inArrays, outArrays,
+                inFields=('fitParams', 'alias', 'transformParams'),
+                outFields=('fitParams',), options=options):
+            self.erase(item)
+            item.beingTransformed = False
+            return False
+        item.beingTransformed = self.name
+        item.transfortm_t0 = time.time()
+        return True
 
-    def _run_multi_worker(self, workers, workedItems, args):
-        wt = workers[0].workerType
+    def _run_multi_worker(self, pool, workedItems, args, inArrays, outArrays,
+                          nWorkers, allData=None):
         syslogger.info('run "{0}" in {1} {2}{3} for {4}'.format(
-            self.name, len(workers), wt, '' if len(workers) == 1 else 's',
-            [d.alias for d in workedItems]))
+            self.name, nWorkers, pool.workerType,
+            '' if nWorkers == 1 else 's', [d.alias for d in workedItems]))
         if self.sendSignals:
             csi.mainWindow.beforeDataTransformSignal.emit(workedItems)
 
-        for worker, item in zip(workers, workedItems):
-            if 'progress' in args and self.sendSignals:
-                worker.timer = NTimer(
-                    self.progressTimeDelta,
-                    self._get_progressN, [item.alias, worker])
-                worker.timer.start()
-            if not worker.put_in_data(item):
-                self.erase(item)
+        options = dict(kind='fit', progressTimeDelta=self.progressTimeDelta,
+                       allData=allData,
+                       sharedMemoryMinSize=self.sharedMemoryMinSize
+                       if self.useSharedMemory else None,
+                       startEpoch=self.startEpoch,
+                       profile=cpr.is_profiled(self.name))
+        board = self._make_progress_board(workedItems, args, pool, options)
+        put_in = partial(self._put_in_data, pool, inArrays, outArrays, options)
+        try:
+            for msg in pool.dispatch(workedItems, put_in, nWorkers,
+                                     self.timeout, self.startEpoch):
+                item = workedItems[msg[2]]
+                if msg[0] == 'progress':  # only without a board
+                    if 'progress' in args and self.sendSignals:
+                        self._get_progressN(item.alias, msg[3])
+                    continue
+                outDict, res, item.error = msg[3:6]
+                tGet = time.time()
+                pool.get_out_data(item, outDict)
+                tGet = time.time() - tGet
+                if not outDict:  # timed out or cancelled
+                    self.erase(item)
+                if hasattr(item, 'transfortm_t0'):
+                    item.transfortmTimes[self.name] = \
+                        time.time() - item.transfortm_t0
+                cpr.add_pool_record(
+                    self.name, 'fit', item.alias, int(item.error is None),
+                    pool.pop_submitted(msg[1], msg[2]),
+                    msg[6] if len(msg) > 6 else None, tGet)
+                if item.error is not None:
+                    syslogger.log(100, item.error)
                 item.beingTransformed = False
-                continue
-            else:
-                item.beingTransformed = self.name
-            worker.start()
-            item.transfortm_t0 = time.time()
-
-        for worker, item in zip(workers, workedItems):
-            if not item.beingTransformed:
-                continue
-            worker.get_out_data(item)
-            item.transfortmTimes[self.name] = time.time() - item.transfortm_t0
-            item.error = worker.get_error()
-            if item.error is not None:
-                syslogger.log(100, item.error)
-
-        for worker, item in zip(workers, workedItems):
-            if 'progress' in args and self.sendSignals:
-                worker.timer.cancel()
-            if not item.beingTransformed:
-                continue
-            worker.join(60.)
-            item.beingTransformed = False
-            if 'progress' in args and self.sendSignals:
-                self._get_progressN(item.alias)
+                if board is not None:
+                    board.values[msg[2]] = 1.
+                elif 'progress' in args and self.sendSignals:
+                    self._get_progressN(item.alias)
+        finally:
+            if board is not None:
+                board.close()
 
         if self.sendSignals:
             csi.mainWindow.afterDataTransformSignal.emit(workedItems)
@@ -211,30 +252,25 @@ class Fit:
         if self.sendSignals:
             csi.mainWindow.beforeDataTransformSignal.emit([data])
         syslogger.info('run "{0}" for {1}'.format(self.name, data.alias))
+        board = self._make_progress_board([data], args)
         try:
             argVals = [data]
             if 'allData' in args:
                 allData = csi.allLoadedItems
                 argVals.append(allData)
             if 'progress' in args:
-                progress = DataProxy()
-                progress.value = 1.
+                progress = Progress(self.startEpoch, None if board is None
+                                    else board.values)
                 argVals.append(progress)
-                timer = NTimer(self.progressTimeDelta, self._get_progress1,
-                               [data.alias, progress])
-                timer.start()
+            if cpr.is_profiled(self.name):
+                _, profile = cpr.run_profiled(self.run_main, *argVals)
+                cpr.add_profile(self.name, profile)
             else:
-                timer = None
-            self.run_main(*argVals)
-            if timer is not None:
-                timer.cancel()
+                self.run_main(*argVals)
             data.error = None
             if 'progress' in args:
                 progress.value = 1.
-                self._get_progress1(data.alias, progress)
         except Exception:
-            if timer is not None:
-                timer.cancel()
             errorMsg = 'failed "{0}" fit for data: {1}'.format(
                 self.name, data.alias)
             errorMsg += "\nwith the following traceback:\n"
@@ -243,9 +279,15 @@ class Fit:
             # if csi.DEBUG_LEVEL > 20:
             data.error = errorMsg
             syslogger.log(100, errorMsg)
+        if board is not None:
+            board.close()
         data.beingTransformed = False
         data.transfortmTimes[self.name] = \
             time.time() - data.transfortm_t0
+        cpr.add_record(name=self.name, kind='fit', alias=data.alias,
+                       worker='main', start=data.transfortm_t0,
+                       wall=data.transfortmTimes[self.name],
+                       state=int(data.error is None))
         if self.sendSignals:
             csi.mainWindow.afterDataTransformSignal.emit([data])
 
@@ -264,21 +306,25 @@ class Fit:
                 else nC
 
         if self.nThreads > 1:
-            workerClass = BackendThread
+            pool = get_pool('thread', self.nThreads)
             cpus = self.nThreads
         elif self.nProcesses > 1:
-            workerClass = BackendProcess
-            cpus = self.nProcesses
+            pool = get_remote_pool()
+            if pool is not None:
+                cpus = len(pool.workers)
+            else:
+                pool = get_pool('process', self.nProcesses)
+                cpus = self.nProcesses
         else:
-            workerClass = None
-        if workerClass is not None:
-            workers, workedItems = [], []
+            pool = None
+        workedItems = []
 
         args = getargspec(self.__class__.run_main)[0]
         if args[0] == 'self':
             raise SyntaxError(
                 'IMPORTANT: remove "self" from "run_main()" parameters as'
                 ' this is a static method, not an instance method!')
+        allData = None
         if 'allData' in args:
             allData = []
             for data in csi.allLoadedItems:
@@ -296,22 +342,17 @@ class Fit:
                     if key != 'fit']
         outArrays = [self.dataAttrs['fit']]
         for data in items:
-            if workerClass is not None:  # with multipro
-                worker = workerClass(
-                    self.__class__.run_main, self.__class__.name,
-                    inArrays, outArrays, self.progressTimeDelta)
-                if 'allData' in args:
-                    worker.put_in_all_data(allData)
-                workers.append(worker)
+            if pool is not None:  # with multipro
                 workedItems.append(data)
-                if len(workers) == cpus:
-                    self._run_multi_worker(workers, workedItems, args)
-                    workers, workedItems = [], []
+            elif is_cancelled(self.startEpoch):
+                self.erase(data)
+                data.error = 'Cancelled "{0}" fit for data: {1}'.format(
+                    self.name, data.alias)
             else:  # no multipro
                 self._run_single_worker(data, args)
-        if workerClass is not None:  # with multipro on remaining workedItems
-            if len(workers) > 0:
-                self._run_multi_worker(workers, workedItems, args)
+        if pool is not None and len(workedItems) > 0:
+            self._run_multi_worker(pool, workedItems, args, inArrays,
+                                   outArrays, cpus, allData)
 
         self.run_post(items)
         np.seterr(all='warn')
@@ -321,6 +362,7 @@ class Fit:
         #         del it.error
 
     def run_pre(self, params={}, dataItems=None, updateUndo=True):
+        self.startEpoch = get_epoch()  # see workers.cancel_runs()
         if params:
             # if updateUndo:
             #     self.push_to_undo_list(params, dataItems)
@@ -357,6 +399,8 @@ class Fit:
         :code:`progress.value = 0.5` (means 50% completion). If used with GUI,
         progress will be visualized as an expanding colored background
         rectangle in the data tree. Quick fits do not need progress reporting.
+        A long fit should also check the property `progress.isCancelled` and
+        stop early if it is True.
 
         Should an error happen during the fitting, the error state will be
         notified in the ParSeq status bar and the traceback will be shown in
@@ -383,190 +427,6 @@ class Fit:
         pass
 
 
-class GenericProcessOrThread(object):
-    def __init__(self, func, inArrays, outArrays):
-        self.func = func
-        self.inArrays = inArrays
-        self.outArrays = outArrays
-        # self.started_event.clear()
-        # self.finished_event.clear()
-
-    @logger(minLevel=20)
-    def put_in_all_data(self, allDataList):
-        self.allDataQueue.put(allDataList)
-
-    @logger(minLevel=20)
-    def get_in_all_data(self):
-        return retry_on_eintr(self.allDataQueue.get)
-
-    @logger(minLevel=20, attrs=[(1, 'alias')])
-    def put_in_data(self, item):
-        res = {'fitParams': item.fitParams, 'alias': item.alias,
-               'transformParams': item.transformParams}
-        for key in self.inArrays:
-            try:
-                # if not hasattr(item, key):
-                #     setattr(item, key, None)
-                res[key] = getattr(item, key)
-            except AttributeError as e:
-                syslogger.error(
-                    'Error in put_in_data() for spectrum {0}:\n{1}'.format(
-                        item.alias, e))
-                # raise e
-                return False
-        self.inDataQueue.put(res)
-        return True
-
-    @logger(minLevel=20)
-    def get_in_data(self, item):
-        outDict = retry_on_eintr(self.inDataQueue.get)
-        for field in outDict:
-            setattr(item, field, outDict[field])
-
-    @logger(minLevel=20, attrs=[(1, 'alias')])
-    def put_out_data(self, item):
-        res = {'fitParams': item.fitParams}
-        for key in self.outArrays:
-            try:
-                res[key] = getattr(item, key)
-            except AttributeError:  # arrays can be conditionally missing
-                pass
-        self.outDataQueue.put(res)
-
-    @logger(minLevel=20, attrs=[(1, 'alias')])
-    def get_out_data(self, item):
-        outDict = retry_on_eintr(self.outDataQueue.get)
-        for field in outDict:
-            setattr(item, field, outDict[field])
-
-    def put_error(self, obj):
-        self.errorQueue.put(obj)
-
-    def get_error(self):
-        return retry_on_eintr(self.errorQueue.get)
-
-    def put_progress(self):
-        self.progressQueue.put_nowait(self.progress.value)
-
-    def get_progress(self):
-        values = []
-        try:
-            while not self.progressQueue.empty():
-                values.append(retry_on_eintr(self.progressQueue.get_nowait))
-        except Exception:
-            pass
-        return values
-
-    @logger(minLevel=20, printClass=True)
-    def run(self):
-        # self.started_event.set()
-        np.seterr(all='raise')
-        data = DataProxy()
-        self.get_in_data(data)
-        try:
-            args = getargspec(self.func)[0]
-            argVals = [data]
-            if 'allData' in args:
-                allData = self.get_in_all_data()
-                argVals.append(allData)
-            if 'progress' in args:
-                self.progress = DataProxy()
-                self.progress.value = 1.
-                argVals.append(self.progress)
-                timer = NTimer(self.progressTimeDelta, self.put_progress)
-                timer.start()
-            else:
-                timer = None
-            self.func(*argVals)
-            if timer is not None:
-                timer.cancel()
-                self.progress.value = 1.
-                self.put_progress()
-            self.put_error(None)
-        except Exception:
-            errorMsg = 'Failed "{0}" fit for data: {1}'.format(
-                self.fitName, data.alias)
-            errorMsg += "\nwith the following traceback:\n"
-            tb = traceback.format_exc()
-            errorMsg += "".join(tb[:-1])  # remove last empty line
-            self.put_error(errorMsg)
-        finally:
-            self.put_out_data(data)
-            np.seterr(all='warn')
-        # self.started_event.clear()
-        # self.finished_event.set()
-
-
-def retry_on_eintr(function, *args, **kw):
-    """
-    Suggested in:
-    http://mail.python.org/pipermail/python-list/2011-February/1266462.html
-    as a solution for `IOError: [Errno 4] Interrupted system call` in Linux.
-    """
-    while True:
-        try:
-            return function(*args, **kw)
-        except IOError as e:
-            if e.errno == errno.EINTR:
-                continue
-            else:
-                raise
-
-
-class DataProxy(object):
-    """An empty object to attach fields to it. With a simple instance of
-    object() this is impossible but doable with an empty class."""
-    pass
-
-
-class BackendProcess(GenericProcessOrThread, multiprocessing.Process):
-    def __init__(self, func, fitName, inArrays, outArrays,
-                 progressTimeDelta):
-        multiprocessing.Process.__init__(self)
-        self.fitName = fitName
-        self.progressTimeDelta = progressTimeDelta
-        self.multiName = 'multiprocessing'
-        self.workerType = 'process'
-        self.allDataQueue = multiprocessing.Queue()
-        self.inDataQueue = multiprocessing.Queue()
-        self.outDataQueue = multiprocessing.Queue()
-        self.errorQueue = multiprocessing.Queue()
-        # self.started_event = multiprocessing.Event()
-        # self.finished_event = multiprocessing.Event()
-        self.progressQueue = multiprocessing.Queue()
-        GenericProcessOrThread.__init__(self, func, inArrays, outArrays)
-
-
-class BackendThread(GenericProcessOrThread, threading.Thread):
-    def __init__(self, func, fitName, inArrays, outArrays,
-                 progressTimeDelta):
-        threading.Thread.__init__(self)
-        self.fitName = fitName
-        self.progressTimeDelta = progressTimeDelta
-        self.multiName = 'multithreading'
-        self.workerType = 'thread'
-        if sys.version_info < (3, 1):
-            import Queue
-        else:
-            import queue
-            Queue = queue
-
-        self.allDataQueue = Queue.Queue()
-        self.inDataQueue = Queue.Queue()
-        self.outDataQueue = Queue.Queue()
-        self.errorQueue = Queue.Queue()
-        # self.started_event = threading.Event()
-        # self.finished_event = threading.Event()
-        self.progressQueue = Queue.Queue()
-        GenericProcessOrThread.__init__(self, func, inArrays, outArrays)
-
-
-class NTimer(threading.Timer):
-    def run(self):
-        while not self.finished.wait(self.interval):
-            self.function(*self.args, **self.kwargs)
-
-
 def connect_combined(items, parentItem):
     """Used at project loading to connect combined data to underlying data."""
     toBeUpdated = []
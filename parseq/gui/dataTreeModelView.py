@@ -16,7 +16,7 @@ The selected items can be accessed by core.singletons.selectedItems and
 core.singletons.selectedTopItems lists.
 """
 __author__ = "Konstantin Klementiev"
-__date__ = "29 Oct 2025"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 # import sys
@@ -859,6 +859,7 @@ class EyeHeader(qt.QHeaderView):
 class DataTreeView(qt.QTreeView):
 
     transformProgress = qt.pyqtSignal(list)  # alias, progress.value
+    transformProgressBatch = qt.pyqtSignal(list)  # of [alias, value]
 
     def __init__(self, node=None, parent=None):
         super().__init__(parent)
@@ -952,6 +953,7 @@ class DataTreeView(qt.QTreeView):
         self.setHorizontalScrollBarPolicy(qt.Qt.ScrollBarAlwaysOff)
 
         self.transformProgress.connect(self.updateProgress)
+        self.transformProgressBatch.connect(self.updateProgressBatch)
 
         self.makeActions()
         self.model().updateAll()
@@ -1317,3 +1319,12 @@ class DataTreeView(qt.QTreeView):
         item.progress = progress if item.beingTransformed else 1.
         ind = csi.model.indexFromItem(item)
         self.model().dataChanged.emit(ind, ind)
+
+    def updateProgressBatch(self, values):
+        items = dict((it.alias, it) for it in csi.dataRootItem.get_items())
+        for alias, progress in values:
+            item = items.get(alias)
+            if item is None:
+                continue
+            item.progress = progress if item.beingTransformed else 1.
+        self.viewport().update()  # one repaint for all items
@@ -5,7 +5,7 @@ extended by the hdf5 model from silx (silx.gui.hdf5.Hdf5TreeModel), so that
 hdf5 containers can be viewed in the same tree.
 """
 __author__ = "Konstantin Klementiev"
-__date__ = "20 Jul 2026"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 
@@ -17,7 +17,6 @@ from functools import partial
 import pickle
 import time
 import numpy as np
-import warnings
 import gzip
 
 os.environ["HDF5_USE_FILE_LOCKING"] = "FALSE"  # to work with external links
@@ -32,6 +31,9 @@ import silx.io as silx_io
 from silx.gui.hdf5.Hdf5TreeModel import Hdf5TreeModel
 
 from ..core import commons as cco
+from ..core import columnfile as ccf
+from ..core import h5pool as chp
+from ..core import formulas as cfm
 from ..core import singletons as csi
 from ..core import config
 from ..core.logger import syslogger
@@ -459,14 +461,16 @@ class FileSystemWithHdf5Model(qt.QFileSystemModel):
         dataStr = str(dataStr)
         if "np." in dataStr:  # in both 'col' and 'h5'
             try:
-                arr = eval(dataStr)
-                return [(dataStr, None, None, arr.shape)]
+                formula = cfm.compile_formula(dataStr)
+                if formula.constant is not None:
+                    arr = formula.evaluate(None)
+                    return [(dataStr, None, None, np.shape(arr))]
             except Exception:
                 pass
         try:
             # to expand list comprehension or string expressions
-            dataStr = str(eval(dataStr))
-        except:  # noqa
+            dataStr = str(cfm.literal_eval(dataStr))
+        except ValueError:
             pass
 
         if ((dataStr.startswith('[') and dataStr.endswith(']')) or
@@ -496,7 +500,6 @@ class FileSystemWithHdf5Model(qt.QFileSystemModel):
                 keys = [k[1:-1] if k.startswith(('"', "'")) else k
                         for k in keys]
             d = {}
-            _locals = dict(d=d, np=np)
             if kind == 'h5':
                 for k in keys:
                     if k.startswith("silx:"):
@@ -518,12 +521,10 @@ class FileSystemWithHdf5Model(qt.QFileSystemModel):
                         kn = int(k)
                     d[k] = treeObj[kn]
                     d[kn] = d[k]
-                    _locals[k] = k
                 shape = 2,
             try:
-                # keyword `locals` is an error in Py<3.13,
-                # using just `_locals` (without globals()) does not work
-                eval(colStrD, globals(), _locals)
+                # the checked formula, as at reading the data files:
+                cfm.compile_formula(colStrD).evaluate(lambda key: d[key])
                 out.append((colStr, colStrD, keys, shape))
             except:  # noqa
                 return
@@ -563,10 +564,7 @@ class FileSystemWithHdf5Model(qt.QFileSystemModel):
             nds = self.transformNode.get_arrays_prop('ndim')
             cdf.pop('conversionFactors', [])
             cdf.pop('metadata', [])
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                arrs = np.genfromtxt(
-                    fname, unpack=True, max_rows=2, encoding="utf-8", **cdf)
+            arrs = ccf.read_columns(fname, cdf, maxRows=2)
             if len(arrs) == 0:
                 return
 
@@ -875,6 +873,7 @@ class FileSystemWithHdf5Model(qt.QFileSystemModel):
 #        if not h5py_object.ntype is h5py.File:
 #            return
 
+        chp.close(filename)
         self.beginResetModel()
         self.h5Model.beginResetModel()
 #        self.nodesHead.remove(indexFS.internalId())
@@ -1400,7 +1399,7 @@ class FileTreeView(qt.QTreeView):
             if url.startswith('silx:'):
                 if cf.fileType != 'h5':
                     continue
-                with silx_io.open(url) as sf:
+                with chp.opened(url) as sf:
                     if silx_io.is_dataset(sf):
                         return
                     try:
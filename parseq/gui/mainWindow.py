@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 __author__ = "Konstantin Klementiev"
-__date__ = "4 Jan 2026"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 # import sys
@@ -26,6 +26,7 @@ from ..core.logger import syslogger
 from ..core import config
 from ..core import singletons as csi
 from ..core import commons as cco
+from ..core import workers as cwo
 # from ..core import spectra as csp
 from ..core import save_restore as csr
 from ..gui import undoredo as gur
@@ -313,6 +314,18 @@ class MainWindowParSeq(qt.QMainWindow):
         menu.aboutToShow.connect(partial(self.populateRedoMenu, menu))
         self.setEnableUndoRedo()
 
+        self.stopAction = qt.QAction(
+            self.style().standardIcon(qt.QStyle.SP_BrowserStop),
+            "Stop running transforms and fits (Ctrl+Break)", self)
+        self.stopAction.setShortcut('Ctrl+Break')
+        self.stopAction.triggered.connect(self.slotStop)
+        self.stopAction.setEnabled(False)
+        transformThread = csi.tasker.thread()
+        transformThread.started.connect(
+            partial(self.stopAction.setEnabled, True))
+        transformThread.finished.connect(
+            partial(self.stopAction.setEnabled, False))
+
         infoAction = qt.QAction(
             qt.QIcon(osp.join(self.iconDir, "icon-info.png")),
             "About ParSeq… Ctrl+I", self)
@@ -352,6 +365,8 @@ class MainWindowParSeq(qt.QMainWindow):
         self.toolbar.addAction(self.undoAction)
         self.toolbar.addAction(self.redoAction)
         self.toolbar.addSeparator()
+        self.toolbar.addAction(self.stopAction)
+        self.toolbar.addSeparator()
         self.toolbar.addAction(infoAction)
         self.toolbar.addAction(helpAction)
 
@@ -817,6 +832,10 @@ class MainWindowParSeq(qt.QMainWindow):
         csi.redo.clear()
         self.setEnableUndoRedo()
 
+    def slotStop(self):
+        cwo.cancel_runs()
+        self.displayStatusMessage(u'stopping…')
+
     def slotUndo(self, ind):
         gur.upplyUndo(ind)
 
@@ -918,6 +937,7 @@ class MainWindowParSeq(qt.QMainWindow):
             dock.deleteLater()
         csi.tasker.thread().quit()
         csi.tasker.deleteLater()
+        cwo.shutdown_pools()
         super().closeEvent(event)
 
     def updateItemView(self, state, items):
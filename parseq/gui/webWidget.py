@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 __author__ = "Konstantin Klementiev"
-__date__ = "22 Jan 2025"
+__date__ = "17 Oct 2026"
 # !!! SEE CODERULES.TXT !!!
 
 import re
@@ -61,6 +61,8 @@ DOCOUTDIR = osp.join(DOCDIR, '_build')
 
 
 def makeThreadProcessStr(nThreads, nProcesses):
+    if 'auto' in (nThreads, nProcesses):
+        return '&nbsp(auto parallel)'
     if isinstance(nThreads, str):
         nThreads = max(nC//2, 1) if nThreads.startswith('h') else nC
     if isinstance(nProcesses, str):
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""Throughput benchmark of the transformation engine without GUI.
+
+Synthetic pipelines of two nodes and one transform are built for 1D, 2D and
+3D data, for a cheap and an expensive `run_main`, each with and without the
+`progress` argument. The transform is run serially, in threads and in
+processes for several numbers of data items and the throughput in items per
+second is measured. The cases that would need more memory than
+`--memoryLimit` are skipped.
+
+The results are saved as json together with the versions of ParSeq, Python
+and numpy and the number of CPUs. Two result files are compared by
+`--compare old.json new.json`; a case slower by more than `--tolerance` is
+reported as a regression.
+
+Examples::
+
+    python benchmark_transforms.py --out bench-1.3.json
+    python benchmark_transforms.py --counts 10 100 --modes serial threads
+    python benchmark_transforms.py --compare bench-1.2.json bench-1.3.json
+"""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import time
+import json
+import logging
+import argparse
+import datetime
+import platform
+import multiprocessing
+from collections import OrderedDict
+import numpy as np
+
+import parseq
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+from parseq.core.logger import syslogger
+
+shapes = {1: (2000,), 2: (200, 200), 3: (16, 100, 100)}
+nRepeats = {'cheap': 1, 'expensive': 40}
+allModes = 'serial', 'threads', 'processes'
+
+
+class NodeIn1D(cno.Node):
+    name = 'in'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class NodeOut1D(cno.Node):
+    name = 'out'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class NodeIn2D(cno.Node):
+    name = 'in'
+    arrays = OrderedDict()
+    arrays['y'] = dict(role='2D')
+
+
+class NodeOut2D(cno.Node):
+    name = 'out'
+    arrays = OrderedDict()
+    arrays['z'] = dict(role='2D')
+
+
+class NodeIn3D(cno.Node):
+    name = 'in'
+    arrays = OrderedDict()
+    arrays['y'] = dict(role='3D')
+
+
+class NodeOut3D(cno.Node):
+    name = 'out'
+    arrays = OrderedDict()
+    arrays['z'] = dict(role='3D')
+
+
+nodeClasses = {1: (NodeIn1D, NodeOut1D), 2: (NodeIn2D, NodeOut2D),
+               3: (NodeIn3D, NodeOut3D)}
+
+
+class Bench(ctr.Transform):
+    name = 'bench'
+    defaultParams = dict(nRepeat=1)
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        y = data.y
+        for i in range(data.transformParams['nRepeat']):
+            y = np.sqrt(np.abs(np.sin(y) + 1.))
+        data.z = y
+        return True
+
+
+class BenchProgress(ctr.Transform):
+    name = 'bench'
+    defaultParams = dict(nRepeat=1)
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data, progress):
+        y = data.y
+        nRepeat = data.transformParams['nRepeat']
+        for i in range(nRepeat):
+            y = np.sqrt(np.abs(np.sin(y) + 1.))
+            progress.value = (i+1) / nRepeat
+        data.z = y
+        return True
+
+
+def reset_pipeline():
+    csi.nodes.clear()
+    csi.transforms.clear()
+    csi.fits.clear()
+    del csi.modelDataColumns[:]
+    csi.dataRootItem = None
+    csi.selectedItems = []
+    csi.selectedTopItems = []
+
+
+def make_pipeline(dim, withProgress, mode, nWorkers):
+    reset_pipeline()
+    csi.withGUI = False
+    nodeIn, nodeOut = [cls() for cls in nodeClasses[dim]]
+    trClass = BenchProgress if withProgress else Bench
+    trClass.nThreads = nWorkers if mode == 'threads' else 1
+    trClass.nProcesses = nWorkers if mode == 'processes' else 1
+    transform = trClass(nodeIn, nodeOut)
+    csi.dataRootItem = csp.Spectrum('root')
+    return transform
+
+
+def run_case(dim, cost, withProgress, mode, nItems, nWorkers):
+    transform = make_pipeline(dim, withProgress, mode, nWorkers)
+    y = np.random.default_rng(0).random(shapes[dim])
+    madeOf = dict(y=y, x=np.arange(len(y))) if dim == 1 else dict(y=y)
+    items = [csi.dataRootItem.insert_item(
+             madeOf, alias='d{0}'.format(i),
+             transformParams=dict(nRepeat=nRepeats[cost]))
+             for i in range(nItems)]
+    if mode != 'serial':  # start the workers outside of the timing
+        cwo.get_pool('thread' if mode == 'threads' else 'process', nWorkers)
+    t0 = time.time()
+    errorItems = transform.run(dataItems=items)
+    dt = time.time() - t0
+    if errorItems:
+        raise RuntimeError(errorItems[0].error)
+    return dt
+
+
+def get_key(res):
+    return '{dim}D {cost} progress={progress} {mode} nItems={nItems}'.format(
+        **res)
+
+
+def benchmark(counts, modes, dims, costs, nWorkers, memoryLimit):
+    results = []
+    for dim in dims:
+        itemBytes = np.prod(shapes[dim]) * 8 * 2  # input and output arrays
+        for cost in costs:
+            for withProgress in (False, True):
+                for mode in modes:
+                    for nItems in counts:
+                        res = OrderedDict(
+                            dim=dim, cost=cost, progress=withProgress,
+                            mode=mode, nItems=nItems,
+                            nWorkers=1 if mode == 'serial' else nWorkers)
+                        if nItems * itemBytes > memoryLimit:
+                            res['skipped'] = 'memory'
+                        else:
+                            dt = run_case(dim, cost, withProgress, mode,
+                                          nItems, nWorkers)
+                            res['seconds'] = round(dt, 6)
+                            res['itemsPerSecond'] = round(nItems / dt, 3)
+                        print(get_key(res), res.get('itemsPerSecond',
+                                                    res.get('skipped')))
+                        results.append(res)
+    cwo.shutdown_pools()
+    return results
+
+
+def get_environment():
+    return OrderedDict(
+        parseq=parseq.__version__, python=platform.python_version(),
+        numpy=np.__version__, platform=platform.platform(),
+        cpus=multiprocessing.cpu_count(),
+        date=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
+
+
+def compare(oldFile, newFile, tolerance=0.2):
+    """Prints the cases of *newFile* that are slower than those of *oldFile*
+    by more than the relative *tolerance*. Returns the list of their keys."""
+    with open(oldFile) as f:
+        old = json.load(f)
+    with open(newFile) as f:
+        new = json.load(f)
+    oldResults = dict((get_key(res), res) for res in old['results'])
+    regressions = []
+    print('{0} vs {1}'.format(old['environment']['parseq'],
+                              new['environment']['parseq']))
+    for res in new['results']:
+        key = get_key(res)
+        oldRes = oldResults.get(key)
+        if oldRes is None or 'itemsPerSecond' not in res or \
+                'itemsPerSecond' not in oldRes:
+            continue
+        ratio = res['itemsPerSecond'] / oldRes['itemsPerSecond']
+        mark = ''
+        if ratio < 1 - tolerance:
+            regressions.append(key)
+            mark = '  <-- regression'
+        print('{0}: {1:.3g} -> {2:.3g} items/s ({3:.2f}x){4}'.format(
+            key, oldRes['itemsPerSecond'], res['itemsPerSecond'], ratio,
+            mark))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Throughput benchmark of ParSeq transforms.')
+    parser.add_argument('--counts', nargs='+', type=int,
+                        default=[10, 100, 1000, 10000])
+    parser.add_argument('--modes', nargs='+', choices=allModes,
+                        default=list(allModes))
+    parser.add_argument('--dims', nargs='+', type=int, choices=(1, 2, 3),
+                        default=[1, 2, 3])
+    parser.add_argument('--costs', nargs='+', choices=list(nRepeats),
+                        default=list(nRepeats))
+    parser.add_argument('--workers', type=int,
+                        default=max(multiprocessing.cpu_count()//2, 2))
+    parser.add_argument('--memoryLimit', type=float, default=2.,
+                        help='in GB, of the data of one case')
+    parser.add_argument('--out', default='benchmark_transforms.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        return 1 if compare(*args.compare, tolerance=args.tolerance) else 0
+
+    syslogger.setLevel(logging.WARNING)  # no per item log lines
+    results = benchmark(args.counts, args.modes, args.dims, args.costs,
+                        args.workers, args.memoryLimit*2**30)
+    with open(args.out, 'w') as f:
+        json.dump(OrderedDict(environment=get_environment(),
+                              results=results), f, indent=1)
+    print('saved to {0}'.format(args.out))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Test of the automatic choice between serial, threaded and multiprocess
+execution of a transform with nThreads = nProcesses = 'auto'."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import time
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+import parseq.core.profiling as cpr
+import parseq.core.autotune as cat
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2., sleep=0.)
+    nThreads = 'auto'
+    nProcesses = 'auto'
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        time.sleep(data.transformParams['sleep'])  # releases the GIL
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+def _test_model():
+    model = cat.CostModel()
+    model.maxWorkers = 4
+    assert model.choose(['thread', 'process'], 100) == ('serial', 1)
+    model.add_serial(1e-5)
+    assert model.choose(['thread', 'process'], 100) == ('serial', 1)
+    model.add_serial(1.)
+    model.itemTime = 1.
+    assert model.choose(['process'], 100) == ('process', 4)
+    assert model.choose(['process'], 1) == ('serial', 1)
+    # few items: no new processes, the running ones are taken
+    model.itemTime = 0.1
+    assert model.choose(['process'], 2) == ('serial', 1)
+    assert model.choose(['process'], 2, nStarted={'process': 2}) == \
+        ('process', 2)
+    # huge transfers keep it serial
+    assert model.choose(['process'], 100, inBytes=2**31) == ('serial', 1)
+    # GIL bound threads do not help
+    model.add_run('thread', 100, 4, 100*model.itemTime)
+    model.threadEfficiency = 0.
+    assert model.choose(['thread'], 100) == ('serial', 1)
+
+
+def _test(nItems=8):
+    csi.withGUI = False
+    node1, node2 = Node1(), Node2()
+    tr = Scale(node1, node2)
+    tr.costModel.maxWorkers = 4
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 100)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+
+    # cheap: serial after measuring the first item, no pools started
+    cpr.clear()
+    tr.run(dataItems=items)
+    workers = set(rec['worker'] for rec in cpr.get_records(name='scale'))
+    assert workers == set(['main']), workers
+    assert cwo.get_pool_size('process') == 0
+    for i, it in enumerate(items):
+        assert np.allclose(it.z, x*(i+1)*2)
+
+    # expensive and GIL free: switches to threads after the first item(s)
+    cpr.clear()
+    tr.run(params=dict(sleep=0.05), dataItems=items)
+    workers = [rec['worker'] for rec in cpr.get_records(name='scale')]
+    assert workers[0] == 'main'
+    assert workers[-1].startswith('thread'), workers
+    cpr.clear()
+    tr.run(dataItems=items)  # now known to be expensive
+    workers = set(rec['worker'] for rec in cpr.get_records(name='scale'))
+    assert all(w.startswith('thread') for w in workers), workers
+    assert tr.costModel.threadEfficiency > 0.5, tr.costModel.threadEfficiency
+    assert cwo.get_pool_size('process') == 0
+
+    # a single item never goes to a pool
+    cpr.clear()
+    tr.run(dataItems=items[:1])
+    assert cpr.get_records(name='scale')[0]['worker'] == 'main'
+    for i, it in enumerate(items):
+        assert np.allclose(it.z, x*(i+1)*2)
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test_model()
+    _test()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Test of batched transforms. The data items of equal shapes must be
+transformed by one call of run_main_batch(), the other ones by run_main(),
+with the same results, in both the node-by-node and the pipelined runs."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+from collections import OrderedDict, Counter
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+
+nCalls = Counter()
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Node3(cno.Node):
+    name = 'shifted'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        nCalls['scale'] += 1
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+    @classmethod
+    def run_main_batch(cls, batch):
+        nCalls['scale batch'] += 1
+        batch.z = batch.y * batch.get_param('factor')[:, None]
+        return True
+
+
+class Shift(ctr.Transform):
+    name = 'shift'
+    defaultParams = dict(offset=1.)
+    inArrays = ['z']
+    outArrays = ['w']
+
+    @classmethod
+    def run_main(cls, data):
+        nCalls['shift'] += 1
+        data.w = data.z + data.transformParams['offset']
+        return True
+
+    @classmethod
+    def run_main_batch(cls, batch):
+        nCalls['shift batch'] += 1
+        batch.w = batch.z + batch.get_param('offset')[:, None]
+        return [offset >= 0 for offset in batch.get_param('offset')]
+
+
+def _test(nItems=6):
+    csi.withGUI = False
+    node1, node2, node3 = Node1(), Node2(), Node3()
+    Scale(node1, node2)
+    Shift(node2, node3)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 101)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    xOdd = np.linspace(0, 1, 51)
+    items.append(rootItem.insert_item({'x': xOdd, 'y': xOdd}, alias='odd'))
+    items[1].transformParams['offset'] = -1.  # a bad one by the batch
+
+    for runPipelined in (False, True):
+        csi.runPipelined = runPipelined
+        nCalls.clear()
+        csi.transforms['scale'].run(dataItems=items)
+        print('pipelined={0}: {1}'.format(runPipelined, dict(nCalls)))
+        assert nCalls == Counter(
+            {'scale batch': 1, 'shift batch': 1, 'scale': 1, 'shift': 1})
+        for i, item in enumerate(items[:-1]):
+            assert np.allclose(item.z, x*(i+1)*2.)
+            if i == 1:
+                assert item.state['shifted'] == 0
+            else:
+                assert np.allclose(item.w, x*(i+1)*2. + 1)
+                assert item.state['shifted'] == 1
+        assert np.allclose(items[-1].w, xOdd*2. + 1)
+        # the unstacked arrays are owned by the data items, not batch views
+        for item1, item2 in zip(items[:-2], items[1:-1]):
+            assert item1.z.base is None
+            assert not np.shares_memory(item1.z, item2.z)
+    csi.runPipelined = False
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+"""Test of the headless batch runner parseq.batch. This module also serves as
+the pipeline package given to the runner by `--pipeline`."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import json
+import shutil
+import tempfile
+from collections import OrderedDict
+import numpy as np
+import h5py
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.batch as pbt
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x', qUnit='eV')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x', qUnit='eV')
+    arrays['z'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+    nThreads = 2
+    inArrays = ['x', 'y']
+    outArrays = ['x', 'z']
+
+    @classmethod
+    def run_main(cls, data):
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+def make_pipeline(withGUI=False):
+    csi.pipelineName = 'batchCLI'
+    csi.appPath = os.path.dirname(os.path.abspath(__file__))
+    csi.withGUI = withGUI
+    node1, node2 = Node1(), Node2()
+    Scale(node1, node2)
+    csi.dataRootItem = csp.Spectrum('root')
+
+
+def _test(nItems=5):
+    cwd = os.getcwd()
+    tmpDir = tempfile.mkdtemp()
+    x = np.linspace(0, 1, 100)
+    fnames = []
+    for i in range(nItems):
+        fname = os.path.join(tmpDir, 'd{0}.dat'.format(i))
+        np.savetxt(fname, np.column_stack([x, x*(i+1)]))
+        fnames.append(fname)
+    outDir = os.path.join(tmpDir, 'out')
+    timingFile = os.path.join(tmpDir, 'timing.json')
+    try:
+        res = pbt.main(
+            ['-p', 'test_batchCLI', '-f'] + fnames +
+            ['--format', '{"dataSource": ["Col0", "Col1"]}', '-e', 'h5',
+             'txt', '-o', outDir, '-j', '3', '-t', timingFile])
+        assert res == 0
+        with open(timingFile) as f:
+            summary = json.load(f)
+        assert summary['nItems'] == nItems
+        assert summary['workers']['scale']['n'] == nItems
+        assert csi.transforms['scale'].nThreads == 3
+        with h5py.File(os.path.join(outDir, 'batchCLI.h5'), 'r') as f:
+            for i in range(nItems):
+                z = f['data/d{0}/z'.format(i)][()]
+                assert np.allclose(z, x*(i+1)*2)
+        assert len([fn for fn in os.listdir(outDir)
+                    if fn.endswith('.txt')]) == nItems*2
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""Test of reading the files of many inserted data items in threads: the
+data items are equal to those read one by one and come in the same order."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.columnfile as ccf
+import parseq.core.config as config
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+
+    @staticmethod
+    def run_main(data):
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+def insert(fnames, nThreads):
+    csi.nReadThreads = nThreads
+    rootItem = csi.dataRootItem
+    rootItem.childItems = []
+    csi.allLoadedItems[:] = []
+    group = rootItem.insert_item('group')
+    return [group] + group.insert_data(
+        fnames, dataFormat=dict(dataSource=['Col0', 'Col1']),
+        runDownstream=True)
+
+
+def _test(nFiles=12, size=1000):
+    csi.withGUI = False
+    Scale(Node1(), Node2())
+    csp.Spectrum('root')
+    tmpDir = tempfile.mkdtemp()
+    try:
+        x = np.linspace(0, 1, size)
+        fnames = []
+        for i in range(nFiles):
+            fnames.append(os.path.join(tmpDir, 'd{0:02d}.dat'.format(i)))
+            np.savetxt(fnames[-1], np.column_stack([x, x*(i+1)]))
+        fnames.insert(3, os.path.join(tmpDir, 'missing.dat'))
+
+        readThreads = set()
+        read_columns = ccf.read_columns
+
+        def read_columns_recorded(*args, **kwargs):
+            readThreads.add(threading.get_ident())
+            return read_columns(*args, **kwargs)
+
+        ccf.read_columns = read_columns_recorded
+        try:
+            serialItems = insert(fnames, 1)
+            assert readThreads == {threading.get_ident()}
+            readThreads.clear()
+            items = insert(fnames, 4)
+            assert len(readThreads) > 1
+            assert threading.get_ident() not in readThreads
+        finally:
+            ccf.read_columns = read_columns
+
+        assert [it.alias for it in items] == \
+            [it.alias for it in serialItems]
+        assert len(items) == nFiles + 2  # the group, the missing file
+        assert items[0].alias == 'group'
+        assert [it.alias for it in csi.allLoadedItems] == \
+            ['d{0:02d}'.format(i) for i in range(3)] + ['missing'] + \
+            ['d{0:02d}'.format(i) for i in range(3, nFiles)]
+        for it, serialIt in zip(items[1:], serialItems[1:]):
+            assert it.state == serialIt.state, it.alias
+            if it.alias == 'missing':
+                assert it.state['raw'] == csp.cco.DATA_STATE_NOTFOUND
+                continue
+            assert np.all(it.y == serialIt.y)
+            assert np.allclose(it.z, serialIt.y*2)  # run downstream
+        assert csi.recentlyLoadedItems == items[1:]
+        savedPath = config.get(config.configLoad, 'Data', 'raw')
+        assert savedPath.endswith('d{0:02d}.dat'.format(nFiles-1)), savedPath
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
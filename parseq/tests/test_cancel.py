@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""Test of timeouts and cancellation of pool tasks and transforms. A task that
+exceeds the timeout is aborted and its worker is replaced. A cancelled run
+skips its pending items; a task that polls `progress.isCancelled` stops
+early. A cancelled run also stops the downstream transforms that are still
+waiting in its execution plan."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.commons as cco
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'waited'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Wait(ctr.Transform):
+    name = 'wait'
+    defaultParams = dict(delay=0.1)
+
+    @classmethod
+    def run_main(cls, data, progress):
+        t0 = time.time()
+        while time.time() - t0 < data.transformParams['delay']:
+            if progress.isCancelled:
+                return
+            time.sleep(0.01)
+        data.z = data.y * 2
+        return True
+
+
+class Node3(cno.Node):
+    name = 'branch1'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+class Node4(cno.Node):
+    name = 'branch2'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['v'] = dict(role='yleft')
+
+
+class Branch1(ctr.Transform):
+    name = 'branch1'
+    defaultParams = dict(branchDelay=0.)
+    nCalls = 0
+
+    @classmethod
+    def run_main(cls, data):
+        cls.nCalls += 1
+        time.sleep(data.transformParams['branchDelay'])
+        data.w = data.z + 1
+        return True
+
+
+class Branch2(ctr.Transform):
+    name = 'branch2'
+    defaultParams = dict(branchDelay=0.)
+    nCalls = 0
+
+    @classmethod
+    def run_main(cls, data):
+        cls.nCalls += 1
+        time.sleep(data.transformParams['branchDelay'])
+        data.v = data.z + 2
+        return True
+
+
+def sleep_main(data):
+    time.sleep(data.transformParams['delay'])
+    return True
+
+
+def wait_main(data, progress):
+    t0 = time.time()
+    while time.time() - t0 < data.transformParams['delay']:
+        if progress.isCancelled:
+            return
+        time.sleep(0.01)
+    return True
+
+
+def make_items(delays):
+    items = []
+    for i, delay in enumerate(delays):
+        item = cwo.DataProxy()
+        item.alias = 'd{0}'.format(i)
+        item.transformParams = dict(delay=delay)
+        items.append(item)
+    return items
+
+
+def _test_timeout(workerType, nWorkers=2):
+    pool = cwo.get_pool(workerType, nWorkers)
+    items = make_items([0.05, 5.] + [0.05]*4)
+
+    def put_in(runId, index, item):
+        return pool.put_in_data(
+            runId, index, item, sleep_main, 'sleep', [], [],
+            inFields=('transformParams', 'alias'))
+
+    t0 = time.time()
+    errors = {}
+    for msg in pool.dispatch(items, put_in, nWorkers, timeout=0.5):
+        if msg[0] == 'done':
+            errors[msg[2]] = msg[5]
+    dt = time.time() - t0
+    print('{0}: dispatched in {1:.3f} s'.format(workerType, dt))
+    assert sorted(errors) == list(range(len(items)))
+    assert errors[1].startswith('Timed out')
+    assert all(errors[i] is None for i in errors if i != 1)
+    assert dt < 2.
+    assert pool.ensure_workers(nWorkers) == nWorkers
+
+
+def _test_cancel(nWorkers=2):
+    pool = cwo.get_pool('thread', nWorkers)
+    items = make_items([5.]*6)
+
+    def put_in(runId, index, item):
+        return pool.put_in_data(
+            runId, index, item, wait_main, 'wait', [], [],
+            inFields=('transformParams', 'alias'))
+
+    t0 = time.time()
+    threading.Timer(0.3, cwo.cancel_runs).start()
+    results = {}
+    for msg in pool.dispatch(items, put_in, nWorkers,
+                             startEpoch=cwo.get_epoch()):
+        if msg[0] == 'done':
+            results[msg[2]] = msg[4]
+    dt = time.time() - t0
+    print('cancelled in {0:.3f} s'.format(dt))
+    assert sorted(results) == list(range(len(items)))
+    assert all(res is None for res in results.values())
+    assert dt < 1.
+
+
+def _test_transform(nItems=6):
+    csi.withGUI = False
+    node1, node2, node3, node4 = Node1(), Node2(), Node3(), Node4()
+    Wait(node1, node2)
+    Branch1(node2, node3)
+    Branch2(node2, node4)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 100)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    threading.Timer(0.25, cwo.cancel_runs).start()
+    t0 = time.time()
+    errorItems = csi.transforms['wait'].run(
+        params=dict(delay=0.1), dataItems=items)
+    print('transform cancelled in {0:.3f} s'.format(time.time()-t0))
+    states = [it.state[node2.name] for it in items]
+    assert states[0] == cco.DATA_STATE_GOOD
+    assert states[-1] == cco.DATA_STATE_BAD
+    assert errorItems and errorItems[-1] is items[-1]
+
+    errorItems = csi.transforms['wait'].run(dataItems=items)  # not cancelled
+    assert not errorItems
+    assert Branch1.nCalls == Branch2.nCalls == nItems
+
+    # cancelled in the first branch: the second one does not run
+    Branch1.nCalls = Branch2.nCalls = 0
+    threading.Timer(0.25, cwo.cancel_runs).start()
+    csi.transforms['wait'].run(params=dict(delay=0., branchDelay=0.1),
+                               dataItems=items)
+    assert 0 < Branch1.nCalls < nItems, Branch1.nCalls
+    assert Branch2.nCalls == 0, Branch2.nCalls
+    assert all(it.state[node4.name] == cco.DATA_STATE_BAD for it in items)
+    assert ctr.get_active_plan() is None
+
+    # in a pool: the items cancelled before submission are not timed
+    tr = csi.transforms['wait']
+    tr.nThreads = 2
+    tr.inArrays, tr.outArrays = ['y'], ['z']
+    tr.run(params=dict(delay=0.05, branchDelay=0.), dataItems=items,
+           runDownstream=False)
+    assert all('wait' in it.transfortmTimes for it in items)
+    threading.Timer(0.1, cwo.cancel_runs).start()
+    tr.run(params=dict(delay=0.3), dataItems=items, runDownstream=False)
+    assert 'wait' in items[0].transfortmTimes  # ran and stopped early
+    assert 'wait' not in items[-1].transfortmTimes
+    tr.nThreads = 1
+    tr.inArrays, tr.outArrays = [], []
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test_timeout('thread')
+    _test_timeout('process')
+    _test_cancel()
+    _test_transform()
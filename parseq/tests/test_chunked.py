@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Test of the chunked processing of 3D stacks: a lazy hdf5 dataset passed
+frame-wise through a transformation into preallocated and memory mapped
+outputs."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+import numpy as np
+import h5py
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.chunked as cch
+
+
+class Node1(cno.Node):
+    name = 'stack'
+    arrays = OrderedDict()
+    arrays['t'] = dict(role='x')
+    arrays['frames'] = dict(role='3D', lazy=True, dtype='float32')
+
+
+class Node2(cno.Node):
+    name = 'processed'
+    arrays = OrderedDict()
+    arrays['t'] = dict(role='x')
+    arrays['framesN'] = dict(role='3D')
+    arrays['sums'] = dict(role='yleft')
+
+
+class Normalize(ctr.Transform):
+    name = 'normalize'
+    defaultParams = dict(factor=2.)
+    inArrays = ['t', 'frames']
+    outArrays = ['framesN', 'sums']
+    chunkAxis = 0
+    chunkLength = 3
+    nChunks = 0
+
+    @classmethod
+    def run_main(cls, data, progress):
+        assert len(data.frames) <= cls.chunkLength
+        assert len(data.t) == len(data.frames)
+        data.framesN = data.frames * data.transformParams['factor']
+        data.sums = data.framesN.sum(axis=(1, 2))
+        data.lastChunk = getattr(data, 'start', None), \
+            getattr(data, 'stop', None)
+        cls.nChunks += 1
+        return True
+
+
+def _test(nFrames=10, shape=(8, 6)):
+    csi.withGUI = False
+    node1, node2 = Node1(), Node2()
+    tr = Normalize(node1, node2)
+    assert node1.get_prop('frames', 'lazy') is True
+    assert node2.get_prop('sums', 'lazy') is False
+
+    frames = np.random.random((nFrames,) + shape)
+    t = np.arange(nFrames, dtype=float)
+    memmapMinSize = cch.memmapMinSize
+    tmpDir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpDir, 'stack.h5')
+        with h5py.File(fname, 'w') as f:
+            f['entry/t'] = t
+            f['entry/frames'] = frames
+
+        rootItem = csp.Spectrum('root')
+        item = rootItem.insert_data(
+            'silx:' + fname + '::/entry',
+            dataFormat=dict(dataSource=['t', 'frames']))[0]
+        assert item.state[node1.name] == 1, item.state
+        assert 'frames' not in item.__dict__
+        lazy = item.lazyArrays['frames']
+        assert lazy.shape == frames.shape
+        assert lazy.dtype == np.float32
+        assert item.check_shape() is True
+
+        # memory mapped outputs above a small size
+        cch.memmapMinSize = nFrames * shape[0] * shape[1] * 2
+        Normalize.nChunks = 0
+        tr.run(dataItems=[item])
+        assert item.error is None, item.error
+        assert Normalize.nChunks == (nFrames + 2) // 3
+        assert item.lastChunk == (9, 10)
+        assert 'frames' not in item.__dict__  # never read in full
+        assert isinstance(item.framesN, np.memmap)
+        assert item.framesN.shape == frames.shape
+        assert np.allclose(item.framesN, frames*2, rtol=1e-6)
+        assert not isinstance(item.sums, np.memmap)
+        assert np.allclose(item.sums, frames.sum(axis=(1, 2))*2, rtol=1e-5)
+
+        # the fingerprint does not read the lazy array
+        tr.skipUnchanged = True
+        Normalize.nChunks = 0
+        tr.run(dataItems=[item])
+        tr.run(dataItems=[item])
+        assert Normalize.nChunks == (nFrames + 2) // 3
+        assert 'frames' not in item.__dict__
+
+        # other access reads the lazy array in full
+        assert np.allclose(item.frames, frames, rtol=1e-6)
+        assert item.frames.dtype == np.float32
+        assert not item.lazyArrays
+
+        # an in-memory input of one chunk runs as a whole
+        tr.skipUnchanged = False
+        Normalize.chunkLength = nFrames
+        tr.run(dataItems=[item])
+        assert item.lastChunk == (None, None)
+        assert not isinstance(item.framesN, np.memmap)
+    finally:
+        cch.memmapMinSize = memmapMinSize
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
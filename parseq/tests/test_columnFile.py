@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Test of the parsing engines of column files: the fast engine gives the
+same columns as np.genfromtxt for regular, ragged and non-numeric files; the
+single-pass reading gives the same header and columns as reading the header
+and the data separately."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+import gzip
+import warnings
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.commons as cco
+import parseq.core.nodes as cno
+import parseq.core.spectra as csp
+import parseq.core.columnfile as ccf
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+def genfromtxt(fname, **kw):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        return np.genfromtxt(fname, unpack=True, encoding="utf-8", **kw)
+
+
+def _test():
+    csi.withGUI = False
+    Node1()
+    tmpDir = tempfile.mkdtemp()
+    texts = dict(
+        regular='# x y z\n# comment\n1 2 3\n4 5 6\n7 8 9\n',
+        longer='header line\n1 2 3 4\n5 6 7\n8 9 10 11 12\n',  # extra cols
+        nonNumeric='1 2 3\n4 nan 6\n7 - 9\n',
+        shorter='1 2 3\n4 5\n7 8 9\n')
+    kws = dict(regular=dict(usecols=[0, 1, 2]),
+               longer=dict(skip_header=1, usecols=[0, 1, 2]),
+               nonNumeric=dict(usecols=[0, 1, 2]),
+               shorter=dict(usecols=[0, 1]))
+    try:
+        fnames = {}
+        for key, txt in texts.items():
+            fnames[key] = os.path.join(tmpDir, key + '.dat')
+            with open(fnames[key], 'w') as f:
+                f.write(txt)
+
+        for key, fname in fnames.items():
+            expected = genfromtxt(fname, **kws[key])
+            for parser in ccf.PARSERS:
+                kw = dict(kws[key], parser=parser)
+                arrs = ccf.read_columns(fname, kw)
+                assert arrs.shape == expected.shape, (key, parser)
+                assert np.allclose(arrs, expected, equal_nan=True), \
+                    (key, parser)
+                assert 'parser' in kw  # not consumed
+        # rows shorter than needed fail in both engines
+        for parser in ccf.PARSERS:
+            try:
+                ccf.read_columns(fnames['shorter'], dict(usecols=[0, 1, 2],
+                                                         parser=parser))
+            except ValueError:
+                pass
+            else:
+                raise AssertionError('a too short row must fail')
+        # options that only genfromtxt has
+        arrs = ccf.read_columns(fnames['regular'], dict(skip_footer=1))
+        assert arrs.shape == (3, 2)
+        arrs = ccf.read_columns(fnames['regular'], {}, maxRows=2)
+        assert arrs.shape == (3, 2)
+        try:
+            ccf.read_columns(fnames['regular'], dict(parser='unknown'))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('an unknown parser must fail')
+
+        # the parser is a key of dataFormat
+        rootItem = csp.Spectrum('root')
+        for parser in ccf.PARSERS:
+            item = rootItem.insert_data(fnames['longer'], dataFormat=dict(
+                dataSource=['Col0', 'Col2+Col1'], skiprows=1,
+                parser=parser))[0]
+            assert item.state['raw'] == 1, item.state
+            assert np.allclose(item.x, [1, 5, 8])
+            assert np.allclose(item.y, [5, 13, 19])
+
+        # single pass over the file
+        txt = 'scan 1\ndate today\n#S 1\nEnergy I0\n1 2\n3 4\n# mid\n5 6\n'
+        fnames['header'] = os.path.join(tmpDir, 'header.dat')
+        fnames['headerGz'] = os.path.join(tmpDir, 'header.dat.gz')
+        with open(fnames['header'], 'w') as f:
+            f.write(txt)
+        with gzip.open(fnames['headerGz'], 'wt') as f:
+            f.write(txt)
+        for kw in (dict(skiprows=4), dict(lastSkipRowContains='Energy')):
+            kwSeparate = dict(kw, usecols=[0, 1])
+            header = cco.get_header(fnames['header'], kwSeparate,
+                                    searchAllLines=True)
+            kwSeparate['skip_header'] = kwSeparate.pop('skiprows', 0)
+            expected = genfromtxt(fnames['header'], **kwSeparate)
+            for fname in (fnames['header'], fnames['headerGz']):
+                res = ccf.read_column_file(fname, dict(kw, usecols=[0, 1]))
+                assert res[0] == header, (kw, res[0], header)
+                assert np.all(res[1] == expected)
+                assert np.all(res[1] == [[1, 3, 5], [2, 4, 6]])
+        item = rootItem.insert_data(fnames['headerGz'], dataFormat=dict(
+            dataSource=['Col0', 'Col1'], lastSkipRowContains='Energy'))[0]
+        assert np.all(item.y == [2, 4, 6])
+        assert item.meta['text'].startswith('scan 1\ndate today\n#S 1\n')
+        assert item.meta['text'].endswith('# mid\n')
+    finally:
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
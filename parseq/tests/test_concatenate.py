@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""Test of loading several files as one concatenated data item: the parts
+are joined in their order, the sums of the parts are preallocated and
+accumulated in float64, the result does not depend on the number of reading
+threads."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+import numpy as np
+import h5py
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.spectra as csp
+import parseq.core.h5pool as chp
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft', dtype=np.float32)
+
+
+def insert(fnames, df, concatenate, nThreads):
+    csi.nReadThreads = nThreads
+    return csi.dataRootItem.insert_data(
+        fnames, dataFormat=df, concatenate=concatenate)[0]
+
+
+def _test(nFiles=9, size=1000):
+    csi.withGUI = False
+    Node1()
+    csp.Spectrum('root')
+    nReadThreads = csi.nReadThreads
+    tmpDir = tempfile.mkdtemp()
+    try:
+        fnames, xs, ys = [], [], []
+        for i in range(nFiles):
+            xs.append(np.arange(size) + i*size)
+            ys.append(np.full(size, 0.1, dtype=np.float32) + i)
+            fnames.append(os.path.join(tmpDir, 'd{0}.dat'.format(i)))
+            np.savetxt(fnames[-1], np.column_stack([xs[-1], ys[-1]]))
+        df = dict(dataSource=['Col0', 'Col1'])
+
+        readThreads = set()
+        read_file = csp.Spectrum.read_file
+
+        def read_file_recorded(self, *args, **kwargs):
+            readThreads.add(threading.get_ident())
+            return read_file(self, *args, **kwargs)
+
+        csp.Spectrum.read_file = read_file_recorded
+        try:
+            for nThreads in (1, 4):
+                readThreads.clear()
+                item = insert(fnames, df, (0, False), nThreads)
+                assert item.state['raw'] == 1, item.state
+                assert np.all(item.x == np.concatenate(xs))
+                assert np.allclose(item.y, np.concatenate(ys))
+                assert item.y.dtype == np.float32
+                assert item.madeOf == fnames[-1]
+                assert item.concatenateOf == fnames
+                if nThreads == 1:
+                    assert readThreads == {threading.get_ident()}
+                else:
+                    assert len(readThreads) > 1
+                    assert threading.get_ident() not in readThreads
+        finally:
+            csp.Spectrum.read_file = read_file
+
+        # sums of the parts
+        concat = csp.Concatenation(3, axis=0, reduce=True)
+        for i in range(3):
+            concat.add(i, np.full(10**6, 0.1, dtype=np.float32))
+        res = concat.result()
+        assert res.dtype == np.float32 and res.shape == (3,)
+        expected = np.float32(np.float64(np.float32(0.1)) * 10**6)
+        assert np.all(res == expected), res  # not the float32 sum 100000.01
+        concat = csp.Concatenation(2, axis=1, reduce=True)
+        concat.add(0, np.ones((2, 3)))
+        concat.add(1, np.ones((3, 4)))
+        assert np.all(concat.result() == [[3], [3], [4], [4], [4]])
+        concat = csp.Concatenation(2)
+        concat.add(0, np.ones(3))
+        concat.add(1, None)
+        assert concat.result() is None
+
+        fname = os.path.join(tmpDir, 'scans.h5')
+        with h5py.File(fname, 'w') as f:
+            for i, (x, y) in enumerate(zip(xs, ys)):
+                f['entry{0}/x'.format(i)] = x
+                f['entry{0}/y'.format(i)] = y
+        urls = ['silx:{0}::/entry{1}'.format(fname, i) for i in range(nFiles)]
+        df = dict(dataSource=['x', 'y'])
+        for nThreads in (1, 4):
+            item = insert(urls, df, (0, True), nThreads)
+            assert item.state['raw'] == 1, item.state
+            assert np.all(item.x == [x.sum() for x in xs])
+            assert np.allclose(item.y, [y.sum(dtype=np.float64) for y in ys])
+
+        item = insert(fnames[:2] + [os.path.join(tmpDir, 'missing.dat')] +
+                      fnames[2:], dict(dataSource=['Col0', 'Col1']),
+                      (0, False), 4)
+        assert item.state['raw'] == csp.cco.DATA_STATE_NOTFOUND
+        assert item.x is None
+    finally:
+        csi.nReadThreads = nReadThreads
+        chp.close()
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+"""Test of the disk cache of transformation results. New data items with the
+same input arrays and parameters must be taken from the cache without calling
+run_main(), also with their scalar outputs and the fields of a dict return;
+the cache size must stay within its limit."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import shutil
+import tempfile
+from collections import OrderedDict, Counter
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.diskcache as cdc
+
+nCalls = Counter()
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2., zmax=None)
+    inArrays = ['y']
+    outArrays = ['z']
+    useDiskCache = True
+
+    @classmethod
+    def run_main(cls, data):
+        nCalls[cls.name] += 1
+        data.z = data.y * data.transformParams['factor']
+        data.transformParams['zmax'] = data.z.max()
+        return True
+
+
+class Node3(cno.Node):
+    name = 'summed'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['zsum'] = dict(role='0D')
+
+
+class Sum(ctr.Transform):
+    name = 'sum'
+    defaultParams = dict()
+    inArrays = ['z']
+    outArrays = ['zsum', 'zlabel']
+    useDiskCache = True
+    lastSum = None
+
+    @classmethod
+    def run_main(cls, data):
+        nCalls[cls.name] += 1
+        data.zsum = float(data.z.sum())  # a scalar output
+        data.zlabel = 'sum of {0}'.format(data.alias)
+        return dict(lastSum=data.zsum)  # sets Sum.lastSum
+
+
+def make_items(rootItem, nItems, x):
+    return [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                 alias='d{0}'.format(i))
+            for i in range(nItems)]
+
+
+def _test(nItems=10):
+    csi.withGUI = False
+    node1, node2, node3 = Node1(), Node2(), Node3()
+    Scale(node1, node2)
+    Sum(node2, node3)
+    scale = csi.transforms['scale']
+    tSum = csi.transforms['sum']
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 1001)
+    cacheDir = tempfile.mkdtemp()
+    try:
+        cache = cdc.set_disk_cache(cacheDir, maxSize=2**20)
+        items = make_items(rootItem, nItems, x)
+        scale.run(params=dict(factor=3.), dataItems=items)
+        assert nCalls['scale'] == nItems
+        assert nCalls['sum'] == nItems  # run downstream
+        zsums = [item.zsum for item in items]
+        lastSum = tSum.lastSum
+        assert lastSum == zsums[-1]
+        print(cache)
+
+        cache = cdc.set_disk_cache(cacheDir, maxSize=2**20)  # new session
+        assert len(cache.entries) == 2*nItems
+        items = make_items(rootItem, nItems, x)
+        tSum.lastSum = None
+        scale.run(params=dict(factor=3.), dataItems=items)
+        assert nCalls['scale'] == nItems  # all from the cache
+        # also the scalar outputs and the fields of a dict return:
+        assert nCalls['sum'] == nItems
+        assert [item.zsum for item in items] == zsums
+        assert isinstance(items[0].zsum, float)
+        assert items[-1].zlabel == 'sum of d{0}'.format(nItems-1)
+        assert tSum.lastSum == lastSum
+        for item in items:
+            assert item.state['summed'] == csp.cco.DATA_STATE_GOOD
+        for i, item in enumerate(items):
+            assert np.allclose(item.z, x*(i+1)*3.)
+            assert item.transformParams['zmax'] == (i+1)*3.
+        scale.run(params=dict(factor=4.), dataItems=items)
+        assert nCalls['scale'] == 2*nItems
+
+        cache = cdc.set_disk_cache(cacheDir, maxSize=10000)
+        assert cache.size <= 10000 and len(cache.entries) >= 1
+        print(cache)
+    finally:
+        cdc.set_disk_cache(None)
+        shutil.rmtree(cacheDir)
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,131 @@
+# -*- coding: utf-8 -*-
+"""Test of the dtype policy of node arrays: float32 arrays at reading, after
+serial and multiprocess transforms and in combinations accumulated in
+float64."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.commons as cco
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+import parseq.core.profiling as cpr
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    dtype = 'float32'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x', dtype='float64')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft', dtype=np.float32)
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @staticmethod
+    def run_main(data):
+        data.z = data.y * np.float64(data.transformParams['factor'])
+        assert data.z.dtype == np.float64
+        return True
+
+
+class Node3(cno.Node):
+    name = 'doubled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+class Double(ctr.Transform):
+    name = 'double'
+    defaultParams = {}
+
+    @staticmethod
+    def run_main(data):
+        data.w = data.z * 2
+        return True
+
+
+def _test(nItems=4, size=1000):
+    csi.withGUI = False
+    node1, node2, node3 = Node1(), Node2(), Node3()
+    tr = Scale(node1, node2)
+    Double(node2, node3)  # downstream, to have a pipelined run
+    assert node1.get_dtypes() == dict(x='float64', y='float32')
+    assert node2.get_own_arrays() == ['z']
+
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, size)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    for it in items:
+        assert it.x.dtype == np.float64
+        assert it.y.dtype == np.float32
+
+    tmpDir = tempfile.mkdtemp()
+    try:
+        fname = os.path.join(tmpDir, 'data.dat')
+        np.savetxt(fname, np.column_stack([x, x*3]))
+        item = rootItem.insert_data(
+            fname, dataFormat=dict(dataSource=['Col0', 'Col1'],
+                                   conversionFactors=[None, np.float64(2)]))[0]
+        assert item.x.dtype == np.float64
+        assert item.y.dtype == np.float32
+        assert np.allclose(item.y, x*6)
+    finally:
+        shutil.rmtree(tmpDir)
+
+    # in the calling thread and in processes, by transforms and pipelined
+    for runPipelined in (False, True):
+        csi.runPipelined = runPipelined
+        for nProcesses in (1, 2):
+            tr.nProcesses = nProcesses
+            cpr.clear()
+            for it in items:
+                it.z = None
+            tr.run(dataItems=items)
+            for i, it in enumerate(items):
+                assert it.error is None, it.error
+                assert it.z.dtype == np.float32
+                assert np.allclose(it.z, x*(i+1)*2)
+                assert np.allclose(it.w, x*(i+1)*4)
+        # float32 both ways: y to the workers and z back
+        assert cpr.get_summary()['scale']['nBytes'] == nItems * 2 * size * 4
+    csi.runPipelined = False
+
+    # the sum over data items is accumulated in float64
+    for it, val in zip(items, (2**24, 1, 1)):
+        it.y = np.full(size, val, dtype=np.float32)
+    combined = rootItem.insert_item(
+        items[:3], dataFormat={'combine': cco.COMBINE_SUM},
+        alias='sum', runDownstream=False)
+    assert combined.y.dtype == np.float32
+    assert np.all(combined.y == 2**24 + 2)
+    assert np.float32(2**24) + np.float32(1) + np.float32(1) == 2**24
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""Test of the execution plan of downstream transforms: a transform below
+converging branches and below several data groups runs once per data item, a
+recalculated combined item goes downstream within the plan and concurrent runs
+in two threads keep their own plans."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.commons as cco
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.profiling as cpr
+
+
+def make_node(nodeName, arrayName):
+    class N(cno.Node):
+        name = nodeName
+        arrays = OrderedDict()
+    N.arrays['x'] = dict(role='x')
+    N.arrays[arrayName] = dict(role='yleft')
+    return N()
+
+
+def make_transform(trName, fromNode, toNode, inName, outName):
+    def run_main(data):
+        setattr(data, outName, getattr(data, inName) + 1)
+        return True
+
+    class T(ctr.Transform):
+        name = trName
+        defaultParams = {}
+    T.run_main = staticmethod(run_main)
+    return T(fromNode, toNode)
+
+
+def make_items(rootItem, nItems, x):
+    return [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                 alias='d{0}'.format(i))
+            for i in range(nItems)]
+
+
+def _test(nItems=3):
+    """n1 -> n2 -> (n3, n4) -> n5 -> n6, the branches n3 and n4 converge at
+    n5."""
+    csi.withGUI = False
+    n1, n2, n3 = make_node('n1', 'y'), make_node('n2', 'a'), \
+        make_node('n3', 'b')
+    n4, n5, n6 = make_node('n4', 'c'), make_node('n5', 'd'), \
+        make_node('n6', 'e')
+    make_transform('t1', n1, n2, 'y', 'a')
+    make_transform('t2', n2, n3, 'a', 'b')
+    make_transform('t3', n2, n4, 'a', 'c')
+    make_transform('t4', n3, n5, 'b', 'd')
+    make_transform('t5', n4, n5, 'c', 'd')
+    make_transform('t6', n5, n6, 'd', 'e')
+
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 11)
+    items = make_items(rootItem, nItems, x)
+
+    cpr.clear()
+    csi.transforms['t1'].run(dataItems=items)
+    for name in csi.transforms:
+        for it in items:
+            nRuns = len(cpr.get_records(name=name, alias=it.alias))
+            assert nRuns == 1, (name, it.alias, nRuns)
+    for i, it in enumerate(items):
+        assert np.allclose(it.e, x*(i+1) + 4)
+    assert ctr.get_active_plan() is None
+
+    # a combined item of origin n2 is recalculated after t1 and goes
+    # downstream within the plan
+    combined = rootItem.insert_item(
+        items, dataFormat={'combine': cco.COMBINE_AVE},
+        originNodeName='n2', alias='ave', runDownstream=False)
+    cpr.clear()
+    csi.transforms['t1'].run(params=dict(), dataItems=items)
+    for name in ('t4', 't5', 't6'):
+        nRuns = len(cpr.get_records(name=name, alias='ave'))
+        assert nRuns == 1, (name, nRuns)
+    assert np.allclose(combined.e, x*np.mean(np.arange(1, nItems+1)) + 4)
+
+    # two data groups of different origins with common downstream
+    item = rootItem.insert_item({'x': x, 'b': x}, alias='atN3',
+                                originNodeName='n3')
+    cpr.clear()
+    ctr.run_transforms(items + [item], rootItem)
+    assert len(cpr.get_records(name='t6', alias='atN3')) == 1
+    assert len(cpr.get_records(name='t1', alias='atN3')) == 0
+    for it in items:
+        assert len(cpr.get_records(name='t6', alias=it.alias)) == 1
+    assert np.allclose(item.e, x + 2)
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2., delay=0.)
+
+    @classmethod
+    def run_main(cls, data):
+        time.sleep(data.transformParams['delay'])
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+class Shift(ctr.Transform):
+    name = 'shift'
+    defaultParams = dict(offset=1.)
+    threadNames = {}  # alias: name of the thread that shifted it
+
+    @classmethod
+    def run_main(cls, data):
+        cls.threadNames[data.alias] = threading.current_thread().name
+        time.sleep(0.05)
+        data.w = data.z + data.transformParams['offset']
+        return True
+
+
+def reset_pipeline():
+    csi.nodes.clear()
+    csi.transforms.clear()
+    csi.fits.clear()
+    del csi.modelDataColumns[:]
+    csi.dataRootItem = None
+    csi.selectedItems = []
+    csi.selectedTopItems = []
+
+
+def _test_threads(nItems=4):
+    """Two runs in two threads, the second one finishes its head transform
+    while the plan of the first one is being executed."""
+    csi.withGUI = False
+    reset_pipeline()
+    node1, node2, node3 = make_node('raw', 'y'), make_node('scaled', 'z'), \
+        make_node('shifted', 'w')
+    Scale(node1, node2)
+    Shift(node2, node3)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 11)
+    items = make_items(rootItem, 2*nItems, x)
+    groups = dict(a=(items[:nItems], 0.), b=(items[nItems:], 0.02))
+
+    def run(name):
+        its, delay = groups[name]
+        csi.transforms['scale'].run(params=dict(delay=delay), dataItems=its)
+
+    threads = [threading.Thread(target=run, args=(name,), name=name)
+               for name in groups]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for name, (its, delay) in groups.items():
+        for it in its:
+            assert Shift.threadNames[it.alias] == name, \
+                (it.alias, Shift.threadNames[it.alias])
+    for i, it in enumerate(items):
+        assert np.allclose(it.w, x*(i+1)*2 + 1)
+    assert ctr.get_active_plan() is None
+
+
+if __name__ == '__main__':
+    _test()
+    _test_threads()
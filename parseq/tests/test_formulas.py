@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""Test of the compiled data source formulas: their keys and values, the
+rejection of non-NumPy code and the compilation once per data format. The
+other strings of a data format are evaluated as literals only, also on the
+insert_item() path."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+import numpy as np
+import h5py
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.spectra as csp
+import parseq.core.formulas as cfm
+import parseq.core.h5pool as chp
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+def _test(nFiles=5, size=20):
+    csi.withGUI = False
+    Node1()
+    rootItem = csp.Spectrum('root')
+
+    cols = [np.arange(1, size+1)*(i+1.) for i in range(4)]
+    cases = [('Col3/col1', ['Col3', 'Col1'], cols[3]/cols[1]),
+             ('d[2]-d[0]', [2, 0], cols[2]-cols[0]),
+             ('np.log(Col2) + Col2', ['Col2'], np.log(cols[2])+cols[2]),
+             ('np.arange(3)', [], np.arange(3)),
+             ('"Col" + str(2)', ['Col2'], cols[2])]
+    for colStr, keys, expected in cases:
+        formula = cfm.compile_formula(colStr)
+        assert formula is cfm.compile_formula(colStr)  # cached
+        assert formula.keys == keys, (colStr, formula.keys)
+        assert formula.key is None
+        assert np.allclose(formula.evaluate_columns(cols), expected), colStr
+    formula = cfm.compile_formula('Col3/col1')
+    assert formula.columns == [3, 1]
+    # other keys are not columns, e.g. of an hdf5 item:
+    formula = cfm.compile_formula('d["I0"]/d["Col2"] + d[0]')
+    assert formula.columns == [2, 0]
+    assert cfm.compile_formula('entry/x').columns == []
+    for colStr, key in (('entry/data/x', 'entry/data/x'),
+                        ("'entry' + '/x'", 'entry/x'), ('d', 'd')):
+        formula = cfm.compile_formula(colStr)
+        assert formula.key == key and formula.keys == [key], colStr
+    # not executed, only names of hdf5 datasets:
+    for colStr in ('__import__("os").getcwd()', 'str(np)', 'np'):
+        assert cfm.compile_formula(colStr).key == colStr
+    marker = os.path.join(tempfile.gettempdir(), 'parseq_formula_ran')
+    for colStr in (
+            'np.ctypeslib.ctypes.CDLL("libc.so.6").system('
+            'b"touch {0}")'.format(marker),
+            'np.ctypeslib.ctypes.CDLL("libc.so.6").system(d[0])',
+            'np.load("{0}", allow_pickle=True)'.format(marker),
+            'np.load(d["f"], allow_pickle=True)', 'np.lib.npyio.load(d[1])',
+            'np.sum(d[1]).tofile("{0}")'.format(marker),
+            'np.sin(d[1]).__class__', 'd["x"].__class__', 'd["x"].tofile',
+            'np.__dict__[d[1]]', '__import__("os").getcwd(d["x"])',
+            'np.array(__import__("os").system("touch {0}"))'.format(marker),
+            'open(d["f"])', '(lambda: d[1])()', 'd[1](2)', 'np.sin(d[1]',
+            '[a for a in d[1]]', 'str(np) + d[1]'):
+        try:
+            cfm.compile_formula(colStr)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('{0} must fail'.format(colStr))
+    assert not os.path.exists(marker)
+
+    for exprStr, expected in (
+            ("'entry' + '/x'", 'entry/x'), ('(None, 5)', (None, 5)),
+            ('slice(1, -1)', slice(1, -1)), ('(1, 0)', (1, 0)), ('-2', -2),
+            ('["Col{0}".format(i) for i in range(1, 4) if i != 2]',
+             ['Col1', 'Col3'])):
+        assert cfm.literal_eval(exprStr) == expected, exprStr
+    touch = 'open(r"{0}", "w").close()'.format(marker)
+    for exprStr in (
+            touch, '{0} or "Col1"'.format(touch), 'slice({0})'.format(touch),
+            '"{0.__class__}".format(1)', '[{0} for i in range(2)]'.format(
+                touch), 'range(10**9)', '"a" * 10', 'np.arange(3)', 'Col1'):
+        try:
+            cfm.literal_eval(exprStr)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('{0} must fail'.format(exprStr))
+    assert not os.path.exists(marker)
+
+    tmpDir = tempfile.mkdtemp()
+    try:
+        fnames = []
+        for i in range(nFiles):
+            fnames.append(os.path.join(tmpDir, 'd{0}.dat'.format(i)))
+            np.savetxt(fnames[-1], np.column_stack(cols) * (i+1))
+        dataSource = ['col0', 'Col3/col1 + {0}'.format(nFiles)]
+        misses = cfm.compile_formula.cache_info().misses
+        for fname in fnames:
+            item = rootItem.insert_data(
+                fname, dataFormat=dict(dataSource=dataSource))[0]
+            assert item.state['raw'] == 1, item.state
+            assert np.allclose(item.y, 2 + nFiles)
+        # compiled once for all the files: for usecols and evaluation
+        assert cfm.compile_formula.cache_info().misses - misses == 2
+
+        # malicious strings of a data format are rejected, not run
+        for df in (dict(dataSource=['Col0', '{0} or "Col1"'.format(touch)]),
+                   dict(dataSource=['Col0', 'Col1'],
+                        conversionFactors=[None, 'slice({0})'.format(touch)]),
+                   dict(dataSource=['Col0', 'Col1'],
+                        conversionFactors=[None, 'lim({0}, 5)'.format(touch)]),
+                   dict(dataSource=['Col0', 'Col1'], conversionFactors=[
+                       None, 'transpose({0})'.format(touch)])):
+            item = rootItem.insert_item(fnames[0], dataFormat=df)
+            assert item.state['raw'] != 1 or item.y is None, df
+            assert not os.path.exists(marker), df
+        # the literal conversions work
+        item = rootItem.insert_item(fnames[0], dataFormat=dict(
+            dataSource=['Col0', 'Col1'], conversionFactors=[
+                'slice(1, -1)', 'slice(1, -1)']))
+        assert item.state['raw'] == 1, item.state
+        assert np.allclose(item.y, cols[1][1:-1])
+
+        fname = os.path.join(tmpDir, 'data.h5')
+        with h5py.File(fname, 'w') as f:
+            f['entry/x'] = cols[0]
+            f['entry/I0'] = cols[1]
+            f['entry/I1'] = cols[2]
+        item = rootItem.insert_data('silx:{0}::/entry'.format(fname),
+                                    dataFormat=dict(dataSource=[
+                                        'x', 'np.log(d["I1"]/d["I0"])']))[0]
+        assert item.state['raw'] == 1, item.state
+        assert np.allclose(item.y, np.log(3/2))
+    finally:
+        chp.close()
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""Test of the pool of open hdf5 files: one open handle per file for all data
+items and metadata, reopening of changed files and LRU closing."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import numpy as np
+import h5py
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.spectra as csp
+import parseq.core.h5pool as chp
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+def write_file(fname, nScans, size, factor=1.):
+    x = np.linspace(0, 1, size)
+    with h5py.File(fname, 'w') as f:
+        for i in range(nScans):
+            entry = f.create_group('entry{0}'.format(i))
+            entry['x'] = x
+            entry['y'] = x * (i+1) * factor
+            entry['sample'] = 'sample {0}'.format(i)
+
+
+def _test(nScans=4, size=100):
+    csi.withGUI = False
+    Node1()
+    rootItem = csp.Spectrum('root')
+    tmpDir = tempfile.mkdtemp()
+    opened = []
+    silx_open = chp.silx_io.open
+
+    def silx_open_recorded(path):
+        opened.append(path)
+        return silx_open(path)
+
+    chp.silx_io.open = silx_open_recorded
+    try:
+        fname = os.path.join(tmpDir, 'scans.h5')
+        write_file(fname, nScans, size)
+        df = dict(dataSource=['x', 'y'], metadata='sample')
+        items = [rootItem.insert_data(
+            'silx:{0}::/entry{1}'.format(fname, i), dataFormat=df)[0]
+            for i in range(nScans)]
+        for i, item in enumerate(items):
+            assert item.state['raw'] == 1, item.state
+            assert np.allclose(item.y, item.x * (i+1))
+            assert 'sample {0}'.format(i) in item.meta['text']
+        assert opened == [os.path.abspath(fname)]  # once for all the reads
+        assert list(chp.pool) == [os.path.abspath(fname)]
+
+        # a changed file is reopened; written as if by another process
+        write_file(fname + '.tmp', nScans, size*2, factor=10.)
+        os.replace(fname + '.tmp', fname)
+        data = chp.get_data('silx:{0}::/entry1/y'.format(fname))
+        assert len(opened) == 2
+        assert len(data) == size*2 and np.isclose(data[-1], 20)
+        try:
+            chp.get_data('silx:{0}::/entry1/nonExisting'.format(fname))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError('a missing dataset must fail')
+
+        # concurrent reads
+        urls = ['silx:{0}::/entry{1}/y'.format(fname, i % nScans)
+                for i in range(20)]
+        with ThreadPoolExecutor(4) as executor:
+            res = list(executor.map(chp.get_data, urls))
+        for i, arr in enumerate(res):
+            assert np.isclose(arr[-1], (i % nScans + 1) * 10)
+        assert len(opened) == 2
+
+        # the least recently used files are closed
+        chp.maxOpenFiles = 2
+        fnames = [os.path.join(tmpDir, 'f{0}.h5'.format(i)) for i in range(3)]
+        for fn in fnames:
+            write_file(fn, 1, size)
+            with chp.opened('silx:{0}::/entry0'.format(fn)) as group:
+                assert 'y' in group
+        assert list(chp.pool) == [os.path.abspath(fn) for fn in fnames[1:]]
+        chp.close(fnames[1])
+        assert list(chp.pool) == [os.path.abspath(fnames[2])]
+        chp.close()
+        assert not chp.pool
+    finally:
+        chp.silx_io.open = silx_open
+        chp.close()
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+"""Test of slices and sums of hdf5 datasets given in `dataFormat`: they are
+read as hyperslabs and accumulated block by block and are equal to those of
+the fully read arrays."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+import numpy as np
+import h5py
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.spectra as csp
+import parseq.core.chunked as cch
+import parseq.core.h5pool as chp
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+def _test(nFrames=50, shape=(30, 40)):
+    csi.withGUI = False
+    Node1()
+    rootItem = csp.Spectrum('root')
+    tmpDir = tempfile.mkdtemp()
+    chunkBytes = cch.chunkBytes
+    reads = []
+    getitem = cch.LazyArray.__getitem__
+
+    def getitem_recorded(self, key):
+        res = getitem(self, key)
+        reads.append(res.nbytes)
+        return res
+
+    cch.LazyArray.__getitem__ = getitem_recorded
+    try:
+        fname = os.path.join(tmpDir, 'stack.h5')
+        stack = np.random.default_rng(0).random((nFrames,) + shape)
+        with h5py.File(fname, 'w') as f:
+            f['entry/x'] = np.arange(nFrames, dtype=float)
+            f.create_dataset('entry/stack', data=stack.astype(np.float32),
+                             chunks=(4,) + shape)
+            f['entry/counts'] = np.arange(nFrames*6).reshape(nFrames, 6)
+        stack32 = stack.astype(np.float32)
+        frameBytes = stack32[0].nbytes
+        cch.chunkBytes = frameBytes * 10  # 8 frames, 2 hdf5 chunks
+        url = 'silx:{0}::/entry'.format(fname)
+
+        cases = [('sum=1,2', stack32.sum(axis=(1, 2), dtype=np.float64)),
+                 ('axis=-1,1', stack32.sum(axis=(-1, 1), dtype=np.float64)),
+                 (':,5,10', stack32[:, 5, 10]),
+                 ('::-1,2,3', stack32[::-1, 2, 3])]
+        for sliceStr, expected in cases:
+            reads.clear()
+            df = dict(dataSource=['x', 'stack'], slices=['', sliceStr])
+            item = rootItem.insert_data(url, dataFormat=df)[0]
+            assert item.state['raw'] == 1, (sliceStr, item.state)
+            assert np.allclose(item.y, expected), sliceStr
+            if sliceStr.startswith(':,'):
+                assert reads == [nFrames*frameBytes//np.prod(shape)]
+            elif 'sum' in sliceStr or 'axis' in sliceStr:
+                assert max(reads) == 8*frameBytes, reads
+                assert sum(reads) == stack32.nbytes
+
+        # the sum over the first axis is accumulated
+        arr = cch.LazyArray(url + '/stack')
+        assert np.allclose(arr.sum(axis=0, dtype=np.float64),
+                           stack32.sum(axis=0, dtype=np.float64))
+        counts = cch.LazyArray(url + '/counts')
+        res = csp.Spectrum.apply_slice_str(counts, 'sum=0')
+        assert res.dtype.kind == 'i'
+        assert np.all(res == np.arange(nFrames*6).reshape(nFrames, 6).sum(0))
+        assert np.all(counts.sum() == (nFrames*6)*(nFrames*6-1)//2)
+    finally:
+        cch.LazyArray.__getitem__ = getitem
+        cch.chunkBytes = chunkBytes
+        chp.close()
+        shutil.rmtree(tmpDir)
+
+
+if __name__ == '__main__':
+    _test()
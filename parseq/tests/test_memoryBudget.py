@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""Test of the memory budget of node arrays: eviction of intermediate arrays,
+their recalculation on access and pinning."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.profiling as cpr
+import parseq.core.memory as cme
+
+
+def make_node(nodeName, arrayName):
+    class N(cno.Node):
+        name = nodeName
+        arrays = OrderedDict()
+    N.arrays['x'] = dict(role='x')
+    N.arrays[arrayName] = dict(role='yleft')
+    return N()
+
+
+def make_transform(trName, fromNode, toNode, inName, outName):
+    def run_main(data):
+        setattr(data, outName, getattr(data, inName) + 1)
+        return True
+
+    class T(ctr.Transform):
+        name = trName
+        defaultParams = {}
+    T.run_main = staticmethod(run_main)
+    return T(fromNode, toNode)
+
+
+def get_evicted(items, key):
+    return [it for it in items if key not in it.__dict__]
+
+
+def _test(nItems=5, size=1000):
+    """n1 -> n2 -> n3 -> n4 with one array per node."""
+    csi.withGUI = False
+    nodes = [make_node('n1', 'y'), make_node('n2', 'a'), make_node('n3', 'b'),
+             make_node('n4', 'c')]
+    keys = 'y', 'a', 'b', 'c'
+    for i in range(3):
+        make_transform('t{0}'.format(i+1), nodes[i], nodes[i+1], keys[i],
+                       keys[i+1])
+    assert cme.get_evictable_arrays(nodes[0]) == []
+    assert cme.get_evictable_arrays(nodes[2]) == ['b']  # 'x' is upstream
+
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, size)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    setSize = x.nbytes  # of one node of one item
+
+    # no budget: everything stays
+    csi.transforms['t1'].run(dataItems=items)
+    assert not cme.resident
+    for key in keys:
+        assert not get_evicted(items, key)
+
+    # a budget of 4 array sets out of 3*nItems
+    csi.memoryBudget = 4 * setSize
+    cpr.clear()
+    csi.transforms['t1'].run(dataItems=items)
+    assert cme.residentSize <= csi.memoryBudget
+    assert not get_evicted(items, 'y')  # the data origin
+    assert not get_evicted(items, 'x')
+    assert len(get_evicted(items, 'a')) == nItems  # the oldest ones
+    assert len(get_evicted(items, 'c')) < nItems  # the most recent ones
+    assert cpr.get_summary()['t3']['n'] == nItems
+
+    # recalculation on access, from the nearest node in memory
+    it = get_evicted(items, 'c')[0]
+    assert it.evictedArrays['c'] == 'n4'
+    cpr.clear()
+    i = items.index(it)
+    assert np.allclose(it.c, x*(i+1) + 3)
+    assert np.allclose(it.a, x*(i+1) + 1)
+    for name in ('t1', 't2', 't3'):
+        assert len(cpr.get_records(name=name, alias=it.alias)) == 1, name
+    assert len(cpr.get_records()) == 3
+    assert not hasattr(it, 'nonExisting')
+
+    # the current node is not evicted
+    csi.currentNode = nodes[3]
+    csi.transforms['t1'].run(dataItems=items)
+    assert not get_evicted(items, 'c')
+    assert cme.residentSize > csi.memoryBudget  # n4 does not fit alone
+    csi.currentNode = None
+
+    # pinned nodes, e.g. while exporting
+    with cme.pinned([nodes[1]]):
+        csi.transforms['t1'].run(dataItems=items)
+        assert not get_evicted(items, 'a')
+    assert cme.is_pinned(nodes[1]) is False
+
+    # pipelined: the items are evicted as they pass
+    csi.runPipelined = True
+    cpr.clear()
+    csi.transforms['t1'].run(dataItems=items)
+    csi.runPipelined = False
+    assert cme.residentSize <= csi.memoryBudget
+    for i, it in enumerate(items):
+        assert np.allclose(it.c, x*(i+1) + 3)
+    csi.memoryBudget = None
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+"""Test of the pipelined run of several transforms. The results must be the
+same as with the node-by-node run, also for a combined data item that depends
+on the other data items. With a slow head transform, the first data item must
+reach the bottom node long before the head transform has finished all data.
+A transform below converging branches must run once per data item, after both
+branches. Under a memory budget, the arrays of the data items still in the
+pipeline must be protected."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import time
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.commons as cco
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+import parseq.core.profiling as cpr
+import parseq.core.memory as cme
+
+finishTimes = {}
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Node3(cno.Node):
+    name = 'shifted'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+class Node4(cno.Node):
+    name = 'squared'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['v'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2., delay=0.)
+    nThreads = 2
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        time.sleep(data.transformParams['delay'])
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+class Shift(ctr.Transform):
+    name = 'shift'
+    defaultParams = dict(offset=1.)
+
+    @classmethod
+    def run_main(cls, data):
+        data.w = data.z + data.transformParams['offset']
+        return True
+
+
+class Square(ctr.Transform):
+    name = 'square'
+    defaultParams = dict()
+    nThreads = 2
+    inArrays = ['w', 'alias']
+    outArrays = ['v']
+
+    @classmethod
+    def run_main(cls, data):
+        data.v = data.w**2
+        finishTimes[data.alias] = time.time()
+        return True
+
+
+def make_node(nodeName, arrayName):
+    class N(cno.Node):
+        name = nodeName
+        arrays = OrderedDict()
+    N.arrays['x'] = dict(role='x')
+    N.arrays[arrayName] = dict(role='yleft')
+    return N()
+
+
+def make_transform(trName, fromNode, toNode, inName, outName):
+    def run_main(data):
+        setattr(data, outName, getattr(data, inName) + 1)
+        return True
+
+    class T(ctr.Transform):
+        name = trName
+        defaultParams = {}
+    T.run_main = staticmethod(run_main)
+    return T(fromNode, toNode)
+
+
+def reset_pipeline():
+    csi.nodes.clear()
+    csi.transforms.clear()
+    csi.fits.clear()
+    del csi.modelDataColumns[:]
+    csi.dataRootItem = None
+    csi.selectedItems = []
+    csi.selectedTopItems = []
+
+
+def _test(nItems=8):
+    csi.withGUI = False
+    node1, node2, node3, node4 = Node1(), Node2(), Node3(), Node4()
+    Scale(node1, node2)
+    Shift(node2, node3)
+    Square(node3, node4)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 101)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    csi.transforms['scale'].run(dataItems=items)  # combine needs 'scaled'
+    combined = rootItem.insert_item(
+        items, dataFormat={'combine': cco.COMBINE_AVE},
+        originNodeName='scaled', alias='ave', runDownstream=False)
+    aveY = x * np.mean(np.arange(1, nItems+1))
+
+    for runPipelined, factor in zip((False, True), (2., 3.)):
+        csi.runPipelined = runPipelined
+        finishTimes.clear()
+        t0 = time.time()
+        errorItems = csi.transforms['scale'].run(
+            params=dict(factor=factor, delay=0.1), dataItems=items)
+        print('pipelined={0}: {1} items in {2:.3f} s, first result at '
+              '{3:.3f} s'.format(runPipelined, nItems, time.time()-t0,
+                                 min(finishTimes.values())-t0))
+        assert not errorItems
+        for i, item in enumerate(items):
+            assert np.allclose(item.v, (x*(i+1)*factor + 1)**2)
+        assert np.allclose(combined.v, (aveY*factor + 1)**2)
+        if runPipelined:
+            assert min(finishTimes.values()) - t0 < nItems * 0.1 / 2
+
+    # with a memory budget, the rerun of the combined item must not evict the
+    # arrays of the data items still in the pipeline
+    budgetCalls = []
+    enforce_budget = cme.enforce_budget
+
+    def enforce_budget_logged(isKept=None):
+        budgetCalls.append(isKept)
+        enforce_budget(isKept)
+
+    csi.memoryBudget = 1
+    cme.enforce_budget = enforce_budget_logged
+    try:
+        errorItems = csi.transforms['scale'].run(
+            params=dict(factor=2., delay=0.), dataItems=items)
+    finally:
+        cme.enforce_budget = enforce_budget
+        csi.memoryBudget = None
+    assert not errorItems
+    assert budgetCalls and None not in budgetCalls
+    for i, item in enumerate(items):
+        assert np.allclose(item.v, (x*(i+1)*2. + 1)**2)
+    assert np.allclose(combined.v, (aveY*2. + 1)**2)
+    csi.runPipelined = False
+    cwo.shutdown_pools()
+
+
+def _test_diamond(nItems=3):
+    """n1 -> n2 -> (n3, n4) -> n5 -> n6, the branches n3 and n4 converge at
+    n5."""
+    csi.withGUI = False
+    reset_pipeline()
+    n1, n2, n3 = make_node('n1', 'y'), make_node('n2', 'a'), \
+        make_node('n3', 'b')
+    n4, n5, n6 = make_node('n4', 'c'), make_node('n5', 'd'), \
+        make_node('n6', 'e')
+    make_transform('t1', n1, n2, 'y', 'a')
+    make_transform('t2', n2, n3, 'a', 'b')
+    make_transform('t3', n2, n4, 'a', 'c')
+    make_transform('t4', n3, n5, 'b', 'd')
+    make_transform('t5', n4, n5, 'c', 'd')
+    make_transform('t6', n5, n6, 'd', 'e')
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 11)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+
+    csi.runPipelined = True
+    cpr.clear()
+    errorItems = csi.transforms['t1'].run(dataItems=items)
+    csi.runPipelined = False
+    assert not errorItems
+    for name in ('t1', 't2', 't3', 't4', 't5', 't6'):
+        for it in items:
+            nRuns = len(cpr.get_records(name=name, alias=it.alias))
+            assert nRuns == 1, (name, it.alias, nRuns)
+    for it in items:
+        start = dict((rec['name'], rec['start'])
+                     for rec in cpr.get_records(alias=it.alias))
+        assert start['t6'] >= max(start['t4'], start['t5'])
+    for i, it in enumerate(items):
+        assert np.allclose(it.e, x*(i+1) + 4)
+
+
+if __name__ == '__main__':
+    _test()
+    _test_diamond()
@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+"""Test of the timing records and of the run time profiling of transforms in
+the calling thread and in process workers."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import csv
+import json
+import tempfile
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+import parseq.core.profiling as cpr
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Node3(cno.Node):
+    name = 'shifted'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+def scale_array(y, factor):
+    return y * factor
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+    nProcesses = 2
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        data.z = scale_array(data.y, data.transformParams['factor'])
+        return True
+
+
+class Shift(ctr.Transform):
+    name = 'shift'
+    defaultParams = dict(offset=1.)
+
+    @classmethod
+    def run_main(cls, data):
+        data.w = data.z + data.transformParams['offset']
+        return True
+
+
+def _test(nItems=6, size=2**18):
+    csi.withGUI = False
+    node1, node2, node3 = Node1(), Node2(), Node3()
+    Scale(node1, node2)
+    Shift(node2, node3)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, size)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+
+    cpr.clear()
+    cpr.set_profiling('scale')
+    cpr.set_profiling('shift')
+    csi.transforms['scale'].run(dataItems=items)
+    summary = cpr.get_summary()
+    print(json.dumps(summary, indent=1))
+    assert summary['scale']['n'] == nItems
+    assert summary['shift']['n'] == nItems
+    assert summary['scale']['nBytes'] == nItems * 2 * x.nbytes
+    assert summary['shift']['nBytes'] == 0
+    records = cpr.get_records(name='scale', alias='d0')
+    assert len(records) == 1
+    assert records[0]['worker'].startswith('process')
+    assert cpr.get_records(name='shift')[0]['worker'] == 'main'
+
+    for name in ('scale', 'shift'):
+        stats = cpr.get_profile(name)
+        assert stats is not None
+        funcNames = [key[2] for key in stats.stats]
+        assert 'run_main' in funcNames
+    assert 'scale_array' in [key[2] for key in cpr.get_profile('scale').stats]
+    cpr.print_profile('scale', nLines=5)
+
+    cpr.set_profiling('scale', False)
+    cpr.set_profiling('shift', False)
+    cpr.clear()
+    csi.transforms['scale'].run(dataItems=items)
+    assert cpr.get_profile('scale') is None
+
+    tmpDir = tempfile.mkdtemp()
+    fname = os.path.join(tmpDir, 'records.csv')
+    cpr.export_csv(fname, name='scale')
+    with open(fname, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == nItems
+    assert set(rows[0]) == set(cpr.recordFields)
+    fname = os.path.join(tmpDir, 'records.json')
+    cpr.export_json(fname)
+    with open(fname) as f:
+        res = json.load(f)
+    assert len(res['records']) == 2*nItems
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""Test of the batched progress reporting via progress boards in the calling
+thread, in threads and in processes."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import time
+import threading
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+import parseq.core.progress as cpg
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'slow'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Slow(ctr.Transform):
+    name = 'slow'
+    defaultParams = dict(nSteps=4, dt=0.05)
+    inArrays = ['y']
+    outArrays = ['z']
+    progressTimeDelta = 0.1
+
+    @classmethod
+    def run_main(cls, data, progress):
+        nSteps = data.transformParams['nSteps']
+        for i in range(nSteps):
+            time.sleep(data.transformParams['dt'])
+            progress.value = (i+1) / nSteps
+        data.z = data.y * 2
+        return True
+
+
+class Batches(object):
+    """Collects the emitted progress batches in place of a data tree view."""
+
+    def __init__(self):
+        self.batches = []
+        self.transformProgressBatch = self
+
+    def emit(self, values):
+        self.batches.append(values)
+
+
+def _test_board():
+    batches = []
+    board = cpg.ProgressBoard(['a', 'b', 'c'], batches.append, 0.05)
+    assert board in cpg.boards
+    board.values[0] = 0.5
+    board.values[2] = 1.
+    time.sleep(0.2)
+    assert batches == [[['a', 0.5], ['c', 1.]]], batches
+    board.values[0] = 1.
+    board.close()
+    assert batches[-1] == [['a', 1.]]
+    time.sleep(0.2)
+    assert cpg.aggregator is None
+
+
+def _test(nItems=6):
+    csi.withGUI = False
+    node1, node2 = Node1(), Node2()
+    tr = Slow(node1, node2)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 100)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    args = tr._get_args(None)
+    tr.run_pre({}, items)
+    tree = Batches()
+    node2.widget = type('Widget', (), dict(tree=tree))()
+    tr.sendSignals = True  # only the progress signals are used below
+
+    for workerType in ('thread', 'process'):
+        del tree.batches[:]
+        pool = cwo.get_pool(workerType, 3)
+        nThreads = threading.active_count()
+        tr._run_multi_worker(pool, items, args, 3)
+        assert threading.active_count() <= nThreads + 1  # aggregator
+        final = dict(pair for batch in tree.batches for pair in batch)
+        assert final == dict((it.alias, 1.) for it in items), final
+        assert max(len(batch) for batch in tree.batches) > 1, \
+            'progress is not batched'
+        assert all(0 <= value <= 1 for batch in tree.batches
+                   for alias, value in batch)
+        for i, it in enumerate(items):
+            assert np.allclose(it.z, x*(i+1)*2)
+
+    del tree.batches[:]
+    tr._run_single_worker(items[0], args)
+    assert tree.batches[-1] == [[items[0].alias, 1.]], tree.batches
+    assert len(tree.batches) > 1
+    time.sleep(0.2)
+    assert not cpg.boards
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test_board()
+    _test()
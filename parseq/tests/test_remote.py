@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""Test of the remote worker pool with two worker daemons on localhost. This
+module is also imported by the daemons to unpickle `Scale.run_main`. Timed
+out tasks must be aborted by the daemons."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import time
+import socket
+import threading
+import subprocess
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+import parseq.core.profiling as cpr
+
+authkey = 'test secret'
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2., dt=0.05)
+    nProcesses = 2
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        time.sleep(data.transformParams['dt'])
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+def get_free_port():
+    sock = socket.socket()
+    sock.bind(('localhost', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def start_daemons(port, n):
+    testDir = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PARSEQ_AUTHKEY=authkey,
+               PYTHONPATH=os.path.dirname(os.path.dirname(testDir)))
+    proc = subprocess.Popen(
+        [sys.executable, '-m', 'parseq.core.remote', '-p', str(port),
+         '-n', str(n), '--path', testDir], cwd=testDir, env=env)
+    for i in range(n):
+        for attempt in range(100):
+            try:
+                socket.create_connection(('localhost', port+i)).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError('the daemon did not start')
+    return proc
+
+
+def _test(nItems=10):
+    import test_remote as trm  # importable by the daemons, unlike __main__
+    csi.withGUI = False
+    node1, node2 = trm.Node1(), trm.Node2()
+    trm.Scale(node1, node2)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 1000)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+
+    port = get_free_port()
+    proc = start_daemons(port, 2)
+    try:
+        cwo.set_remote_workers(
+            ['localhost:{0}'.format(port), ('localhost', port+1)], authkey)
+        cpr.clear()
+        csi.transforms['scale'].run(dataItems=items)
+        for i, it in enumerate(items):
+            assert it.error is None, it.error
+            assert np.allclose(it.z, x*(i+1)*2)
+        workers = [rec['worker'] for rec in cpr.get_records(name='scale')]
+        assert set(workers) == set(['remote localhost:{0}'.format(port+i)
+                                    for i in range(2)]), set(workers)
+        assert cpr.get_summary()['scale']['nBytes'] == nItems * 2 * x.nbytes
+
+        # timed out tasks are aborted by the daemons, which serve the new
+        # connections at once, not after the aborted tasks
+        tr = csi.transforms['scale']
+        tr.timeout = 0.5
+        errorItems = tr.run(dict(dt=5.), dataItems=items[:2])
+        assert len(errorItems) == 2, errorItems
+        tr.timeout = None
+        cpr.clear()
+        t0 = time.time()
+        errorItems = tr.run(dict(dt=0.), dataItems=items)
+        assert time.time() - t0 < 3, time.time() - t0
+        assert not errorItems, errorItems
+        workers = set(rec['worker'] for rec in cpr.get_records(name='scale'))
+        assert all(w.startswith('remote') for w in workers), workers
+
+        # a wrong secret: the local processes take over
+        cwo.set_remote_workers(['localhost:{0}'.format(port)], 'wrong')
+        cpr.clear()
+        csi.transforms['scale'].run(dataItems=items)
+        workers = set(rec['worker'] for rec in cpr.get_records(name='scale'))
+        assert all(w.startswith('process') for w in workers), workers
+
+        # the daemons go away during a run: errors, no hanging
+        cwo.set_remote_workers(
+            ['localhost:{0}'.format(port+i) for i in range(2)], authkey)
+        assert cwo.get_remote_pool() is not None
+        threading.Timer(0.45, proc.terminate).start()
+        t0 = time.time()
+        errorItems = csi.transforms['scale'].run(dict(dt=0.3),
+                                                 dataItems=items)
+        assert time.time() - t0 < 10
+        assert 0 < len(errorItems) < nItems, len(errorItems)
+        proc.wait(5)
+
+        # no daemon is reachable: the local processes take over
+        cwo.set_remote_workers(['localhost:{0}'.format(port)], authkey)
+        assert cwo.get_remote_pool() is None
+        errorItems = csi.transforms['scale'].run(dict(dt=0.),
+                                                 dataItems=items)
+        assert not errorItems, errorItems
+    finally:
+        proc.terminate()
+        proc.wait(5)
+        cwo.set_remote_workers([], None)
+        cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test()
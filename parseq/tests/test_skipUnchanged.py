@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""Test of skipping the data items whose input arrays and transformation
+parameters have not changed since the previous run. After changing a parameter
+of one data item, only this item must be transformed again, in both the
+node-by-node and the pipelined runs."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+from collections import OrderedDict, Counter
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+
+nCalls = Counter()
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Node3(cno.Node):
+    name = 'shifted'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+    nThreads = 2
+    inArrays = ['y']
+    outArrays = ['z']
+    skipUnchanged = True
+
+    @classmethod
+    def run_main(cls, data):
+        nCalls[cls.name] += 1
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+class Shift(ctr.Transform):
+    name = 'shift'
+    defaultParams = dict(offset=1.)
+    skipUnchanged = True
+
+    @classmethod
+    def run_main(cls, data):
+        nCalls[cls.name] += 1
+        data.w = data.z + data.transformParams['offset']
+        return True
+
+
+def _test(nItems=10):
+    csi.withGUI = False
+    node1, node2, node3 = Node1(), Node2(), Node3()
+    Scale(node1, node2)
+    Shift(node2, node3)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 101)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+    scale = csi.transforms['scale']
+
+    scale.run(dataItems=items)
+    assert nCalls['scale'] == nCalls['shift'] == nItems
+
+    for runPipelined in (False, True):
+        csi.runPipelined = runPipelined
+        nCalls.clear()
+        scale.run(dataItems=items)
+        assert nCalls['scale'] == nCalls['shift'] == 0  # all unchanged
+        items[3].transformParams['factor'] = 5.
+        scale.run(dataItems=items)
+        assert nCalls['scale'] == nCalls['shift'] == 1, nCalls
+        assert np.allclose(items[3].w, x*4*5. + 1)
+        items[4].y = items[4].y * 2  # new input array
+        scale.run(dataItems=items)
+        assert nCalls['scale'] == nCalls['shift'] == 2, nCalls
+        assert np.allclose(items[4].w, x*5*2*2. + 1)
+        items[3].transformParams['factor'] = 2.
+        items[4].y = items[4].y / 2
+        scale.run(dataItems=items)
+        print('pipelined={0}: {1}'.format(runPipelined, dict(nCalls)))
+    for i, item in enumerate(items):
+        assert np.allclose(item.w, x*(i+1)*2. + 1)
+    csi.runPipelined = False
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test()
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""Test of running transforms in the session-wide worker pools. The same pools
+must serve both transforms and several consecutive runs. The items of one run
+are dispatched to idle workers one by one, so that a slow item does not delay
+the items after it. Large arrays are exchanged with process workers via shared
+memory."""
+__author__ = "Konstantin Klementiev"
+__date__ = "17 Oct 2026"
+# !!! SEE CODERULES.TXT !!!
+
+import sys; sys.path.append('../..')  # analysis:ignore
+import os
+import time
+from collections import OrderedDict
+import numpy as np
+
+import parseq.core.singletons as csi
+import parseq.core.nodes as cno
+import parseq.core.transforms as ctr
+import parseq.core.spectra as csp
+import parseq.core.workers as cwo
+
+
+class Node1(cno.Node):
+    name = 'raw'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['y'] = dict(role='yleft')
+
+
+class Node2(cno.Node):
+    name = 'scaled'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['z'] = dict(role='yleft')
+
+
+class Node3(cno.Node):
+    name = 'shifted'
+    arrays = OrderedDict()
+    arrays['x'] = dict(role='x')
+    arrays['w'] = dict(role='yleft')
+
+
+class Scale(ctr.Transform):
+    name = 'scale'
+    defaultParams = dict(factor=2.)
+    nProcesses = 4
+    inArrays = ['y']
+    outArrays = ['z']
+
+    @classmethod
+    def run_main(cls, data):
+        data.z = data.y * data.transformParams['factor']
+        return True
+
+
+class Shift(ctr.Transform):
+    name = 'shift'
+    defaultParams = dict(offset=1.)
+    nThreads = 2
+    inArrays = ['z']
+    outArrays = ['w']
+
+    @classmethod
+    def run_main(cls, data, progress):
+        progress.value = 0.5
+        data.w = data.z + data.transformParams['offset']
+        return True
+
+
+def sleep_main(data):
+    time.sleep(data.transformParams['delay'])
+    return True
+
+
+def _test_dispatch(nWorkers=2):
+    pool = cwo.get_pool('thread', nWorkers)
+    delays = [0.5] + [0.05]*8
+    items = []
+    for i, delay in enumerate(delays):
+        item = cwo.DataProxy()
+        item.alias = 'd{0}'.format(i)
+        item.transformParams = dict(delay=delay)
+        items.append(item)
+
+    def put_in(runId, index, item):
+        return pool.put_in_data(
+            runId, index, item, sleep_main, 'sleep', [], [],
+            inFields=('transformParams', 'alias'))
+
+    t0 = time.time()
+    order = [msg[2] for msg in pool.dispatch(items, put_in, nWorkers)
+             if msg[0] == 'done']
+    dt = time.time() - t0
+    print('dispatched in {0:.3f} s, completion order {1}'.format(dt, order))
+    assert sorted(order) == list(range(len(delays)))
+    assert order[-1] == 0  # the slow one didn't block the others
+    assert dt < 0.5 + 0.05*2  # batches of 2 would take 0.5 + 0.05*4
+
+
+def square_main(data):
+    data.b = data.a**2
+    return True
+
+
+def _test_shared_memory(nItems=6, shape=(20, 128, 128)):
+    pool = cwo.get_pool('process', 3)
+    items = []
+    for i in range(nItems):
+        item = cwo.DataProxy()
+        item.alias = 'd{0}'.format(i)
+        item.a = np.full(shape, float(i))
+        items.append(item)
+    options = dict(sharedMemoryMinSize=2**20)
+    shmDir = '/dev/shm'
+    hasShmDir = os.path.isdir(shmDir)
+    if hasShmDir:
+        before = set(os.listdir(shmDir))
+
+    def put_in(runId, index, item):
+        return pool.put_in_data(runId, index, item, square_main, 'square',
+                                ['a'], ['b'], options=options)
+
+    t0 = time.time()
+    for msg in pool.dispatch(items, put_in, 3):
+        if msg[0] == 'done':
+            assert msg[5] is None, msg[5]
+            pool.get_out_data(items[msg[2]], msg[3])
+    print('{0} arrays of {1:.1f} MB each in {2:.3f} s'.format(
+        nItems, items[0].a.nbytes/2**20, time.time()-t0))
+    for i, item in enumerate(items):
+        assert item.b.shape == shape
+        assert np.all(item.b == i**2)
+    del items, item
+    if hasShmDir:  # all blocks are unlinked
+        assert set(os.listdir(shmDir)) <= before
+
+
+def _test(nItems=20):
+    csi.withGUI = False
+    node1, node2, node3 = Node1(), Node2(), Node3()
+    Scale(node1, node2)
+    Shift(node2, node3)
+    rootItem = csp.Spectrum('root')
+    x = np.linspace(0, 1, 1000)
+    items = [rootItem.insert_item({'x': x, 'y': x*(i+1)},
+                                  alias='d{0}'.format(i))
+             for i in range(nItems)]
+
+    for factor in (2., 3.):
+        t0 = time.time()
+        csi.transforms['scale'].run(params=dict(factor=factor),
+                                    dataItems=items)
+        print('{0} items in {1:.3f} s'.format(nItems, time.time()-t0))
+        for i, item in enumerate(items):
+            assert np.allclose(item.w, x*(i+1)*factor + 1)
+    print(cwo.pools)
+    cwo.shutdown_pools()
+
+
+if __name__ == '__main__':
+    _test_dispatch()
+    _test_shared_memory()
+    _test()